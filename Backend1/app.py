@@ -4,7 +4,7 @@ from contextlib import asynccontextmanager
 import httpx
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import ORJSONResponse
+from fastapi.responses import ORJSONResponse, Response
 
 from config import settings
 from db import init_pool
@@ -13,6 +13,13 @@ from routers.history import router as history_router
 from routers.session import router as session_router
 from routers.feedback import router as feedback_router
 from routers.user_info import router as userinfo_router
+from routers.translator import translation_memory_stats
+from services.admission import admission_stats
+from services.answer_cache import answer_cache_stats
+from services.downstream import downstream_stats
+from services.metrics import CONTENT_TYPE, register_collector, render_latest
+from services.profile_cache import start_listener, stop_listener, profile_cache_stats
+from services.write_behind import queue as write_behind, write_behind_stats
 
 # Exposed so other modules (e.g., chat.py) can reuse the same client
 _httpx_client: httpx.AsyncClient | None = None
@@ -24,11 +31,13 @@ async def lifespan(app: FastAPI):
     App startup/shutdown:
     - Initialize asyncpg pool
     - Create a shared httpx.AsyncClient with NO timeouts (per your requirement)
+    - LISTEN for profile-cache invalidations from other workers
+    - Run the write-behind queue; drain it before shutting down
     """
     global _httpx_client
 
     # Initialize DB pool (no statement_timeout; configured in src/db.py)
-    await init_pool()
+    pool = await init_pool()
 
     # Shared HTTP client — no timeouts
     _httpx_client = httpx.AsyncClient(
@@ -38,10 +47,16 @@ async def lifespan(app: FastAPI):
         http2=True,
     )
 
+    await start_listener()
+    if settings.WRITE_BEHIND_ENABLED:
+        await write_behind.start(pool)
+
     try:
         yield
     finally:
-        # Graceful shutdown
+        # Graceful shutdown: flush queued writes while the pool is still up
+        await write_behind.stop()
+        await stop_listener()
         if _httpx_client:
             await _httpx_client.aclose()
 
@@ -76,6 +91,68 @@ app.include_router(userinfo_router)
 async def health():
     return {"status": "ok"}
 
+@app.get("/stats/translation-memory")
+async def translation_memory():
+    return {"status": "ok", "data": translation_memory_stats()}
+
+@app.get("/stats/profile-cache")
+async def profile_cache():
+    return {"status": "ok", "data": profile_cache_stats()}
+
+@app.get("/stats/write-behind")
+async def write_behind_status():
+    return {"status": "ok", "data": write_behind_stats()}
+
+# Prometheus: counters kept by the caches/queue are read at scrape time
+def _cache_counts():
+    tm, pc = translation_memory_stats(), profile_cache_stats()
+    return {
+        ("translation_memory_l1", "hit"): tm["l1_hits"],
+        ("translation_memory_l2", "hit"): tm["l2_hits"],
+        ("translation_memory", "miss"): tm["misses"],
+        ("profile", "hit"): pc["hits"],
+        ("profile", "miss"): pc["misses"],
+    }
+
+register_collector("agri_cache_lookups_total", "Lookups in the in-process caches.", "counter",
+                   ("cache", "result"), _cache_counts)
+register_collector("agri_translator_batches_total", "Micro-batched Google Translate requests sent.", "counter",
+                   (), lambda: {(): translation_memory_stats()["batches_sent"]})
+register_collector("agri_answer_cache_saved_seconds_total",
+                   "Downstream time not spent thanks to answer-cache hits.", "counter",
+                   (), lambda: {(): answer_cache_stats()["saved_latency_s"]})
+register_collector("agri_admission_in_flight", "KisanSaathi calls currently admitted.", "gauge",
+                   (), lambda: {(): admission_stats()["in_flight"]})
+register_collector("agri_admission_queued", "KisanSaathi calls waiting for admission.", "gauge",
+                   (), lambda: {(): admission_stats()["queued"]})
+register_collector("agri_downstream_endpoint_up", "1 while the endpoint's circuit breaker is not open.", "gauge",
+                   ("endpoint",), lambda: {(ep["url"],): float(ep["state"] != "open")
+                                           for ep in downstream_stats()["endpoints"]})
+register_collector("agri_downstream_endpoint_outstanding", "KisanSaathi requests in flight per endpoint.", "gauge",
+                   ("endpoint",), lambda: {(ep["url"],): ep["outstanding"] for ep in downstream_stats()["endpoints"]})
+register_collector("agri_write_behind_pending", "Writes waiting in the write-behind queue.", "gauge",
+                   (), lambda: {(): write_behind_stats()["pending"]})
+register_collector("agri_write_behind_flushed_total", "Writes committed by the write-behind queue.", "counter",
+                   (), lambda: {(): write_behind_stats()["flushed"]})
+register_collector("agri_write_behind_failures_total", "Failed write-behind flushes.", "counter",
+                   (), lambda: {(): write_behind_stats()["failures"]})
+
+@app.get("/stats/answer-cache")
+async def answer_cache_status():
+    return {"status": "ok", "data": answer_cache_stats()}
+
+@app.get("/stats/admission")
+async def admission_status():
+    return {"status": "ok", "data": admission_stats()}
+
+@app.get("/stats/downstream")
+async def downstream_status():
+    return {"status": "ok", "data": downstream_stats()}
+
+@app.get("/metrics")
+async def metrics():
+    return Response(render_latest(), media_type=CONTENT_TYPE)
+
 @app.get("/")
 async def root():
     return {"name": "Agri Chat API", "status": "ok"}
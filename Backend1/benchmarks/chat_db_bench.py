@@ -0,0 +1,212 @@
+# src/benchmarks/chat_db_bench.py
+"""
+DB time per /chat turn: per-query statements vs the single-statement context
+loader and turn writer (services/chat_store.py).
+
+  legacy: title, profile and last-5-turns as three pooled queries (run concurrently,
+          as the stage graph did), INSERT of the user turn, UPDATE with the reply,
+          and a separate upsert of the UI translations
+  new:    load_context() (one statement) + record_turn() (one statement)
+
+Everything runs in a throw-away schema on the given Postgres (created from the
+files in migrations/, seeded, dropped at the end), so it is safe to point at a
+local dev database.
+
+Usage (from Backend1/):
+    python -m benchmarks.chat_db_bench --dsn postgresql://postgres@localhost/postgres
+    python -m benchmarks.chat_db_bench --turns 2000 --concurrency 16 --history 200
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import asyncpg  # noqa: E402
+
+from services import chat_store  # noqa: E402
+from services.profile_cache import cache as profile_cache  # noqa: E402
+
+MIGRATIONS = Path(__file__).resolve().parents[1] / "migrations"
+UI_LANG = "hi"
+
+
+async def _setup(dsn: str, schema: str, sessions: int, history: int) -> asyncpg.Pool:
+    admin = await asyncpg.connect(dsn=dsn)
+    await admin.execute(f'CREATE SCHEMA "{schema}"')
+    await admin.close()
+    pool = await asyncpg.create_pool(dsn=dsn, min_size=4, max_size=20,
+                                     server_settings={"search_path": schema})
+    async with pool.acquire() as conn:
+        await conn.execute("""
+            CREATE TABLE user_information (
+                user_email TEXT PRIMARY KEY, mode TEXT, language TEXT, pincode TEXT
+            )
+        """)
+        # 001 backfills from a legacy "sessions" table when public.sessions exists; an
+        # empty one here shadows it, so a dev database's real history is not copied in
+        await conn.execute("""
+            CREATE TABLE sessions (
+                session_id TEXT, user_email TEXT, session_name TEXT, message_id TEXT,
+                user_query_raw TEXT, user_query_en TEXT, bot_message TEXT,
+                created_time TIMESTAMPTZ, end_time TIMESTAMPTZ
+            )
+        """)
+        for path in sorted(MIGRATIONS.glob("[0-9][0-9][0-9]_*.sql")):
+            await conn.execute(path.read_text(encoding="utf-8"))
+
+        now = datetime.now(timezone.utc)
+        users = [f"farmer{i}@example.com" for i in range(max(1, sessions // 4))]
+        await conn.executemany(
+            "INSERT INTO user_information VALUES ($1, 'personal', $2, '411001')",
+            [(u, UI_LANG) for u in users],
+        )
+        sess_rows, msg_rows = [], []
+        for i in range(sessions):
+            sid, user = str(uuid.uuid4()), users[i % len(users)]
+            sess_rows.append((sid, user, f"Session {i}", now, now, history))
+            for j in range(history):
+                ts = now - timedelta(minutes=history - j)
+                msg_rows.append((str(uuid.uuid4()), sid, user, f"question {j} about wheat",
+                                 f"question {j} about wheat", f"answer {j} " * 40, ts, ts))
+        await conn.copy_records_to_table("chat_sessions", records=sess_rows, columns=[
+            "session_id", "user_email", "title", "created_time", "last_activity", "message_count"])
+        await conn.copy_records_to_table("chat_messages", records=msg_rows, columns=[
+            "message_id", "session_id", "user_email", "user_query_raw", "user_query_en",
+            "bot_message", "created_time", "end_time"])
+        await conn.execute("ANALYZE")
+    return pool
+
+
+async def _legacy_turn(pool, sid: str, user: str) -> int:
+    async def title():
+        return await pool.fetchrow("SELECT title FROM chat_sessions WHERE session_id=$1 AND user_email=$2", sid, user)
+
+    async def profile():
+        return await pool.fetchrow("SELECT mode, language, pincode FROM user_information WHERE user_email=$1", user)
+
+    async def turns():
+        return await pool.fetch("""
+            SELECT COALESCE(user_query_en, ''), COALESCE(bot_message, '')
+            FROM chat_messages
+            WHERE session_id=$1
+            ORDER BY created_time DESC
+            LIMIT $2
+        """, sid, 5)
+
+    await asyncio.gather(title(), profile(), turns())
+    mid, now = str(uuid.uuid4()), datetime.now(timezone.utc)
+    await pool.execute("""
+        WITH s AS (
+          UPDATE chat_sessions
+          SET last_activity=$6, message_count=message_count+1
+          WHERE session_id=$2 AND user_email=$1
+          RETURNING session_id
+        )
+        INSERT INTO chat_messages (
+          message_id, session_id, user_email,
+          user_query_raw, user_query_en, created_time
+        ) SELECT $3, s.session_id, $1, $4, $5, $6 FROM s
+    """, user, sid, mid, "गेहूं में खाद", "fertilizer for wheat", now)
+    await pool.execute("""
+        UPDATE chat_messages
+        SET bot_message=$1, end_time=$2
+        WHERE message_id=$3 AND session_id=$4 AND user_email=$5
+    """, "Apply urea in two splits.", now, mid, sid, user)
+    await pool.execute("""
+        INSERT INTO message_translations (message_id, field, lang, text)
+        SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::text[])
+        ON CONFLICT (message_id, field, lang) DO UPDATE SET text = EXCLUDED.text
+    """, [mid, mid], ["bot_message", "user_query"], [UI_LANG, UI_LANG], ["यूरिया दो भागों में दें।", "गेहूं में खाद"])
+    return 6
+
+
+async def _new_turn(pool, sid: str, user: str) -> int:
+    profile_cache.clear()  # measure the statement, not the profile cache
+    await chat_store.load_context(pool, sid, user, 5)
+    mid, now = str(uuid.uuid4()), datetime.now(timezone.utc)
+    await chat_store.record_turn(
+        pool, user_email=user, session_id=sid, message_id=mid,
+        user_query_raw="गेहूं में खाद", user_query_en="fertilizer for wheat", created_time=now,
+        bot_message="Apply urea in two splits.", end_time=now,
+        translations=[(mid, "bot_message", UI_LANG, "यूरिया दो भागों में दें।"),
+                      (mid, "user_query", UI_LANG, "गेहूं में खाद")],
+    )
+    return 2
+
+
+async def _run(pool, fn, targets: List[Tuple[str, str]], turns: int, concurrency: int):
+    latencies: List[float] = []
+    statements = 0
+    it = iter(random.choices(targets, k=turns))
+    lock = asyncio.Lock()
+
+    async def worker():
+        nonlocal statements
+        while True:
+            async with lock:
+                nxt = next(it, None)
+            if nxt is None:
+                return
+            t0 = time.perf_counter()
+            n = await fn(pool, *nxt)
+            latencies.append((time.perf_counter() - t0) * 1000.0)
+            statements += n  # after the await: += across it loses other workers' counts
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, statements, time.perf_counter() - t0
+
+
+def _report(name: str, lat: List[float], statements: int, wall_s: float) -> None:
+    s = sorted(lat)
+    p95 = s[max(0, int(round(0.95 * len(s))) - 1)]
+    print(f"{name:<8} mean={statistics.mean(s):6.2f}ms  p50={statistics.median(s):6.2f}ms  "
+          f"p95={p95:6.2f}ms  statements/turn={statements / len(s):.1f}  turns/s={len(s) / wall_s:7.1f}")
+
+
+async def _main(args) -> None:
+    schema = f"chat_db_bench_{os.getpid()}"
+    pool = await _setup(args.dsn, schema, args.sessions, args.history)
+    try:
+        async with pool.acquire() as conn:
+            targets = [(r["session_id"], r["user_email"])
+                       for r in await conn.fetch("SELECT session_id, user_email FROM chat_sessions")]
+        # warm up both paths (connections, statement caches)
+        await _run(pool, _legacy_turn, targets, 50, args.concurrency)
+        await _run(pool, _new_turn, targets, 50, args.concurrency)
+
+        legacy = await _run(pool, _legacy_turn, targets, args.turns, args.concurrency)
+        new = await _run(pool, _new_turn, targets, args.turns, args.concurrency)
+        print(f"{args.turns} turns, concurrency={args.concurrency}, "
+              f"{args.sessions} sessions x {args.history} messages\n")
+        _report("legacy", *legacy)
+        _report("new", *new)
+    finally:
+        await pool.close()
+        admin = await asyncpg.connect(dsn=args.dsn)
+        await admin.execute(f'DROP SCHEMA "{schema}" CASCADE')
+        await admin.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dsn", default=os.getenv("DATABASE_URL", "postgresql://postgres@localhost/postgres"))
+    ap.add_argument("--sessions", type=int, default=200)
+    ap.add_argument("--history", type=int, default=50, help="messages per seeded session")
+    ap.add_argument("--turns", type=int, default=1000)
+    ap.add_argument("--concurrency", type=int, default=8)
+    args = ap.parse_args()
+    asyncio.run(_main(args))
+
+
+if __name__ == "__main__":
+    main()
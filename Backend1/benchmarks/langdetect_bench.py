@@ -0,0 +1,152 @@
+# src/benchmarks/langdetect_bench.py
+"""
+Offline language detector benchmark.
+
+Runs services.script_detect.detect_local over a labelled sample and reports:
+  - accuracy of the decisions taken locally (confidence >= threshold)
+  - share of inputs that no longer need a remote /detect call
+  - per-language breakdown and local detection latency
+
+Usage (from Backend1/):
+    python -m benchmarks.langdetect_bench
+    python -m benchmarks.langdetect_bench --threshold 0.9 --file samples.jsonl
+    python -m benchmarks.langdetect_bench --remote   # also score Google /detect on the fallbacks
+
+--file takes JSONL rows like {"text": "...", "lang": "hi"}.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import settings  # noqa: E402
+from services.script_detect import detect_local  # noqa: E402
+
+SAMPLE: List[Tuple[str, str]] = [
+    # hi
+    ("अगले तीन दिन बारिश होगी क्या", "hi"),
+    ("मक्का में खाद कब डालें", "hi"),
+    ("गन्ने का सरकारी रेट कितना है", "hi"),
+    ("मेरे आम के पेड़ पर फूल झड़ रहे हैं", "hi"),
+    ("ड्रिप सिंचाई पर कितनी सब्सिडी मिलती है", "hi"),
+    ("आलू में झुलसा रोग से कैसे बचाएं", "hi"),
+    # mr
+    ("पुढील तीन दिवस पाऊस पडेल का", "mr"),
+    ("मक्याला खत कधी द्यायचे", "mr"),
+    ("उसाचा सरकारी दर किती आहे", "mr"),
+    ("माझ्या आंब्याच्या झाडाचा मोहोर गळत आहे", "mr"),
+    ("ठिबक सिंचनासाठी किती अनुदान मिळते", "mr"),
+    ("बटाट्यावरील करपा रोग कसा टाळावा", "mr"),
+    # bn
+    ("আগামী তিন দিন বৃষ্টি হবে কি", "bn"),
+    ("ভুট্টায় সার কখন দেব", "bn"),
+    ("আখের সরকারি দাম কত", "bn"),
+    ("আমার আম গাছের মুকুল ঝরে যাচ্ছে", "bn"),
+    ("আলুর ধসা রোগ কীভাবে আটকাব", "bn"),
+    # as
+    ("অহা তিনি দিন বৰষুণ হ'বনে", "as"),
+    ("মাকৈত সাৰ কেতিয়া দিব লাগে", "as"),
+    ("কুঁহিয়াৰৰ চৰকাৰী দাম কিমান", "as"),
+    ("মোৰ আম গছৰ মল সৰি পৰিছে", "as"),
+    ("আলুৰ ধ্বসা ৰোগ কেনেকৈ ৰোধ কৰিম", "as"),
+    # single-script languages
+    ("ਅਗਲੇ ਤਿੰਨ ਦਿਨ ਮੀਂਹ ਪਵੇਗਾ", "pa"),
+    ("કપાસમાં કઈ દવા છાંટવી", "gu"),
+    ("ଧାନ ଚାଷ ପାଇଁ କେତେ ପାଣି ଦରକାର", "or"),
+    ("நெல் பயிருக்கு எவ்வளவு உரம் போட வேண்டும்", "ta"),
+    ("వరి పంటకు ఎంత ఎరువు వేయాలి", "te"),
+    ("ಭತ್ತಕ್ಕೆ ಎಷ್ಟು ಗೊಬ್ಬರ ಹಾಕಬೇಕು", "kn"),
+    ("നെല്ലിന് എത്ര വളം ഇടണം", "ml"),
+    # en
+    ("What is the weather forecast for this week?", "en"),
+    ("How much urea should I apply to wheat?", "en"),
+    ("Tell me about PM Kisan scheme", "en"),
+    ("onion price in Nashik today", "en"),
+    ("best time to sow mustard", "en"),
+    # romanized (label is the language; local detector should defer to remote)
+    ("kal barish hogi kya", "hi"),
+    ("gehu me kitna pani dena hai", "hi"),
+    ("udya paus padel ka", "mr"),
+    ("kandyacha bhav kay aahe", "mr"),
+    ("aaj bristi hobe ki", "bn"),
+    # Hinglish built from short words English also has ("me", "do", "is")
+    ("kapas me keeda", "hi"),
+    ("gehu me kida laga", "hi"),
+    ("do ekad me soybean", "hi"),
+    ("is saal kapas me gulabi sundi", "hi"),
+]
+
+
+def _load(path: str) -> List[Tuple[str, str]]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                obj = json.loads(line)
+                rows.append((obj["text"], obj["lang"]))
+    return rows
+
+
+async def _remote(texts: List[str]) -> List[str]:
+    from routers.translator import adetect_languages
+    return [l or "und" for l in await adetect_languages(texts)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--threshold", type=float, default=settings.LANG_DETECT_MIN_CONFIDENCE)
+    ap.add_argument("--file", help="JSONL with {text, lang} rows (default: built-in sample)")
+    ap.add_argument("--remote", action="store_true", help="also call Google /detect for the fallbacks")
+    args = ap.parse_args()
+
+    sample = _load(args.file) if args.file else SAMPLE
+    per_lang = defaultdict(lambda: [0, 0, 0])  # total, local, local_correct
+    local_ok = local_n = 0
+    fallbacks: List[Tuple[str, str]] = []
+
+    t0 = time.perf_counter()
+    results = [detect_local(text) for text, _ in sample]
+    elapsed_us = (time.perf_counter() - t0) * 1e6 / max(1, len(sample))
+
+    for (text, gold), (lang, conf) in zip(sample, results):
+        stats = per_lang[gold]
+        stats[0] += 1
+        if lang and conf >= args.threshold:
+            local_n += 1
+            stats[1] += 1
+            if lang == gold:
+                local_ok += 1
+                stats[2] += 1
+            else:
+                print(f"  MISS  gold={gold} got={lang} conf={conf:.2f}  {text}")
+        else:
+            fallbacks.append((text, gold))
+
+    n = len(sample)
+    print(f"\nsamples:            {n}")
+    print(f"threshold:          {args.threshold:.2f}")
+    print(f"decided locally:    {local_n} ({100.0 * local_n / n:.1f}% of remote calls avoided)")
+    print(f"local accuracy:     {100.0 * local_ok / max(1, local_n):.1f}%")
+    print(f"local latency:      {elapsed_us:.1f} us/detection")
+
+    if args.remote and fallbacks:
+        remote = asyncio.run(_remote([t for t, _ in fallbacks]))
+        ok = sum(1 for (_, gold), got in zip(fallbacks, remote) if got == gold)
+        print(f"remote accuracy:    {100.0 * ok / len(fallbacks):.1f}% on {len(fallbacks)} fallbacks")
+        print(f"overall accuracy:   {100.0 * (local_ok + ok) / n:.1f}%")
+
+    print("\nlang  total  local  local_correct")
+    for lang in sorted(per_lang):
+        total, loc, cor = per_lang[lang]
+        print(f"{lang:<5} {total:>5}  {loc:>5}  {cor:>13}")
+
+
+if __name__ == "__main__":
+    main()
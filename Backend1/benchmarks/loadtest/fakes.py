@@ -0,0 +1,270 @@
+# src/benchmarks/loadtest/fakes.py
+"""
+Local stand-ins for every external API the two backends call, on one port:
+
+  translate  POST /language/translate/v2            Google Translate v2 (batched q=...)
+             POST /language/translate/v2/detect
+  gemini     POST /v1beta/models/{model}:generateContent         google-genai / ADK and
+             POST /v1beta/models/{model}:streamGenerateContent   google-generativeai (REST)
+  weather    GET  /geo/1.0/zip, GET /data/2.5/forecast/daily     OpenWeather
+  embeddings POST /v1/embeddings                                  OpenAI
+
+Each service sleeps for a log-normal latency and fails with a given probability,
+configured as name=median_ms,sigma,error_rate (e.g. "gemini=900,0.4,0.01").
+
+The Gemini fake answers in plain text, returns 'true'/'false' to the relevance
+prompt, and, when the request declares tools, calls one of them with probability
+--tool-call-rate (arguments filled from the declared schema), so ADK tool paths
+(weather, embeddings + pgvector search) get exercised too.
+
+Usage (from Backend1/):
+    python -m benchmarks.loadtest.fakes --port 9100 --profile gemini=900,0.4,0.01
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class Profile:
+    median_ms: float
+    sigma: float = 0.3
+    error_rate: float = 0.0
+
+    def delay_s(self) -> float:
+        if self.median_ms <= 0:
+            return 0.0
+        return self.median_ms * math.exp(random.gauss(0.0, self.sigma)) / 1000.0
+
+    def fails(self) -> bool:
+        return random.random() < self.error_rate
+
+
+# close to what the real services do from an Indian region
+DEFAULT_PROFILES: Dict[str, Profile] = {
+    "translate": Profile(60, 0.35, 0.002),
+    "detect": Profile(45, 0.35, 0.002),
+    "gemini": Profile(900, 0.45, 0.005),
+    "weather": Profile(120, 0.4, 0.005),
+    "embeddings": Profile(150, 0.4, 0.003),
+}
+
+_REPLY = ("*Wheat* needs irrigation at *crown root initiation* (20-25 days after sowing). "
+          "Apply *urea* in two splits: half at sowing and half after the first irrigation.\n"
+          "- Keep the field free of weeds in the first 30-35 days\n"
+          "- Check soil moisture at 5-7 cm before watering\n"
+          "Next: share your *land area* for exact fertilizer quantities.")
+
+
+def parse_profiles(specs: List[str]) -> Dict[str, Profile]:
+    """["gemini=900,0.4,0.01", ...] over DEFAULT_PROFILES."""
+    profiles = dict(DEFAULT_PROFILES)
+    for spec in specs or []:
+        name, _, values = spec.partition("=")
+        if name not in profiles:
+            raise ValueError(f"unknown service {name!r} (one of {', '.join(profiles)})")
+        parts = [float(v) for v in values.split(",") if v.strip()]
+        base = profiles[name]
+        profiles[name] = Profile(
+            parts[0] if len(parts) > 0 else base.median_ms,
+            parts[1] if len(parts) > 1 else base.sigma,
+            parts[2] if len(parts) > 2 else base.error_rate,
+        )
+    return profiles
+
+
+def _fake_value(schema: Dict[str, Any], text: str) -> Any:
+    kind = str(schema.get("type", "STRING")).upper()
+    if kind in ("INTEGER", "NUMBER"):
+        return 5
+    if kind == "BOOLEAN":
+        return False
+    if kind == "ARRAY":
+        return [_fake_value(schema.get("items") or {}, text)]
+    if kind == "OBJECT":
+        return {k: _fake_value(v, text) for k, v in (schema.get("properties") or {}).items()}
+    if "pincode" in str(schema.get("description", "")).lower():
+        return "411001"
+    return text
+
+
+def _last_user_text(body: Dict[str, Any]) -> str:
+    for content in reversed(body.get("contents") or []):
+        for part in content.get("parts") or []:
+            if part.get("text"):
+                return part["text"]
+    return ""
+
+
+def _wants_tool_answer(body: Dict[str, Any]) -> bool:
+    """True when the last turn is a tool result: the model should answer now."""
+    contents = body.get("contents") or []
+    if not contents:
+        return False
+    return any("functionResponse" in p for p in contents[-1].get("parts") or [])
+
+
+def _gemini_parts(body: Dict[str, Any], tool_call_rate: float) -> List[Dict[str, Any]]:
+    text = _last_user_text(body)
+    if "(true/false only)" in text:
+        return [{"text": random.choice(("true", "false"))}]
+    decls = [d for t in body.get("tools") or [] for d in t.get("functionDeclarations") or []]
+    if decls and not _wants_tool_answer(body) and random.random() < tool_call_rate:
+        decl = random.choice(decls)
+        # newer ADK versions send a JSON schema instead of parameters
+        schema = decl.get("parameters") or decl.get("parametersJsonSchema") or decl.get("parameters_json_schema") or {}
+        props = schema.get("properties") or {}
+        args = {k: "411001" if "pincode" in k.lower() else _fake_value(v, text[:200]) for k, v in props.items()}
+        return [{"functionCall": {"name": decl["name"], "args": args}}]
+    return [{"text": _REPLY}]
+
+
+def _prompt_tokens(body: Dict[str, Any]) -> int:
+    """~4 characters per token over everything the model would read."""
+    return len(json.dumps([body.get("systemInstruction"), body.get("contents")], ensure_ascii=False)) // 4
+
+
+def _gemini_response(parts: List[Dict[str, Any]], prompt_tokens: int) -> Dict[str, Any]:
+    n = sum(len(p.get("text", "")) for p in parts) // 4
+    return {
+        "candidates": [{"content": {"role": "model", "parts": parts}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": prompt_tokens, "candidatesTokenCount": n,
+                          "totalTokenCount": prompt_tokens + n},
+        "modelVersion": "fake",
+    }
+
+
+def build_app(profiles: Dict[str, Profile], tool_call_rate: float = 0.3) -> FastAPI:
+    app = FastAPI(title="KisanSaathi load-test fakes")
+    calls: Dict[str, int] = {name: 0 for name in profiles}
+    errors: Dict[str, int] = {name: 0 for name in profiles}
+
+    async def _latency(name: str, status: int = 503) -> Optional[JSONResponse]:
+        prof = profiles[name]
+        calls[name] += 1
+        await asyncio.sleep(prof.delay_s())
+        if prof.fails():
+            errors[name] += 1
+            return JSONResponse({"error": {"code": status, "message": f"fake {name} failure"}}, status_code=status)
+        return None
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    @app.get("/stats")
+    async def stats():
+        return {"calls": calls, "errors": errors}
+
+    # ---------- Google Translate v2 ----------
+    @app.post("/language/translate/v2")
+    async def translate(request: Request):
+        if (err := await _latency("translate")) is not None:
+            return err
+        form = await request.form()
+        target = request.query_params.get("target", "en")
+        return {"data": {"translations": [
+            {"translatedText": f"[{target}] {q}", "detectedSourceLanguage": "en"} for q in form.getlist("q")
+        ]}}
+
+    @app.post("/language/translate/v2/detect")
+    async def detect(request: Request):
+        if (err := await _latency("detect")) is not None:
+            return err
+        form = await request.form()
+        return {"data": {"detections": [
+            [{"language": "hi" if any("ऀ" <= ch <= "ॿ" for ch in q) else "en",
+              "confidence": 0.98, "isReliable": True}]
+            for q in form.getlist("q")
+        ]}}
+
+    # ---------- Gemini (v1beta REST, both SDKs) ----------
+    @app.post("/{version}/models/{model_action:path}")
+    async def gemini(version: str, model_action: str, request: Request):
+        if (err := await _latency("gemini", 503)) is not None:
+            return err
+        body = await request.json()
+        parts = _gemini_parts(body, tool_call_rate)
+        prompt_tokens = _prompt_tokens(body)
+        if not model_action.endswith(":streamGenerateContent"):
+            return _gemini_response(parts, prompt_tokens)
+
+        async def _sse():
+            if len(parts) == 1 and "text" in parts[0]:
+                words = parts[0]["text"].split(" ")
+                step = max(1, len(words) // 6)
+                for i in range(0, len(words), step):
+                    chunk = " ".join(words[i:i + step]) + (" " if i + step < len(words) else "")
+                    yield f"data: {json.dumps(_gemini_response([{'text': chunk}], prompt_tokens))}\r\n\r\n"
+                    await asyncio.sleep(0.02)
+            else:
+                yield f"data: {json.dumps(_gemini_response(parts, prompt_tokens))}\r\n\r\n"
+
+        return StreamingResponse(_sse(), media_type="text/event-stream")
+
+    # ---------- OpenWeather ----------
+    @app.get("/geo/1.0/zip")
+    async def geo_zip(zip: str = ""):
+        if (err := await _latency("weather")) is not None:
+            return err
+        pin = zip.split(",")[0]
+        seed = int(pin) if pin.isdigit() else 0
+        return {"zip": pin, "name": "Pune", "lat": 18.0 + (seed % 1000) / 1000.0,
+                "lon": 73.0 + (seed % 997) / 1000.0, "country": "IN"}
+
+    @app.get("/data/2.5/forecast/daily")
+    async def forecast_daily(cnt: int = 7):
+        if (err := await _latency("weather")) is not None:
+            return err
+        now = int(time.time())
+        return {"cnt": cnt, "list": [
+            {"dt": now + 86400 * i, "temp": {"day": 31.0 + i % 3, "min": 22.0, "max": 34.0},
+             "humidity": 60 + i, "speed": 3.2, "clouds": 40,
+             "weather": [{"description": "light rain" if i % 3 == 0 else "scattered clouds"}],
+             **({"rain": 2.5} if i % 3 == 0 else {})}
+            for i in range(cnt)
+        ]}
+
+    # ---------- OpenAI embeddings ----------
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        if (err := await _latency("embeddings", 429)) is not None:
+            return err
+        body = await request.json()
+        inputs = body.get("input")
+        inputs = inputs if isinstance(inputs, list) else [inputs]
+        data = []
+        for i, text in enumerate(inputs):
+            rnd = random.Random(hash(str(text)))
+            vec = [rnd.uniform(-1.0, 1.0) for _ in range(int(body.get("dimensions") or 1536))]
+            norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+            data.append({"object": "embedding", "index": i, "embedding": [v / norm for v in vec]})
+        return {"object": "list", "data": data, "model": body.get("model", "text-embedding-3-small"),
+                "usage": {"prompt_tokens": 8, "total_tokens": 8}}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=9100)
+    ap.add_argument("--profile", action="append", default=[], metavar="NAME=MEDIAN_MS,SIGMA,ERROR_RATE")
+    ap.add_argument("--tool-call-rate", type=float, default=0.3)
+    args = ap.parse_args()
+    app = build_app(parse_profiles(args.profile), args.tool_call_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+# src/benchmarks/loadtest/loadgen.py
+"""
+Open-loop load generator for Backend1 (/chat, /history) and Backend2 (/KisanSaathi).
+
+Requests start on a Poisson schedule at the target rate whether or not earlier
+ones finished, so a slow server shows up as latency and errors rather than as a
+politely lower request rate (no coordinated omission). Latency is measured from
+the scheduled start.
+
+Report per scenario: p50/p95/p99, achieved throughput and error rate (non-2xx,
+timeouts, and bodies carrying the "couldn't fetch" fallback). --max-p95 and
+--max-error-rate turn it into a gate (exit code 1), --baseline compares with a
+previous --json report.
+
+Usage (from Backend1/), against running servers:
+    python -m benchmarks.loadtest.loadgen --backend1 http://127.0.0.1:8080 \\
+        --backend2 http://127.0.0.1:8000 --targets targets.json --rps 20 --duration 60
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+FALLBACK_MARKER = "couldn't fetch"
+
+QUESTIONS = (
+    "How much urea should I apply to wheat at tillering?",
+    "Will it rain this week at my farm?",
+    "गेहूं में पहली सिंचाई कब करें?",
+    "Whiteflies are attacking my cotton, what should I spray?",
+    "What is the onion price in Nashik today?",
+    "kapas me kitna pani dena chahiye",
+    "Is there a subsidy for drip irrigation?",
+    "and how much for 2 acres?",
+)
+
+DEFAULT_MIX = {"chat": 0.5, "history": 0.25, "kisansaathi": 0.25}
+
+
+@dataclass
+class Result:
+    latencies_ms: List[float] = field(default_factory=list)
+    errors: int = 0
+    fallbacks: int = 0
+    status: Dict[str, int] = field(default_factory=dict)
+
+    def add(self, ms: float, status: str, ok: bool, fallback: bool = False) -> None:
+        self.latencies_ms.append(ms)
+        self.status[status] = self.status.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+        if fallback:
+            self.fallbacks += 1
+
+
+def _pct(sorted_ms: List[float], q: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    return sorted_ms[min(len(sorted_ms) - 1, max(0, int(round(q * len(sorted_ms))) - 1))]
+
+
+def summarize(results: Dict[str, Result], wall_s: float) -> Dict[str, Dict[str, float]]:
+    out = {}
+    for name, r in results.items():
+        s = sorted(r.latencies_ms)
+        n = len(s)
+        out[name] = {
+            "requests": n,
+            "throughput_rps": round(n / wall_s, 2) if wall_s else 0.0,
+            "p50_ms": round(_pct(s, 0.50), 1),
+            "p95_ms": round(_pct(s, 0.95), 1),
+            "p99_ms": round(_pct(s, 0.99), 1),
+            "error_rate": round(r.errors / n, 4) if n else 0.0,
+            "fallback_rate": round(r.fallbacks / n, 4) if n else 0.0,
+            "status": dict(r.status),
+        }
+    return out
+
+
+class LoadGenerator:
+    def __init__(self, backend1: str, backend2: str, targets: List[Tuple[str, str]],
+                 mix: Optional[Dict[str, float]] = None, timeout_s: float = 60.0, stream: bool = False):
+        if not targets:
+            raise ValueError("no (session_id, user_email) targets to drive")
+        self.backend1 = backend1.rstrip("/")
+        self.backend2 = backend2.rstrip("/")
+        self.targets = targets
+        self.mix = {k: v for k, v in (mix or DEFAULT_MIX).items() if v > 0}
+        if not self.backend2:
+            self.mix.pop("kisansaathi", None)
+        self.timeout_s = timeout_s
+        self.stream = stream
+        self.results: Dict[str, Result] = {name: Result() for name in self.mix}
+        self._scenarios: Dict[str, Callable] = {
+            "chat": self._chat, "history": self._history, "kisansaathi": self._kisansaathi,
+        }
+
+    # ---------- scenarios: return (status, ok, fallback) ----------
+    async def _chat(self, client: httpx.AsyncClient) -> Tuple[str, bool, bool]:
+        sid, user = random.choice(self.targets)
+        body = {"session_id": sid, "user_email": user, "user_msg": random.choice(QUESTIONS)}
+        if self.stream:
+            async with client.stream("POST", f"{self.backend1}/chat/stream", json=body) as r:
+                text = "".join([chunk async for chunk in r.aiter_text()])
+        else:
+            r = await client.post(f"{self.backend1}/chat", json=body)
+            text = r.text
+        return str(r.status_code), r.is_success, FALLBACK_MARKER in text
+
+    async def _history(self, client: httpx.AsyncClient) -> Tuple[str, bool, bool]:
+        sid, user = random.choice(self.targets)
+        if random.random() < 0.5:
+            body = {"domain": "session-chat", "user_email": user, "session_id": sid, "limit": 50}
+        else:
+            body = {"domain": "list-session", "user_email": user, "limit": 25}
+        r = await client.post(f"{self.backend1}/history", json=body)
+        return str(r.status_code), r.is_success, False
+
+    async def _kisansaathi(self, client: httpx.AsyncClient) -> Tuple[str, bool, bool]:
+        sid, user = random.choice(self.targets)
+        body = {"user_email": user, "session_id": sid, "message_id": str(uuid.uuid4()),
+                "user_query": random.choice(QUESTIONS),
+                "meta": {"language": "en", "mode": random.choice(("general", "personal")), "pincode": "411001"}}
+        r = await client.post(f"{self.backend2}/KisanSaathi", json=body)
+        return str(r.status_code), r.is_success, False
+
+    # ---------- driver ----------
+    async def _one(self, client: httpx.AsyncClient, name: str, scheduled: float) -> None:
+        try:
+            status, ok, fallback = await self._scenarios[name](client)
+        except httpx.TimeoutException:
+            status, ok, fallback = "timeout", False, False
+        except httpx.HTTPError as e:
+            status, ok, fallback = type(e).__name__, False, False
+        self.results[name].add((time.perf_counter() - scheduled) * 1000.0, status, ok and not fallback, fallback)
+
+    async def run(self, rps: float, duration_s: float, warmup_s: float = 0.0) -> Dict[str, Dict[str, float]]:
+        names, weights = list(self.mix), list(self.mix.values())
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=200)
+        async with httpx.AsyncClient(timeout=self.timeout_s, limits=limits) as client:
+            if warmup_s > 0:
+                await self._drive(client, names, weights, rps, warmup_s)
+                self.results = {name: Result() for name in self.mix}
+            t0 = time.perf_counter()
+            await self._drive(client, names, weights, rps, duration_s)
+            return summarize(self.results, time.perf_counter() - t0)
+
+    async def _drive(self, client, names, weights, rps: float, duration_s: float) -> None:
+        tasks = set()
+        start = time.perf_counter()
+        next_at = start
+        while next_at - start < duration_s:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            name = random.choices(names, weights)[0]
+            task = asyncio.create_task(self._one(client, name, next_at))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            next_at += random.expovariate(rps)
+        if tasks:
+            await asyncio.gather(*tasks)
+
+
+# ---------- reporting / gates ----------
+def print_report(summary: Dict[str, Dict[str, float]], rps: float, duration_s: float) -> None:
+    print(f"\ntarget {rps:g} req/s for {duration_s:g}s\n")
+    print(f"{'scenario':<12}{'reqs':>7}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}{'fallbk':>8}")
+    for name, s in summary.items():
+        print(f"{name:<12}{s['requests']:>7}{s['throughput_rps']:>8.1f}{s['p50_ms']:>10.1f}{s['p95_ms']:>10.1f}"
+              f"{s['p99_ms']:>10.1f}{s['error_rate']:>9.2%}{s['fallback_rate']:>8.2%}")
+
+
+def check_gates(summary: Dict[str, Dict[str, float]], max_p95: Dict[str, float], max_error_rate: Optional[float],
+                baseline: Optional[Dict[str, Dict[str, float]]], tolerance: float) -> List[str]:
+    failures = []
+    for name, s in summary.items():
+        limit = max_p95.get(name, max_p95.get("*"))
+        if limit is not None and s["p95_ms"] > limit:
+            failures.append(f"{name}: p95 {s['p95_ms']:.1f}ms > {limit:.1f}ms")
+        if max_error_rate is not None and s["error_rate"] > max_error_rate:
+            failures.append(f"{name}: error rate {s['error_rate']:.2%} > {max_error_rate:.2%}")
+        base = (baseline or {}).get(name)
+        if base and base.get("p95_ms") and s["p95_ms"] > base["p95_ms"] * (1.0 + tolerance):
+            failures.append(f"{name}: p95 {s['p95_ms']:.1f}ms regressed from {base['p95_ms']:.1f}ms "
+                            f"(> {tolerance:.0%} tolerance)")
+    return failures
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """"chat=2,history=1" -> normalised weights."""
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, w = part.partition("=")
+        mix[name] = float(w or 1)
+    unknown = set(mix) - set(DEFAULT_MIX)
+    if unknown:
+        raise ValueError(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    total = sum(mix.values()) or 1.0
+    return {k: v / total for k, v in mix.items()}
+
+
+def parse_p95(specs: List[str]) -> Dict[str, float]:
+    """["chat=4000", "800"] -> {"chat": 4000.0, "*": 800.0}"""
+    out = {}
+    for spec in specs or []:
+        name, sep, value = spec.rpartition("=")
+        out[name if sep else "*"] = float(value)
+    return out
+
+
+def add_load_args(ap: argparse.ArgumentParser) -> None:
+    ap.add_argument("--rps", type=float, default=10.0, help="target request rate (all scenarios)")
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds of measured load")
+    ap.add_argument("--warmup", type=float, default=5.0, help="seconds of unmeasured load first")
+    ap.add_argument("--mix", default="chat=2,history=1,kisansaathi=1")
+    ap.add_argument("--stream", action="store_true", help="drive /chat/stream instead of /chat")
+    ap.add_argument("--timeout", type=float, default=60.0)
+    ap.add_argument("--max-p95", action="append", default=[], metavar="[SCENARIO=]MS")
+    ap.add_argument("--max-error-rate", type=float, default=None)
+    ap.add_argument("--baseline", help="previous --json report; fail when p95 regresses beyond --tolerance")
+    ap.add_argument("--tolerance", type=float, default=0.2)
+    ap.add_argument("--json", help="write the report here")
+
+
+async def run_load(args, backend1: str, backend2: str, targets: List[Tuple[str, str]]) -> int:
+    gen = LoadGenerator(backend1, backend2, targets, parse_mix(args.mix), args.timeout, args.stream)
+    summary = await gen.run(args.rps, args.duration, args.warmup)
+    print_report(summary, args.rps, args.duration)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+    failures = check_gates(summary, parse_p95(args.max_p95), args.max_error_rate, baseline, args.tolerance)
+    for msg in failures:
+        print("FAIL", msg)
+    return 1 if failures else 0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--backend1", default="http://127.0.0.1:8080")
+    ap.add_argument("--backend2", default="", help="Backend2 base URL (omit to skip /KisanSaathi)")
+    ap.add_argument("--targets", required=True, help='JSON list of [session_id, user_email] pairs')
+    add_load_args(ap)
+    args = ap.parse_args()
+    with open(args.targets, encoding="utf-8") as f:
+        targets = [tuple(t) for t in json.load(f)]
+    sys.exit(asyncio.run(run_load(args, args.backend1, args.backend2, targets)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# src/benchmarks/loadtest/pg_fixture.py
+"""
+Throw-away Postgres for the load test.
+
+With a DSN, a fresh database (kisansaathi_lt_<pid>) is created on that server and
+dropped afterwards. Without one, a temporary cluster is started from the local
+PostgreSQL binaries (initdb / pg_ctl on PATH or under /usr/lib/postgresql/*/bin),
+listening on a private port, and removed at the end.
+
+The database gets the Backend1 schema (base tables + migrations/), seeded users,
+sessions and messages, and, when the pgvector extension is available, a small
+`documents` table for Backend2's knowledge search.
+"""
+import asyncio
+import glob
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncpg
+
+MIGRATIONS = Path(__file__).resolve().parents[2] / "migrations"
+
+# tables that exist outside migrations/ (created by hand in production)
+_BASE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS user_information (
+        user_email TEXT PRIMARY KEY,
+        mode       TEXT,
+        language   TEXT,
+        pincode    TEXT
+    );
+    CREATE TABLE IF NOT EXISTS feedback (
+        feedback_id  TEXT PRIMARY KEY,
+        session_id   TEXT,
+        user_email   TEXT,
+        action       TEXT,
+        comment      TEXT,
+        created_time TIMESTAMPTZ
+    );
+"""
+
+_LANGS = ("en", "hi", "mr", "en", "ta")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _pg_bin(name: str) -> Optional[str]:
+    found = shutil.which(name)
+    if found:
+        return found
+    candidates = sorted(glob.glob(f"/usr/lib/postgresql/*/bin/{name}"), reverse=True)
+    return candidates[0] if candidates else None
+
+
+def _with_database(dsn: str, dbname: str) -> str:
+    parts = urlsplit(dsn)
+    return urlunsplit((parts.scheme, parts.netloc, "/" + dbname, parts.query, parts.fragment))
+
+
+class PostgresFixture:
+    def __init__(self, dsn: str = "", users: int = 200, sessions_per_user: int = 3, history: int = 20):
+        self.server_dsn = dsn
+        self.users = users
+        self.sessions_per_user = sessions_per_user
+        self.history = history
+        self.dsn = ""
+        self.dbname = f"kisansaathi_lt_{os.getpid()}"
+        self.targets: List[Tuple[str, str]] = []   # (session_id, user_email)
+        self.has_vector = False
+        self._datadir: Optional[str] = None
+
+    # ---------- lifecycle ----------
+    async def start(self) -> str:
+        if not self.server_dsn:
+            self.server_dsn = self._start_cluster()
+        admin = await asyncpg.connect(dsn=self.server_dsn)
+        try:
+            await admin.execute(f'CREATE DATABASE "{self.dbname}"')
+        finally:
+            await admin.close()
+        self.dsn = _with_database(self.server_dsn, self.dbname)
+        conn = await asyncpg.connect(dsn=self.dsn)
+        try:
+            await self._schema(conn)
+            await self._seed(conn)
+        finally:
+            await conn.close()
+        return self.dsn
+
+    async def stop(self) -> None:
+        if self.dsn:
+            admin = await asyncpg.connect(dsn=self.server_dsn)
+            try:
+                await admin.execute(f'DROP DATABASE IF EXISTS "{self.dbname}" WITH (FORCE)')
+            finally:
+                await admin.close()
+        if self._datadir:
+            subprocess.run([_pg_bin("pg_ctl"), "-D", self._datadir, "-m", "immediate", "stop"],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            shutil.rmtree(self._datadir, ignore_errors=True)
+
+    def _start_cluster(self) -> str:
+        initdb, pg_ctl = _pg_bin("initdb"), _pg_bin("pg_ctl")
+        if not (initdb and pg_ctl):
+            raise RuntimeError("no PostgreSQL binaries found (initdb/pg_ctl); pass --dsn")
+        self._datadir = tempfile.mkdtemp(prefix="kisansaathi_pg_")
+        port = _free_port()
+        subprocess.run([initdb, "-D", self._datadir, "-A", "trust", "-U", "postgres", "--no-sync"],
+                       check=True, stdout=subprocess.DEVNULL)
+        opts = f"-p {port} -k {self._datadir} -c listen_addresses=127.0.0.1 -c fsync=off -c max_connections=300"
+        subprocess.run([pg_ctl, "-D", self._datadir, "-o", opts, "-w", "-l",
+                        os.path.join(self._datadir, "server.log"), "start"], check=True, stdout=subprocess.DEVNULL)
+        return f"postgresql://postgres@127.0.0.1:{port}/postgres"
+
+    # ---------- schema / data ----------
+    async def _schema(self, conn) -> None:
+        await conn.execute(_BASE_SCHEMA)
+        for path in sorted(MIGRATIONS.glob("[0-9][0-9][0-9]_*.sql")):
+            await conn.execute(path.read_text(encoding="utf-8"))
+        try:
+            await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            await conn.execute("""
+                CREATE TABLE documents (
+                    id        BIGSERIAL PRIMARY KEY,
+                    content   TEXT,
+                    metadata  JSONB,
+                    embedding vector(1536)
+                )
+            """)
+            self.has_vector = True
+        except asyncpg.PostgresError:
+            self.has_vector = False  # knowledge-search tool calls will error, like a DB outage
+
+    async def _seed(self, conn) -> None:
+        rnd = random.Random(7)
+        now = datetime.now(timezone.utc)
+        users = [f"farmer{i}@loadtest.local" for i in range(self.users)]
+        await conn.executemany(
+            "INSERT INTO user_information (user_email, mode, language, pincode) VALUES ($1, $2, $3, $4)",
+            [(u, "general" if i % 3 == 0 else "personal", _LANGS[i % len(_LANGS)], f"4110{i % 100:02d}")
+             for i, u in enumerate(users)],
+        )
+        sess_rows, msg_rows = [], []
+        for u in users:
+            for j in range(self.sessions_per_user):
+                sid = str(uuid.uuid4())
+                last = now - timedelta(hours=rnd.randint(0, 24 * 40))
+                sess_rows.append((sid, u, f"Wheat irrigation {j}", last - timedelta(hours=1), last, self.history))
+                self.targets.append((sid, u))
+                for k in range(self.history):
+                    ts = last - timedelta(minutes=self.history - k)
+                    msg_rows.append((str(uuid.uuid4()), sid, u, f"question {k} about wheat irrigation",
+                                     f"question {k} about wheat irrigation", _reply(k), ts, ts))
+        await conn.copy_records_to_table("chat_sessions", records=sess_rows, columns=[
+            "session_id", "user_email", "title", "created_time", "last_activity", "message_count"])
+        await conn.copy_records_to_table("chat_messages", records=msg_rows, columns=[
+            "message_id", "session_id", "user_email", "user_query_raw", "user_query_en",
+            "bot_message", "created_time", "end_time"])
+        if self.has_vector:
+            await conn.executemany(
+                "INSERT INTO documents (content, metadata, embedding) VALUES ($1, $2::jsonb, $3::text::vector)",
+                [(f"Irrigate rice at critical stages; snippet {i}.", json.dumps({"crop": "rice", "n": i}),
+                  _unit_vector(rnd)) for i in range(500)],
+            )
+        await conn.execute("ANALYZE")
+
+
+def _reply(k: int) -> str:
+    return f"Answer {k}: irrigate at crown root initiation, tillering and flowering. " * 4
+
+
+def _unit_vector(rnd: random.Random, dim: int = 1536) -> str:
+    vec = [rnd.uniform(-1.0, 1.0) for _ in range(dim)]
+    norm = math.sqrt(sum(v * v for v in vec))
+    return "[" + ",".join(f"{v / norm:.5f}" for v in vec) + "]"
+
+
+if __name__ == "__main__":
+    async def _demo() -> None:
+        fx = PostgresFixture(os.getenv("LOADTEST_PG_DSN", ""), users=5)
+        print("database:", await fx.start(), "vector:", fx.has_vector, "sessions:", len(fx.targets))
+        await fx.stop()
+
+    asyncio.run(_demo())
@@ -0,0 +1,170 @@
+# src/benchmarks/loadtest/run.py
+"""
+One-command offline load test of the whole stack.
+
+Starts, all on 127.0.0.1:
+  1. the fake external APIs (fakes.py): Google Translate, Gemini, OpenWeather, OpenAI
+  2. a throw-away Postgres (pg_fixture.py), seeded with users, sessions and history
+  3. Backend2 (uvicorn main:app) and Backend1 (uvicorn app:app), with every external
+     base URL pointed at the fakes and dummy API keys
+then drives /chat, /history and /KisanSaathi at the target rate (loadgen.py),
+prints p50/p95/p99, throughput and error rate per scenario, and tears it all down.
+No network access or real API keys are needed.
+
+Usage (from Backend1/):
+    python -m benchmarks.loadtest.run                                   # local initdb/pg_ctl
+    python -m benchmarks.loadtest.run --dsn postgresql://postgres@localhost/postgres
+    python -m benchmarks.loadtest.run --rps 30 --duration 120 --profile gemini=1500,0.5,0.02
+    python -m benchmarks.loadtest.run --json lt.json --baseline lt_main.json --max-error-rate 0.01
+
+The exit code is 1 when a --max-p95 / --max-error-rate / --baseline gate fails.
+Server logs are kept in the printed temporary directory.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx  # noqa: E402
+
+from benchmarks.loadtest.loadgen import add_load_args, run_load  # noqa: E402
+from benchmarks.loadtest.pg_fixture import PostgresFixture  # noqa: E402
+
+BACKEND1_DIR = Path(__file__).resolve().parents[2]
+BACKEND2_DIR = BACKEND1_DIR.parent / "Backend2"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _Proc:
+    def __init__(self, name: str, cmd: List[str], cwd: Path, env: Dict[str, str], logdir: str):
+        self.name = name
+        self.log_path = os.path.join(logdir, f"{name}.log")
+        self._log = open(self.log_path, "w", encoding="utf-8")
+        self.proc = subprocess.Popen(cmd, cwd=str(cwd), env={**os.environ, **env},
+                                     stdout=self._log, stderr=subprocess.STDOUT)
+
+    async def wait_ready(self, url: str, timeout_s: float = 90.0) -> None:
+        deadline = time.monotonic() + timeout_s
+        async with httpx.AsyncClient(timeout=2.0) as client:
+            while time.monotonic() < deadline:
+                if self.proc.poll() is not None:
+                    raise RuntimeError(f"{self.name} exited with {self.proc.returncode}; see {self.log_path}")
+                try:
+                    if (await client.get(url)).status_code < 500:
+                        return
+                except httpx.HTTPError:
+                    pass
+                await asyncio.sleep(0.3)
+        raise RuntimeError(f"{self.name} not ready after {timeout_s:.0f}s; see {self.log_path}")
+
+    def stop(self) -> None:
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+        self._log.close()
+
+
+def _uvicorn(target: str, port: int, workers: int) -> List[str]:
+    return [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning"]
+
+
+async def _main(args) -> int:
+    logdir = tempfile.mkdtemp(prefix="kisansaathi_lt_")
+    print(f"logs: {logdir}")
+    fakes_port, b1_port, b2_port = _free_port(), _free_port(), _free_port()
+    fakes_url = f"http://127.0.0.1:{fakes_port}"
+    procs: List[_Proc] = []
+    fixture: Optional[PostgresFixture] = None
+    try:
+        fake_cmd = [sys.executable, "-m", "benchmarks.loadtest.fakes", "--port", str(fakes_port),
+                    "--tool-call-rate", str(args.tool_call_rate)]
+        for spec in args.profile:
+            fake_cmd += ["--profile", spec]
+        fakes = _Proc("fakes", fake_cmd, BACKEND1_DIR, {}, logdir)
+        procs.append(fakes)
+
+        fixture = PostgresFixture(args.dsn, users=args.users, sessions_per_user=args.sessions_per_user,
+                                  history=args.history)
+        dsn = await fixture.start()
+        print(f"postgres: {len(fixture.targets)} sessions seeded (pgvector: {'yes' if fixture.has_vector else 'no'})")
+        await fakes.wait_ready(f"{fakes_url}/health")
+
+        b2_url = f"http://127.0.0.1:{b2_port}"
+        b2 = _Proc("backend2", _uvicorn("main:app", b2_port, args.workers), BACKEND2_DIR, {
+            "DATABASE_URL": dsn,
+            "GOOGLE_API_KEY": "loadtest",
+            "GOOGLE_GENAI_USE_VERTEXAI": "false",
+            "GOOGLE_GEMINI_BASE_URL": fakes_url,
+            "OPENAI_API_KEY": "loadtest",
+            "OPENAI_BASE_URL": f"{fakes_url}/v1",
+            "OPENWEATHER_API_KEY": "loadtest",
+            "OPENWEATHER_BASE_URL": fakes_url,
+            "ADK_SESSION_DB": os.path.join(logdir, "adk_sessions.sqlite3"),
+            "PINCODE_OVERLAY": os.path.join(logdir, "pincode_overlay.jsonl"),
+        }, logdir)
+        procs.append(b2)
+        b1 = _Proc("backend1", _uvicorn("app:app", b1_port, args.workers), BACKEND1_DIR, {
+            "DATABASE_URL": dsn,
+            "KISANSATHI_URL": f"{b2_url}/KisanSaathi",
+            "KISANSATHI_STREAM_URL": f"{b2_url}/KisanSaathi/stream",
+            "GOOGLE_API_KEY": "loadtest",
+            "GEMINI_API_ENDPOINT": fakes_url,
+            "GOOGLE_TRANSLATE_API_KEY": "loadtest",
+            "GOOGLE_TRANSLATE_URL": f"{fakes_url}/language/translate/v2",
+            "TRANSLATION_MEMORY_PATH": os.path.join(logdir, "translation_memory.sqlite3"),
+            "WRITE_BEHIND_SPILL_PATH": "",
+        }, logdir)
+        procs.append(b1)
+        await b2.wait_ready(f"{b2_url}/")
+        b1_url = f"http://127.0.0.1:{b1_port}"
+        await b1.wait_ready(f"{b1_url}/health")
+
+        code = await run_load(args, b1_url, b2_url, fixture.targets)
+
+        async with httpx.AsyncClient(timeout=5.0) as client:
+            stats = (await client.get(f"{fakes_url}/stats")).json()
+        print("\nexternal calls:", json.dumps(stats["calls"]), " injected errors:", json.dumps(stats["errors"]))
+        return code
+    finally:
+        for p in reversed(procs):
+            p.stop()
+        if fixture is not None:
+            await fixture.stop()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--dsn", default=os.getenv("LOADTEST_PG_DSN", ""),
+                    help="Postgres server to create the throw-away database on (default: temporary cluster)")
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--sessions-per-user", type=int, default=3)
+    ap.add_argument("--history", type=int, default=20, help="messages per seeded session")
+    ap.add_argument("--workers", type=int, default=1, help="uvicorn workers per backend")
+    ap.add_argument("--profile", action="append", default=[], metavar="NAME=MEDIAN_MS,SIGMA,ERROR_RATE",
+                    help="latency/error profile of a fake (translate, detect, gemini, weather, embeddings)")
+    ap.add_argument("--tool-call-rate", type=float, default=0.3, help="share of Gemini turns that call a tool")
+    add_load_args(ap)
+    args = ap.parse_args()
+    sys.exit(asyncio.run(_main(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# src/benchmarks/relevance_eval.py
+"""
+History-relevance evaluation: local scorer vs the Gemini relevance check.
+
+For every (query, history) case the local scorer either decides (score outside the
+borderline band) or escalates to the LLM. Reports:
+  - share of cases decided locally (= LLM calls saved by RELEVANCE_BACKEND=hybrid)
+  - agreement of the local decisions with the reference labels
+  - agreement of the full hybrid pipeline with the reference labels
+
+The reference is the hand label in the sample by default. With --llm the reference is
+Gemini itself (needs GOOGLE_API_KEY), i.e. the old always-LLM behaviour.
+
+Usage (from Backend1/):
+    python -m benchmarks.relevance_eval
+    python -m benchmarks.relevance_eval --low 0.25 --high 0.75 --verbose
+    python -m benchmarks.relevance_eval --llm --file cases.jsonl
+
+--file takes JSONL rows like {"query": "...", "turns": [["user", "bot"], ...], "relevant": true}.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from config import settings  # noqa: E402
+from services.relevance_scorer import classify  # noqa: E402
+
+Turns = List[Tuple[str, str]]
+
+_WHEAT = ("My wheat leaves are turning yellow, what should I do?",
+          "Yellowing in wheat is often nitrogen deficiency. Apply 30 kg urea per acre after irrigation.")
+_WEATHER = ("Will it rain in Nashik this week?",
+            "Light rain is expected in Nashik on Thursday and Friday, around 8 mm in total.")
+_COTTON = ("Whiteflies are attacking my cotton crop",
+           "Spray neem oil 5 ml per litre, or imidacloprid 17.8 SL at 0.3 ml per litre if severe.")
+_ONION = ("What is the onion price in Lasalgaon mandi?",
+          "Onion is trading at Rs 1,850-2,100 per quintal in Lasalgaon today.")
+_SCHEME = ("How do I apply for PM Kisan?",
+           "Register on the PM-KISAN portal with Aadhaar, land records and a bank account.")
+
+SAMPLE: List[Tuple[str, Turns, bool]] = [
+    # follow-ups that need the history
+    ("How much of it per acre?", [_WHEAT], True),
+    ("Is it safe to spray before the rain?", [_COTTON, _WEATHER], True),
+    ("What about next week?", [_WEATHER], True),
+    ("And for urea, when should I apply it?", [_WHEAT], True),
+    ("Can I mix neem oil with imidacloprid?", [_COTTON], True),
+    ("Which wheat variety resists yellowing better?", [_WHEAT], True),
+    ("Is the Lasalgaon onion price going to rise next month?", [_ONION], True),
+    ("What documents did you say I need?", [_SCHEME], True),
+    ("Should I irrigate before Thursday then?", [_WEATHER], True),
+    ("How often should I repeat the spray?", [_COTTON], True),
+    ("Will the rain in Nashik affect my onion harvest?", [_ONION, _WEATHER], True),
+    ("Same for my tomato plants?", [_COTTON], True),
+    ("Why is that happening?", [_WHEAT], True),
+    ("Is 30 kg enough for sandy soil?", [_WHEAT], True),
+    # new, self-contained questions
+    ("What is the best time to sow mustard?", [_WHEAT], False),
+    ("Tell me about the Kisan Credit Card scheme", [_WEATHER], False),
+    ("How do I control blight in potato?", [_ONION], False),
+    ("What is the price of soybean in Indore?", [_COTTON], False),
+    ("How much water does sugarcane need?", [_SCHEME], False),
+    ("Give me the weather forecast for Ludhiana", [_COTTON], False),
+    ("Which fertilizer is good for banana?", [_WEATHER, _ONION], False),
+    ("How to start vermicompost at home?", [_SCHEME], False),
+    ("What is drip irrigation subsidy in Maharashtra?", [_ONION], False),
+    ("When should I harvest paddy?", [_COTTON, _SCHEME], False),
+    ("Best variety of chickpea for rabi season", [_WEATHER], False),
+    ("How to get crop insurance under PMFBY?", [_WHEAT], False),
+    # genuinely ambiguous ones
+    ("What should I spray now?", [_COTTON, _SCHEME], True),
+    ("What is the temperature tomorrow?", [_WEATHER], True),
+    ("How to increase yield of wheat?", [_WHEAT], False),
+    ("Rain forecast for Pune", [_WEATHER], False),
+]
+
+
+def _load(path: str) -> List[Tuple[str, Turns, bool]]:
+    rows = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                obj = json.loads(line)
+                rows.append((obj["query"], [tuple(t) for t in obj["turns"]], bool(obj["relevant"])))
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--low", type=float, default=settings.RELEVANCE_LOW)
+    ap.add_argument("--high", type=float, default=settings.RELEVANCE_HIGH)
+    ap.add_argument("--file", help="JSONL with {query, turns, relevant} rows (default: built-in sample)")
+    ap.add_argument("--llm", action="store_true", help="use Gemini as the reference (and for borderline cases)")
+    ap.add_argument("--verbose", action="store_true", help="print every case")
+    args = ap.parse_args()
+
+    sample = _load(args.file) if args.file else SAMPLE
+    if args.llm:
+        from services.relevancy import _llm_is_relevant
+        if not settings.GOOGLE_API_KEY:
+            sys.exit("--llm needs GOOGLE_API_KEY")
+
+    n = len(sample)
+    local_n = local_ok = hybrid_ok = 0
+    local_us = 0.0
+    for query, turns, gold in sample:
+        t0 = time.perf_counter()
+        decision, score = classify(query, turns, low=args.low, high=args.high)
+        local_us += (time.perf_counter() - t0) * 1e6
+        reference = _llm_is_relevant(query, turns) if args.llm else gold
+        if decision is None:
+            # borderline: hybrid asks the LLM (offline, assume it agrees with the label)
+            final = reference
+            tag = "LLM "
+        else:
+            final = decision
+            local_n += 1
+            local_ok += decision == reference
+            tag = "ok  " if decision == reference else "MISS"
+        hybrid_ok += final == reference
+        if args.verbose or tag == "MISS":
+            print(f"  {tag} score={score:.2f} ref={str(reference):<5}  {query}")
+
+    print(f"\ncases:               {n}")
+    print(f"reference:           {'Gemini' if args.llm else 'hand labels'}")
+    print(f"band:                [{args.low:.2f}, {args.high:.2f}]")
+    print(f"decided locally:     {local_n} ({100.0 * local_n / n:.1f}% of LLM calls saved)")
+    print(f"local agreement:     {100.0 * local_ok / max(1, local_n):.1f}%")
+    print(f"hybrid agreement:    {100.0 * hybrid_ok / n:.1f}%")
+    print(f"local latency:       {local_us / n:.1f} us/case")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+# src/benchmarks/romanized_bench.py
+"""
+Romanized-input normalization benchmark: legacy path vs local transliteration.
+
+The legacy /chat path for romanized text (e.g. "kal barish hogi kya" with a Hindi UI)
+was: to_english(raw) -> if unchanged, translate_text(raw -> ui script) -> to_english(native),
+i.e. up to three sequential translator round trips. The current path transliterates
+locally and makes a single to_english call.
+
+By default the Google endpoint is simulated in-process with a fixed round-trip time
+(--rtt-ms) so the numbers are reproducible offline. The simulated endpoint echoes
+romanized input unchanged (Google's common failure mode for casual romanization);
+pass --understands-romanized to model the best case instead. Use --live to hit the
+real API (needs GOOGLE_TRANSLATE_API_KEY).
+
+Usage (from Backend1/):
+    python -m benchmarks.romanized_bench
+    python -m benchmarks.romanized_bench --rtt-ms 250 --understands-romanized
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+os.environ["TRANSLATION_MEMORY_PATH"] = ""  # measure the network path, not the memory
+
+import httpx  # noqa: E402
+
+from routers import translator  # noqa: E402
+from routers.chats import _normalize_to_english, _looks_romanized, _has_native_script  # noqa: E402
+from services.transliterate import transliterate  # noqa: E402
+
+CORPUS: List[Tuple[str, str]] = [
+    ("kal barish hogi kya", "hi"),
+    ("gehu me kitna pani dena hai", "hi"),
+    ("pyaz ka bhav kya hai aaj", "hi"),
+    ("kapas me keeda lag gaya hai kya dawa dalu", "hi"),
+    ("dhan ki buvai kab kare", "hi"),
+    ("mujhe kisan credit card ke bare me batao", "hi"),
+    ("tamatar ke paudhe sukh rahe hai", "hi"),
+    ("ganne ka sarkari rate kitna hai", "hi"),
+    ("kapas me keeda", "hi"),
+    ("gehu me kida laga", "hi"),
+    ("do ekad me soybean", "hi"),
+    ("is saal kapas me gulabi sundi", "hi"),
+    ("udya paus padel ka", "mr"),
+    ("kandyacha bhav kay aahe", "mr"),
+    ("majhya shetat kiti pani dyayche", "mr"),
+    ("kapus var kid padli aahe aushadh sanga", "mr"),
+    ("soybean perni kadhi karavi", "mr"),
+    ("gahu sathi khat kiti takayche", "mr"),
+    ("aaj bristi hobe ki", "bn"),
+    ("dhan chas kokhon korbo", "bn"),
+    ("varsad kyare aavse", "gu"),
+    ("naalai mazhai varuma", "ta"),
+    ("repu varsham padutunda", "te"),
+    ("what is the weather this week", "hi"),  # English typed with a Hindi UI
+]
+
+
+async def _legacy_normalize(user_msg_original: str, ui_language: str) -> str:
+    """Verbatim copy of the pre-transliteration romanized branch of /chat."""
+    user_msg_en: Optional[str] = None
+    if ui_language != "en":
+        if _looks_romanized(user_msg_original) and not _has_native_script(user_msg_original, ui_language):
+            tmp = await translator.ato_english(user_msg_original, None)
+            if (tmp or "").strip().lower() == user_msg_original.strip().lower():
+                native_try = await translator.atranslate_text(user_msg_original, ui_language, None)
+                if native_try and _has_native_script(native_try, ui_language):
+                    user_msg_en = await translator.ato_english(native_try, ui_language)
+                else:
+                    user_msg_en = tmp or user_msg_original
+            else:
+                user_msg_en = tmp or user_msg_original
+    if not user_msg_en:
+        user_msg_en = await translator.ato_english(user_msg_original, None) or user_msg_original
+    return user_msg_en
+
+
+def _fake_google(rtt_s: float, understands_romanized: bool, counter: List[int]) -> Callable:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        counter[0] += 1
+        await asyncio.sleep(rtt_s)
+        form = httpx.QueryParams(request.content.decode())
+        qs = form.get_list("q")
+        target = request.url.params.get("target", "en")
+        source = request.url.params.get("source")
+        out = []
+        for q in qs:
+            if target == "en":
+                romanized = q.isascii()
+                out.append(f"EN<{q}>" if (not romanized or source or understands_romanized) else q)
+            else:
+                out.append(transliterate(q, target) or q)  # stand-in for a native-script translation
+        return httpx.Response(200, json={"data": {"translations": [{"translatedText": t} for t in out]}})
+    return handler
+
+
+async def _run(fn, rtt_s: float, understands: bool, live: bool) -> Tuple[List[float], int]:
+    counter = [0]
+    client = None
+    if not live:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(_fake_google(rtt_s, understands, counter)))
+        translator._client_override.set(client)
+    latencies = []
+    for text, lang in CORPUS:
+        translator.translation_memory._l1.clear()
+        t0 = time.perf_counter()
+        await fn(text, lang)
+        latencies.append((time.perf_counter() - t0) * 1000.0)
+    if client:
+        await client.aclose()
+    return latencies, counter[0]
+
+
+def _report(name: str, lat: List[float], calls: int, live: bool) -> None:
+    lat_sorted = sorted(lat)
+    p95 = lat_sorted[max(0, int(round(0.95 * len(lat_sorted))) - 1)]
+    calls_s = "n/a (live)" if live else f"{calls} ({calls / len(lat):.2f}/query)"
+    print(f"{name:<16} mean={statistics.mean(lat):7.1f}ms  p50={statistics.median(lat):7.1f}ms  "
+          f"p95={p95:7.1f}ms  translator calls={calls_s}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rtt-ms", type=float, default=150.0, help="simulated translator round trip")
+    ap.add_argument("--understands-romanized", action="store_true")
+    ap.add_argument("--live", action="store_true", help="use the real Google endpoint")
+    args = ap.parse_args()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    if not args.live:
+        os.environ.setdefault("GOOGLE_TRANSLATE_API_KEY", "offline-benchmark")
+
+    rtt = args.rtt_ms / 1000.0
+    legacy = asyncio.run(_run(_legacy_normalize, rtt, args.understands_romanized, args.live))
+    fast = asyncio.run(_run(_normalize_to_english, rtt, args.understands_romanized, args.live))
+
+    print(f"{len(CORPUS)} romanized queries, rtt={'live' if args.live else f'{args.rtt_ms:.0f}ms'}\n")
+    _report("legacy (3-hop)", *legacy, args.live)
+    _report("transliterate", *fast, args.live)
+    print(f"\nmean latency saved: {statistics.mean(legacy[0]) - statistics.mean(fast[0]):.1f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,8 +9,86 @@ class Settings:
 
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "")
     GOOGLE_TRANSLATE_API_KEY = os.getenv("GOOGLE_TRANSLATE_API_KEY", "")
+    # Alternative Gemini endpoint (e.g. "http://127.0.0.1:9100" for the load-test fakes);
+    # when set, the google-generativeai SDK talks REST to it instead of gRPC
+    GEMINI_API_ENDPOINT = os.getenv("GEMINI_API_ENDPOINT", "")
+    GENAI_CONFIGURE_KWARGS = (
+        {"transport": "rest", "client_options": {"api_endpoint": GEMINI_API_ENDPOINT}}
+        if GEMINI_API_ENDPOINT else {}
+    )
 
     KISANSATHI_URL = os.getenv("KISANSATHI_URL", "")
+    # NDJSON streaming endpoint used by /chat/stream (defaults to KISANSATHI_URL + "/stream")
+    KISANSATHI_STREAM_URL = os.getenv("KISANSATHI_STREAM_URL", "")
+    # Several Backend2 replicas (comma-separated /KisanSaathi URLs); overrides KISANSATHI_URL.
+    # See services/downstream.py for selection, circuit breaking and hedging.
+    KISANSATHI_URLS = os.getenv("KISANSATHI_URLS", "")
+    DOWNSTREAM_TIMEOUT_S = float(os.getenv("DOWNSTREAM_TIMEOUT_S", "90"))  # whole call, 0 = unbounded
+    # one request to one replica; running out counts as a breaker failure, 0 = unbounded
+    DOWNSTREAM_ATTEMPT_TIMEOUT_S = float(os.getenv("DOWNSTREAM_ATTEMPT_TIMEOUT_S", "45"))
+    DOWNSTREAM_HEDGE_ENABLED = os.getenv("DOWNSTREAM_HEDGE_ENABLED", "true").lower() in {"1","true","yes"}
+    DOWNSTREAM_HEDGE_MIN_S = float(os.getenv("DOWNSTREAM_HEDGE_MIN_S", "2"))
+    DOWNSTREAM_HEDGE_DEFAULT_S = float(os.getenv("DOWNSTREAM_HEDGE_DEFAULT_S", "8"))  # until p95 is known
+    DOWNSTREAM_HEDGE_BUDGET = float(os.getenv("DOWNSTREAM_HEDGE_BUDGET", "0.1"))  # max share of calls hedged
+    DOWNSTREAM_BREAKER_FAILURES = int(os.getenv("DOWNSTREAM_BREAKER_FAILURES", "5"))
+    DOWNSTREAM_BREAKER_COOLDOWN_S = float(os.getenv("DOWNSTREAM_BREAKER_COOLDOWN_S", "15"))
+    # true: Backend2 keeps each chat's history in a compact ADK session, so user_query carries
+    # only the new message (plus recent_turns to seed a chat Backend2 has not seen yet).
+    # Only safe when every Backend2 replica shares one postgres ADK_SESSION_DB; off by
+    # default, and relevant history then goes into the prompt.
+    DOWNSTREAM_SESSION_CONTEXT = os.getenv("DOWNSTREAM_SESSION_CONTEXT", "false").lower() in {"1","true","yes"}
+
+    # Translation memory: in-process LRU in front of a SQLite file shared by all workers.
+    # Set TRANSLATION_MEMORY_PATH="" to keep only the in-process tier.
+    TRANSLATION_MEMORY_PATH = os.getenv("TRANSLATION_MEMORY_PATH", "translation_memory.sqlite3")
+    TRANSLATION_MEMORY_L1_SIZE = int(os.getenv("TRANSLATION_MEMORY_L1_SIZE", "50000"))
+
+    # Offline script/n-gram language detection; below this confidence we ask Google /detect
+    LANG_DETECT_MIN_CONFIDENCE = float(os.getenv("LANG_DETECT_MIN_CONFIDENCE", "0.8"))
+
+    # Relevance of chat history: "hybrid" (local scorer, LLM only for borderline scores),
+    # "local" (never call the LLM) or "llm" (always call the LLM, previous behaviour)
+    RELEVANCE_BACKEND = os.getenv("RELEVANCE_BACKEND", "hybrid").lower()
+    RELEVANCE_LOW = float(os.getenv("RELEVANCE_LOW", "0.3"))
+    RELEVANCE_HIGH = float(os.getenv("RELEVANCE_HIGH", "0.7"))
+    # Optional sentence-transformers model for the scorer (e.g. "all-MiniLM-L6-v2"); empty = off
+    RELEVANCE_EMBED_MODEL = os.getenv("RELEVANCE_EMBED_MODEL", "")
+
+    # Profile (mode/language/pincode) cache; invalidated across workers via LISTEN/NOTIFY
+    PROFILE_CACHE_SIZE = int(os.getenv("PROFILE_CACHE_SIZE", "10000"))
+    PROFILE_CACHE_TTL_S = float(os.getenv("PROFILE_CACHE_TTL_S", "300"))
+    PROFILE_CACHE_CHANNEL = os.getenv("PROFILE_CACHE_CHANNEL", "user_profile_changed")
+
+    # Write-behind queue for /chat turns and /feedback rows (flushed by size or interval).
+    # WRITE_BEHIND_SPILL_PATH: append-only local file so queued writes survive a crash.
+    WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "true").lower() in {"1","true","yes"}
+    WRITE_BEHIND_FLUSH_MS = float(os.getenv("WRITE_BEHIND_FLUSH_MS", "50"))
+    WRITE_BEHIND_MAX_BATCH = int(os.getenv("WRITE_BEHIND_MAX_BATCH", "500"))
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "20000"))
+    WRITE_BEHIND_SPILL_PATH = os.getenv("WRITE_BEHIND_SPILL_PATH", "")
+    WRITE_BEHIND_FSYNC = os.getenv("WRITE_BEHIND_FSYNC", "false").lower() in {"1","true","yes"}
+    # a row that fails this many times (database reachable) is dead-lettered, not retried forever
+    WRITE_BEHIND_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "3"))
+
+    # Answer cache for repeated questions (services/answer_cache.py); TTLs per intent.
+    # Similarity uses RELEVANCE_EMBED_MODEL when set, content-term overlap otherwise.
+    ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "5000"))  # 0 disables
+    ANSWER_CACHE_TTL_WEATHER_S = float(os.getenv("ANSWER_CACHE_TTL_WEATHER_S", "1800"))
+    ANSWER_CACHE_TTL_PRICE_S = float(os.getenv("ANSWER_CACHE_TTL_PRICE_S", "3600"))
+    ANSWER_CACHE_TTL_SCHEME_S = float(os.getenv("ANSWER_CACHE_TTL_SCHEME_S", "86400"))
+    ANSWER_CACHE_TTL_AGRONOMY_S = float(os.getenv("ANSWER_CACHE_TTL_AGRONOMY_S", "604800"))
+    ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+    ANSWER_CACHE_LEXICAL_SIMILARITY = float(os.getenv("ANSWER_CACHE_LEXICAL_SIMILARITY", "0.8"))
+
+    # Admission control for the KisanSaathi call: global cap (keep it below the shared
+    # httpx client's 100 connections), per-user fair queue, bounded waits.
+    # ADMISSION_OVERLOAD_MODE: "degrade" (busy reply) or "reject" (HTTP 503 on /chat).
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() in {"1","true","yes"}
+    ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "64"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+    ADMISSION_MAX_QUEUE_PER_USER = int(os.getenv("ADMISSION_MAX_QUEUE_PER_USER", "3"))
+    ADMISSION_MAX_WAIT_S = float(os.getenv("ADMISSION_MAX_WAIT_S", "15"))
+    ADMISSION_OVERLOAD_MODE = os.getenv("ADMISSION_OVERLOAD_MODE", "degrade").lower()
 
     # You said “no tight timeouts”. We’ll set *no* DB statement timeout
     # and *no* HTTP client total timeout. (If you ever want guardrails, add envs.)
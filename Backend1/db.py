@@ -1,6 +1,9 @@
+import re
+import time
 import asyncpg
-from typing import Optional
+from typing import Dict, Optional
 from config import settings
+from services.metrics import DB_QUERY_SECONDS
 
 _pool: Optional[asyncpg.pool.Pool] = None
 
@@ -27,6 +30,36 @@ async def get_conn():
         await init_pool()
     return _pool
 
-async def fetch(conn, q: str, *args):    return await conn.fetch(q, *args)
-async def fetchrow(conn, q: str, *args): return await conn.fetchrow(q, *args)
-async def execute(conn, q: str, *args):  return await conn.execute(q, *args)
+# metric label per SQL text ("select chat_messages", "update chat_sessions", ...); the
+# statements are module constants, so this dict stays small
+_QUERY_NAMES: Dict[str, str] = {}
+
+def _query_name(q: str) -> str:
+    name = _QUERY_NAMES.get(q)
+    if name is None:
+        m = re.search(r"\b(insert\s+into|update|delete\s+from)\s+([a-z_]+)", q, re.IGNORECASE) \
+            or re.search(r"\b(select)\b.*?\bfrom\s+([a-z_]+)", q, re.IGNORECASE | re.DOTALL)
+        name = f"{m.group(1).split()[0].lower()} {m.group(2).lower()}" if m else "other"
+        _QUERY_NAMES[q] = name
+    return name
+
+async def fetch(conn, q: str, *args):
+    t0 = time.perf_counter()
+    try:
+        return await conn.fetch(q, *args)
+    finally:
+        DB_QUERY_SECONDS.labels(_query_name(q)).observe_since(t0)
+
+async def fetchrow(conn, q: str, *args):
+    t0 = time.perf_counter()
+    try:
+        return await conn.fetchrow(q, *args)
+    finally:
+        DB_QUERY_SECONDS.labels(_query_name(q)).observe_since(t0)
+
+async def execute(conn, q: str, *args):
+    t0 = time.perf_counter()
+    try:
+        return await conn.execute(q, *args)
+    finally:
+        DB_QUERY_SECONDS.labels(_query_name(q)).observe_since(t0)
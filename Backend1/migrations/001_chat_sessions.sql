@@ -0,0 +1,67 @@
+-- 001_chat_sessions.sql
+-- Split the old one-row-per-turn `sessions` table into:
+--   chat_sessions  one row per conversation (title, last_activity, message_count)
+--   chat_messages  one row per turn
+-- Listing a user's sessions becomes an index-only scan on chat_sessions and a rename
+-- touches a single row. The backfill is idempotent; `sessions` is left in place so the
+-- migration can be re-run (or rolled back) and dropped by hand later.
+
+CREATE TABLE IF NOT EXISTS chat_sessions (
+    session_id     TEXT PRIMARY KEY,
+    user_email     TEXT NOT NULL,
+    title          TEXT NOT NULL DEFAULT 'New Chat',
+    created_time   TIMESTAMPTZ NOT NULL DEFAULT now(),
+    last_activity  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    message_count  INTEGER NOT NULL DEFAULT 0
+);
+
+-- list-session: WHERE user_email=$1 ORDER BY last_activity DESC (title carried in the index)
+CREATE INDEX IF NOT EXISTS chat_sessions_user_activity
+    ON chat_sessions (user_email, last_activity DESC, session_id) INCLUDE (title);
+
+CREATE TABLE IF NOT EXISTS chat_messages (
+    message_id      TEXT PRIMARY KEY,
+    session_id      TEXT NOT NULL REFERENCES chat_sessions (session_id) ON DELETE CASCADE,
+    user_email      TEXT NOT NULL,
+    user_query_raw  TEXT,
+    user_query_en   TEXT,
+    bot_message     TEXT,
+    created_time    TIMESTAMPTZ NOT NULL DEFAULT now(),
+    end_time        TIMESTAMPTZ
+);
+
+-- session-chat and the last-N-turns context read
+CREATE INDEX IF NOT EXISTS chat_messages_session_created
+    ON chat_messages (session_id, created_time, message_id);
+
+-- ---------- backfill from the legacy table ----------
+DO $$
+BEGIN
+    IF to_regclass('public.sessions') IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO chat_sessions (session_id, user_email, title, created_time, last_activity, message_count)
+    SELECT s.session_id::text,
+           s.user_email,
+           COALESCE(
+               (array_agg(s.session_name ORDER BY s.created_time DESC)
+                    FILTER (WHERE s.session_name IS NOT NULL))[1],
+               'New Chat'),
+           COALESCE(MIN(s.created_time), now()),
+           COALESCE(MAX(s.created_time), now()),
+           COUNT(s.message_id)
+    FROM sessions s
+    WHERE s.session_id IS NOT NULL AND s.user_email IS NOT NULL
+    GROUP BY s.session_id, s.user_email
+    ON CONFLICT (session_id) DO NOTHING;
+
+    INSERT INTO chat_messages (message_id, session_id, user_email, user_query_raw, user_query_en,
+                               bot_message, created_time, end_time)
+    SELECT s.message_id::text, s.session_id::text, s.user_email, s.user_query_raw, s.user_query_en,
+           s.bot_message, COALESCE(s.created_time, now()), s.end_time
+    FROM sessions s
+    JOIN chat_sessions cs ON cs.session_id = s.session_id::text
+    WHERE s.message_id IS NOT NULL
+    ON CONFLICT (message_id) DO NOTHING;
+END $$;
@@ -0,0 +1,8 @@
+-- 002_history_keyset.sql
+-- Keyset pagination for /history: list-session walks (last_activity, session_id) in
+-- descending order, so both index columns must be DESC for the row comparison
+-- (last_activity, session_id) < ($2, $3) to be an index range scan.
+
+DROP INDEX IF EXISTS chat_sessions_user_activity;
+CREATE INDEX IF NOT EXISTS chat_sessions_user_activity
+    ON chat_sessions (user_email, last_activity DESC, session_id DESC) INCLUDE (title);
@@ -0,0 +1,14 @@
+-- 003_message_translations.sql
+-- UI-language renderings of stored English text, written when /chat produces them
+-- and read back by /history so repeat loads need no translator calls.
+--   message_id = chat_messages.message_id, field in ('user_query', 'bot_message')
+--   message_id = chat_sessions.session_id, field = 'session_title'
+
+CREATE TABLE IF NOT EXISTS message_translations (
+    message_id    TEXT NOT NULL,
+    field         TEXT NOT NULL,
+    lang          TEXT NOT NULL,
+    text          TEXT NOT NULL,
+    created_time  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (message_id, field, lang)
+);
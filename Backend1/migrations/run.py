@@ -0,0 +1,66 @@
+# src/migrations/run.py
+"""
+Apply the SQL migrations in this directory, in file-name order.
+
+Each NNN_*.sql file runs once inside its own transaction and is recorded in the
+schema_migrations table, so re-running only applies new files.
+
+Usage (from Backend1/):
+    python -m migrations.run            # apply pending migrations
+    python -m migrations.run --list     # show applied / pending
+"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import asyncpg  # noqa: E402
+
+from config import settings  # noqa: E402
+
+MIGRATIONS_DIR = Path(__file__).resolve().parent
+
+
+def _files() -> List[Path]:
+    return sorted(p for p in MIGRATIONS_DIR.glob("[0-9][0-9][0-9]_*.sql"))
+
+
+async def _run(list_only: bool) -> None:
+    if not settings.DATABASE_URL:
+        sys.exit("DATABASE_URL not set")
+    conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    try:
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name        TEXT PRIMARY KEY,
+                applied_at  TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+        """)
+        applied = {r["name"] for r in await conn.fetch("SELECT name FROM schema_migrations")}
+        for path in _files():
+            if path.name in applied:
+                print(f"  applied  {path.name}")
+                continue
+            if list_only:
+                print(f"  pending  {path.name}")
+                continue
+            print(f"  applying {path.name} ...", flush=True)
+            async with conn.transaction():
+                await conn.execute(path.read_text(encoding="utf-8"))
+                await conn.execute("INSERT INTO schema_migrations (name) VALUES ($1)", path.name)
+    finally:
+        await conn.close()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--list", action="store_true", help="only show applied / pending migrations")
+    args = ap.parse_args()
+    asyncio.run(_run(args.list))
+
+
+if __name__ == "__main__":
+    main()
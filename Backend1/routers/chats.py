@@ -1,24 +1,39 @@
 # routers/chat.py
 from fastapi import APIRouter, HTTPException
-import uuid, re, time, logging, asyncio
+from fastapi.responses import StreamingResponse
+import uuid, re, time, logging, asyncio, contextlib
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, AsyncIterator, Awaitable, Set
 
-from anyio import to_thread
 import httpx
-import asyncpg
+import orjson
 
-from db import get_conn, fetch, fetchrow, execute
+from db import get_conn
 from config import settings
-from routers.translator import translate_text, to_english, detect_language
+from routers.translator import atranslate_text, ato_english, adetect_language
 from utils.session_title import is_meaningful, make_session_title
 # 👇 use your relevancy helpers
 from services.relevancy import is_relevant, build_enriched_prompt
+from services.admission import AdmissionRejected, admission
+from services.answer_cache import Probe, cache as answer_cache
+from services.chat_store import load_context, ui_translations
+from services.downstream import downstream
+from services.metrics import (
+    CHAT_STAGE_SECONDS, DOWNSTREAM_AGENT_SECONDS, DOWNSTREAM_PROMPT_TOKENS, DOWNSTREAM_SECONDS, FALLBACKS,
+    REQUEST_SECONDS,
+)
+from services.write_behind import queue as write_behind
+from services.pipeline import StageGraph
+from services.script_detect import detect_local, plain_english
+from services.transliterate import transliterate
+from utils.text_segments import SegmentBuffer
 
 router = APIRouter(tags=["chat"])
 IST = ZoneInfo("Asia/Kolkata")
 DEFAULT_TITLE = "New Chat"
+FETCH_FAILED_REPLY = "Sorry, I couldn't fetch the information at this moment."
+BUSY_REPLY = "Many farmers are asking questions right now. Please try again in a minute."
 
 log = logging.getLogger("agri.chat")
 if not log.handlers:
@@ -49,38 +64,20 @@ def _client() -> httpx.AsyncClient:
     assert _httpx_client is not None, "HTTP client not initialized"
     return _httpx_client
 
-async def _get_session_title(conn: asyncpg.Connection, session_id: str, user_email: str) -> Optional[str]:
-    row = await fetchrow(conn, """
-        SELECT session_name
-        FROM sessions
-        WHERE session_id=$1 AND user_email=$2
-        ORDER BY created_time DESC
-        LIMIT 1
-    """, session_id, user_email)
-    if not row:
-        raise HTTPException(status_code=404, detail="Session not found for this user")
-    return row["session_name"]
-
-async def _set_session_name_all(conn: asyncpg.Connection, session_id: str, user_email: str, name: str) -> None:
-    await execute(conn, "UPDATE sessions SET session_name=$1 WHERE session_id=$2 AND user_email=$3",
-                  name, session_id, user_email)
-
-async def _fetch_last_turns_en(conn: asyncpg.Connection, session_id: str, limit: int = 3) -> List[Tuple[str, str]]:
-    rows = await fetch(conn, """
-        SELECT COALESCE(user_query_en, ''), COALESCE(bot_message, '')
-        FROM sessions
-        WHERE session_id=$1 AND message_id IS NOT NULL
-        ORDER BY created_time DESC
-        LIMIT $2
-    """, session_id, limit)
-    rows = list(rows)[::-1]
-    return [(r[0], r[1]) for r in rows]
-
-async def _get_user_info(conn: asyncpg.Connection, user_email: str) -> Dict[str, Any]:
-    row = await fetchrow(conn, "SELECT mode, language, pincode FROM user_information WHERE user_email=$1", user_email)
-    if not row:
-        return {"mode": "general", "language": "en", "pincode": None}
-    return {"mode": row["mode"] or "general", "language": row["language"] or "en", "pincode": row["pincode"]}
+# fire-and-forget work that outlives the request; held here so it is not garbage
+# collected mid-flight, and its errors are logged
+_background: Set[asyncio.Task] = set()
+
+def _spawn(coro: Awaitable[Any], what: str) -> asyncio.Task:
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(lambda t: _background_done(t, what))
+    return task
+
+def _background_done(task: asyncio.Task, what: str) -> None:
+    _background.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        log.warning("%s failed: %s", what, task.exception())
 
 def _parse_end_time_to_utc(end_time_str: Optional[str]) -> datetime:
     if not end_time_str:
@@ -99,137 +96,449 @@ def _is_default_title(name: Optional[str]) -> bool:
     n = name.strip().lower()
     return n in {"new chat", "new session"}
 
-@router.post("/chat")
-async def chat(body: dict):
-    t0 = time.time()
-    session_id = (body.get("session_id") or "").strip()
-    user_email = (body.get("user_email") or "").strip()
-    user_msg_original = (body.get("user_msg") or "").strip()
-    if not (session_id and user_email and user_msg_original):
-        raise HTTPException(status_code=400, detail="session_id, user_email, user_msg are required")
+async def _normalize_to_english(user_msg_original: str, ui_language: str) -> str:
+    """
+    Normalize the user's message to English.
+    Romanized input is transliterated locally into the UI language's script first,
+    so it costs one translator call instead of up to three.
+    """
+    if ui_language != "en" and _looks_romanized(user_msg_original) and not _has_native_script(user_msg_original, ui_language):
+        if plain_english(user_msg_original):
+            return user_msg_original  # plain English typed with a non-English UI
+        native = transliterate(user_msg_original, ui_language)
+        if native and _has_native_script(native, ui_language):
+            en = await ato_english(native, ui_language)
+            if en and en.strip() != native.strip():
+                return en
+    return await ato_english(user_msg_original, None) or user_msg_original
 
-    db = await get_conn()
+# ---------- /chat stage graph ----------
+# Stages start as soon as their deps finish; DB reads, language detection and the
+# history fetch overlap instead of running back to back.
+_chat_graph = StageGraph("chat")
 
-    # Title (from latest row)
-    current_title = await _get_session_title(db, session_id, user_email)
-    if current_title is None:
-        await _set_session_name_all(db, session_id, user_email, DEFAULT_TITLE)
-        current_title = DEFAULT_TITLE
-
-    # User prefs & last turns (get last 5 per your spec)
-    user_info = await _get_user_info(db, user_email)
-    last_turns_en = await _fetch_last_turns_en(db, session_id, 5)
-    ui_language = user_info["language"] or "en"
-    mode = user_info["mode"]
-    pincode = user_info["pincode"]
-
-    # Detect language (kept)
-    input_lang = await to_thread.run_sync(detect_language, user_msg_original)
-    input_lang = input_lang or "und"
-
-    # Normalize to English (kept translator behavior & romanized handling)
-    user_msg_en: Optional[str] = None
-    if ui_language != "en":
-        if _looks_romanized(user_msg_original) and not _has_native_script(user_msg_original, ui_language):
-            tmp = await to_thread.run_sync(to_english, user_msg_original, None)
-            if (tmp or "").strip().lower() == user_msg_original.strip().lower():
-                native_try = await to_thread.run_sync(translate_text, user_msg_original, ui_language, None)
-                if native_try and _has_native_script(native_try, ui_language):
-                    user_msg_en = await to_thread.run_sync(to_english, native_try, ui_language)
-                else:
-                    user_msg_en = tmp or user_msg_original
-            else:
-                user_msg_en = tmp or user_msg_original
-    if not user_msg_en:
-        user_msg_en = await to_thread.run_sync(to_english, user_msg_original, None) or user_msg_original
+@_chat_graph.stage("context")
+async def _stage_context(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    # title + profile + last 5 turns (per spec) in a single statement
+    loaded = await load_context(ctx["db"], ctx["session_id"], ctx["user_email"], 5)
+    if loaded is None:
+        raise HTTPException(status_code=404, detail="Session not found for this user")
+    # read-your-writes: earlier turns may still be in the write-behind queue
+    loaded["turns"] = write_behind.merge_turns(ctx["session_id"], loaded["turns"], loaded["turn_keys"], 5)
+    loaded["title"] = write_behind.pending_title(ctx["session_id"], loaded["title"])
+    return loaded
+
+@_chat_graph.stage("title", deps=("context",))
+async def _stage_title(ctx: Dict[str, Any]) -> str:
+    return ctx["context"]["title"] or DEFAULT_TITLE
+
+@_chat_graph.stage("user_info", deps=("context",))
+async def _stage_user_info(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    return ctx["context"]["profile"]
+
+@_chat_graph.stage("last_turns", deps=("context",))
+async def _stage_last_turns(ctx: Dict[str, Any]) -> List[Tuple[str, str]]:
+    return ctx["context"]["turns"]
+
+@_chat_graph.stage("input_lang")
+async def _stage_input_lang(ctx: Dict[str, Any]) -> str:
+    # Offline script/n-gram detector first; remote /detect only when it is unsure
+    input_lang, confidence = detect_local(ctx["user_msg_original"])
+    # a local "en" only stands when the English signal is unambiguous; Hinglish
+    # mislabelled here would store the user turn's translations under the wrong language
+    if input_lang == "en" and not plain_english(ctx["user_msg_original"]):
+        input_lang = None
+    if not input_lang or confidence < settings.LANG_DETECT_MIN_CONFIDENCE:
+        input_lang = await adetect_language(ctx["user_msg_original"])
+    return input_lang or "und"
+
+@_chat_graph.stage("user_msg_en", deps=("user_info",))
+async def _stage_user_msg_en(ctx: Dict[str, Any]) -> str:
+    return await _normalize_to_english(ctx["user_msg_original"], ctx["user_info"]["language"] or "en")
 
-    # Optional title rename (same)
-    renamed = False
+@_chat_graph.stage("title_final", deps=("title",))
+async def _stage_title_final(ctx: Dict[str, Any]) -> Tuple[str, bool]:
+    # Optional title rename (same); persisted with the turn by record_turn
+    current_title, user_msg_original = ctx["title"], ctx["user_msg_original"]
     if _is_default_title(current_title) and is_meaningful(user_msg_original):
         try:
             new_title = (make_session_title(user_msg_original) or "").strip()
             if new_title and new_title.lower() not in {"new chat", "new session", "untitled"}:
-                await _set_session_name_all(db, session_id, user_email, new_title)
-                current_title = new_title
-                renamed = True
+                return new_title, True
         except Exception:
             pass
+    return current_title, False
 
-    # Persist user turn (raw + EN)
-    message_id = str(uuid.uuid4())
-    now_utc = datetime.now(timezone.utc)
-    await execute(db, """
-        INSERT INTO sessions (
-          user_email, session_id, message_id, session_name,
-          user_query_raw, user_query_en, created_time
-        ) VALUES ($1,$2,$3,$4,$5,$6,$7)
-    """, user_email, session_id, message_id, current_title or DEFAULT_TITLE, user_msg_original, user_msg_en, now_utc)
-
-    # ---------- NEW: Relevancy + Enrichment ----------
+@_chat_graph.stage("relevant", deps=("user_msg_en", "last_turns"))
+async def _stage_relevant(ctx: Dict[str, Any]) -> bool:
     try:
         # run is_relevant in a thread to avoid blocking the event loop
-        relevant = await asyncio.to_thread(is_relevant, user_msg_en, last_turns_en)
+        return bool(await asyncio.to_thread(is_relevant, ctx["user_msg_en"], ctx["last_turns"]))
     except Exception as e:
         log.warning("relevancy check failed: %s", e)
-        relevant = False
+        return False
 
-    if relevant:
+@_chat_graph.stage("payload", deps=("relevant", "user_info"))
+async def _stage_payload(ctx: Dict[str, Any]) -> Dict[str, Any]:
+    # Downstream KisanSaathi — exact payload; user_query is enriched only when Backend2
+    # does not keep the conversation itself
+    user_msg_en, last_turns_en = ctx["user_msg_en"], ctx["last_turns"]
+    if ctx["relevant"] and not settings.DOWNSTREAM_SESSION_CONTEXT:
         user_msg_for_adk = build_enriched_prompt(user_msg_en, last_turns_en)
     else:
         user_msg_for_adk = user_msg_en
-    # -----------------------------------------------
+    user_info = ctx["user_info"]
+    payload = {
+        "user_email": ctx["user_email"],
+        "session_id": ctx["session_id"],
+        "message_id": ctx["message_id"],
+        "user_query": user_msg_for_adk,
+        "meta": {"language": user_info["language"] or "en", "mode": user_info["mode"], "pincode": user_info["pincode"]}
+    }
+    if settings.DOWNSTREAM_SESSION_CONTEXT:
+        # seeds the ADK session of a chat that predates it (ignored once Backend2 has one)
+        payload["recent_turns"] = [[q, a] for q, a in last_turns_en if q and a]
+    return payload
 
-    # Downstream KisanSaathi — exact payload; user_query may be enriched
-    kis_url = settings.KISANSATHI_URL
-    if not kis_url:
-        bot_reply_en = f"[MOCK REPLY] You said: {user_msg_for_adk}"
-        end_time_utc = datetime.now(timezone.utc)
-    else:
-        try:
-            payload = {
-                "user_email": user_email,
-                "session_id": session_id,
-                "message_id": message_id,
-                "user_query": user_msg_for_adk,
-                "meta": {"language": ui_language, "mode": mode, "pincode": pincode}
-            }
-            r = await _client().post(kis_url, json=payload)  # no client timeout
-            r.raise_for_status()
-            data = r.json() if r.content else {}
-            bot_reply_en = (data.get("bot_reply") or "").strip()
-            end_time_utc = _parse_end_time_to_utc(data.get("end_time"))
-            if not bot_reply_en:
-                bot_reply_en = "Sorry, I couldn't fetch the information at this moment."
-        except Exception as e:
-            log.warning("Downstream call failed: %s", e)
-            bot_reply_en = "Sorry, I couldn't fetch the information at this moment."
-            end_time_utc = datetime.now(timezone.utc)
+def _downstream_slot(payload: Dict[str, Any]):
+    # bounded, per-user fair access to Backend2 (services/admission.py)
+    if not settings.ADMISSION_ENABLED:
+        return contextlib.nullcontext()
+    return admission.slot(payload.get("user_email") or "")
+
+def _busy_reply(e: AdmissionRejected) -> Tuple[str, datetime]:
+    log.warning("KisanSaathi call not admitted (%s)", e.reason)
+    FALLBACKS.labels("overloaded").inc()
+    return BUSY_REPLY, datetime.now(timezone.utc)
+
+async def _call_downstream(payload: Dict[str, Any]) -> Tuple[str, datetime]:
+    if not downstream.enabled:
+        return f"[MOCK REPLY] You said: {payload['user_query']}", datetime.now(timezone.utc)
+    try:
+        async with _downstream_slot(payload):
+            return await _post_downstream(payload)
+    except AdmissionRejected as e:
+        if settings.ADMISSION_OVERLOAD_MODE == "reject":
+            FALLBACKS.labels("overloaded").inc()
+            raise HTTPException(status_code=503, detail="KisanSaathi is busy, please retry",
+                                headers={"Retry-After": "5"})
+        return _busy_reply(e)
+
+def _observe_usage(usage: Optional[Dict[str, Any]]) -> None:
+    # token and agent-time split reported by Backend2 (absent on older deployments)
+    if not usage:
+        return
+    context = "session" if settings.DOWNSTREAM_SESSION_CONTEXT else "prompt"
+    DOWNSTREAM_PROMPT_TOKENS.labels(context).observe(usage.get("prompt_tokens") or 0)
+    if usage.get("agent_ms") is not None:
+        DOWNSTREAM_AGENT_SECONDS.labels().observe(usage["agent_ms"] / 1000.0)
 
-    # Store EN reply
-    await execute(db, """
-        UPDATE sessions
-        SET bot_message=$1, end_time=$2
-        WHERE message_id=$3 AND session_id=$4 AND user_email=$5
-    """, bot_reply_en, end_time_utc, message_id, session_id, user_email)
+async def _post_downstream(payload: Dict[str, Any]) -> Tuple[str, datetime]:
+    t0 = time.perf_counter()
+    try:
+        # least-outstanding replica, circuit breakers, hedging (services/downstream.py)
+        # with Backend2 keeping the chat history a turn must not run on two replicas
+        data = await downstream.call(_client(), payload, hedge=not settings.DOWNSTREAM_SESSION_CONTEXT)
+        _observe_usage(data.get("usage"))
+        bot_reply_en = (data.get("bot_reply") or "").strip()
+        end_time_utc = _parse_end_time_to_utc(data.get("end_time"))
+        if not bot_reply_en:
+            DOWNSTREAM_SECONDS.labels("call", "empty").observe_since(t0)
+            FALLBACKS.labels("empty_reply").inc()
+            return FETCH_FAILED_REPLY, end_time_utc
+        DOWNSTREAM_SECONDS.labels("call", "ok").observe_since(t0)
+        return bot_reply_en, end_time_utc
+    except Exception as e:
+        log.warning("Downstream call failed: %s", e)
+        DOWNSTREAM_SECONDS.labels("call", "error").observe_since(t0)
+        FALLBACKS.labels("downstream_error").inc()
+        return FETCH_FAILED_REPLY, datetime.now(timezone.utc)
+
+def _cacheable_reply(bot_reply_en: Optional[str]) -> bool:
+    return bool(bot_reply_en) and bot_reply_en not in (FETCH_FAILED_REPLY, BUSY_REPLY)
+
+@_chat_graph.stage("answer_cache", deps=("relevant", "user_msg_en", "user_info"))
+async def _stage_answer_cache(ctx: Dict[str, Any]) -> Optional[Probe]:
+    if not downstream.enabled:
+        return None
+    if ctx["relevant"]:
+        # enriched with chat history: the answer depends on the conversation
+        answer_cache.skip()
+        return None
+    user_info = ctx["user_info"]
+    return await answer_cache.lookup(ctx["user_msg_en"], user_info["mode"], user_info["pincode"])
+
+def _record_cache_hit(payload: Dict[str, Any], answer: str) -> None:
+    # Backend2 keeps the chat history: the cached turn must land in its session too,
+    # or the next follow-up has a gap
+    if settings.DOWNSTREAM_SESSION_CONTEXT and downstream.enabled:
+        _spawn(downstream.record(_client(), {**payload, "bot_reply": answer}), "cached turn record")
 
+@_chat_graph.stage("downstream", deps=("payload", "answer_cache"))
+async def _stage_downstream(ctx: Dict[str, Any]) -> Tuple[str, datetime]:
+    probe = ctx["answer_cache"]
+    if probe is not None and probe.hit:
+        _record_cache_hit(ctx["payload"], probe.answer)
+        return probe.answer, datetime.now(timezone.utc)
+    t0 = time.perf_counter()
+    bot_reply_en, end_time_utc = await _call_downstream(ctx["payload"])
+    if probe is not None and _cacheable_reply(bot_reply_en):
+        answer_cache.store(probe, bot_reply_en, time.perf_counter() - t0)
+    return bot_reply_en, end_time_utc
+
+@_chat_graph.stage("bot_reply_ui", deps=("downstream", "user_info"))
+async def _stage_bot_reply_ui(ctx: Dict[str, Any]) -> str:
     # Localize reply for UI (translate only for display)
-    if (ui_language or "en") == "en":
-        bot_reply_ui = bot_reply_en
-        session_name_ui = current_title or DEFAULT_TITLE
-    else:
-        bot_reply_ui = await to_thread.run_sync(translate_text, bot_reply_en, ui_language, "en")
-        session_name_ui = await to_thread.run_sync(translate_text, current_title or DEFAULT_TITLE, ui_language, "en")
+    bot_reply_en, _ = ctx["downstream"]
+    ui_language = ctx["user_info"]["language"] or "en"
+    if ui_language == "en":
+        return bot_reply_en
+    return await atranslate_text(bot_reply_en, ui_language, "en")
+
+@_chat_graph.stage("session_name_ui", deps=("title_final", "user_info"))
+async def _stage_session_name_ui(ctx: Dict[str, Any]) -> str:
+    current_title, _ = ctx["title_final"]
+    ui_language = ctx["user_info"]["language"] or "en"
+    if ui_language == "en":
+        return current_title or DEFAULT_TITLE
+    return await atranslate_text(current_title or DEFAULT_TITLE, ui_language, "en")
+
+async def _record_turn(db, ctx: Dict[str, Any], bot_reply_en: Optional[str], end_time_utc: Optional[datetime],
+                       bot_reply_ui: Optional[str], title_ui: Optional[str]) -> None:
+    current_title, renamed = ctx["title_final"]
+    ui_language = ctx["user_info"]["language"] or "en"
+    await write_behind.submit_turn(
+        db,
+        user_email=ctx["user_email"], session_id=ctx["session_id"], message_id=ctx["message_id"],
+        user_query_raw=ctx["user_msg_original"], user_query_en=ctx["user_msg_en"],
+        created_time=ctx["created_time"], bot_message=bot_reply_en, end_time=end_time_utc,
+        new_title=current_title if renamed else None, old_title=ctx["context"]["title"],
+        translations=ui_translations(
+            ctx["message_id"], ctx["session_id"], ui_language, ctx["input_lang"],
+            ctx["user_msg_original"], bot_reply_en, bot_reply_ui,
+            current_title or DEFAULT_TITLE, title_ui,
+        ),
+    )
 
-    log.info("Total /chat latency: %.3fs", time.time() - t0)
+@_chat_graph.stage("record_turn", deps=("downstream", "bot_reply_ui", "session_name_ui",
+                                        "title_final", "user_msg_en", "input_lang", "user_info"))
+async def _stage_record_turn(ctx: Dict[str, Any]) -> None:
+    # one statement for the whole turn (message, session activity/title, UI translations),
+    # queued behind the response
+    bot_reply_en, end_time_utc = ctx["downstream"]
+    await _record_turn(ctx["db"], ctx, bot_reply_en, end_time_utc, ctx["bot_reply_ui"], ctx["session_name_ui"])
 
+def _chat_inputs(body: dict) -> Dict[str, Any]:
+    session_id = (body.get("session_id") or "").strip()
+    user_email = (body.get("user_email") or "").strip()
+    user_msg_original = (body.get("user_msg") or "").strip()
+    if not (session_id and user_email and user_msg_original):
+        raise HTTPException(status_code=400, detail="session_id, user_email, user_msg are required")
     return {
-        "message_id": message_id,
         "session_id": session_id,
-        "bot_msg": bot_reply_ui,    # UI-facing (translated if needed)
-        "bot_msg_en": bot_reply_en, # exact EN from KisanSaathi (optional for QA)
         "user_email": user_email,
+        "user_msg_original": user_msg_original,
+        "message_id": str(uuid.uuid4()),
+        "created_time": datetime.now(timezone.utc),
+    }
+
+def _observe_stages(run) -> None:
+    for stage, ms in run.timings_ms.items():
+        CHAT_STAGE_SECONDS.labels(stage).observe(ms / 1000.0)
+
+@router.post("/chat")
+async def chat(body: dict):
+    t0 = time.perf_counter()
+    inputs = _chat_inputs(body)
+    run = await _chat_graph.run({"db": await get_conn(), **inputs})
+
+    log.info("Total /chat latency: %.3fs [stages ms: %s]", run.total_ms / 1000.0, run.timing_summary())
+    _observe_stages(run)
+    REQUEST_SECONDS.labels("/chat").observe_since(t0)
+
+    current_title, renamed = run["title_final"]
+    bot_reply_en, _ = run["downstream"]
+    return {
+        "message_id": inputs["message_id"],
+        "session_id": inputs["session_id"],
+        "bot_msg": run["bot_reply_ui"],    # UI-facing (translated if needed)
+        "bot_msg_en": bot_reply_en, # exact EN from KisanSaathi (optional for QA)
+        "user_email": inputs["user_email"],
         "session_name": current_title or DEFAULT_TITLE,
-        "session_name_ui": session_name_ui,
+        "session_name_ui": run["session_name_ui"],
         "renamed": renamed,
-        "relevance_used": bool(relevant)  # helpful for debugging
+        "relevance_used": bool(run["relevant"]),  # helpful for debugging
+        "answer_cache": run["answer_cache"].kind if run["answer_cache"] else None,
     }
+
+# ---------- /chat/stream (Server-Sent Events) ----------
+def _sse(event: str, data: Dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+async def _stream_downstream(payload: Dict[str, Any], final: Dict[str, Any]) -> AsyncIterator[str]:
+    """
+    Yield English reply text as KisanSaathi produces it. Reads the NDJSON stream of
+    /KisanSaathi/stream ({"type": "delta"|"final"|"error", ...}; SSE "data:" lines are
+    accepted too). `final` receives end_time once known. If streaming is unavailable
+    before any text arrived, falls back to the regular one-shot call. Holds one
+    admission slot for the whole stream; when not admitted yields the busy reply
+    (headers are already out, so there is no 503 here).
+    """
+    try:
+        async with _downstream_slot(payload):
+            async for text in _stream_admitted(payload, final):
+                yield text
+    except AdmissionRejected as e:
+        bot_reply_en, final["end_time"] = _busy_reply(e)
+        yield bot_reply_en
+
+async def _stream_admitted(payload: Dict[str, Any], final: Dict[str, Any]) -> AsyncIterator[str]:
+    got_text = False
+    if downstream.enabled:
+        t0 = time.perf_counter()
+        try:
+            async with contextlib.aclosing(downstream.stream_lines(_client(), payload)) as lines:
+                async for line in lines:
+                    line = line.strip()
+                    if line.startswith("data:"):
+                        line = line[5:].strip()
+                    if not line:
+                        continue
+                    evt = orjson.loads(line)
+                    kind = evt.get("type")
+                    if kind == "delta" and evt.get("text"):
+                        got_text = True
+                        yield evt["text"]
+                    elif kind == "final":
+                        final["end_time"] = _parse_end_time_to_utc(evt.get("end_time"))
+                        _observe_usage(evt.get("usage"))
+                        if not got_text and evt.get("bot_reply"):
+                            got_text = True
+                            yield evt["bot_reply"]
+                    elif kind == "error":
+                        raise RuntimeError(evt.get("detail") or "agent error")
+            DOWNSTREAM_SECONDS.labels("stream", "ok" if got_text else "empty").observe_since(t0)
+            if got_text:
+                return
+        except Exception as e:
+            log.warning("Downstream stream failed: %s", e)
+            DOWNSTREAM_SECONDS.labels("stream", "error").observe_since(t0)
+            FALLBACKS.labels("stream_error").inc()
+            if got_text:
+                return  # keep what the user already saw
+    if downstream.enabled:
+        bot_reply_en, end_time_utc = await _post_downstream(payload)
+    else:
+        bot_reply_en, end_time_utc = await _call_downstream(payload)
+    final["end_time"] = end_time_utc
+    yield bot_reply_en
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+async def _translate_segment(segment: str, ui_language: str) -> str:
+    # translate the text but keep the layout whitespace (newlines between bullets)
+    core = segment.strip()
+    if ui_language == "en" or not core:
+        return segment
+    lead = segment[:len(segment) - len(segment.lstrip())]
+    trail = segment[len(segment.rstrip()):]
+    return lead + (await atranslate_text(core, ui_language, "en") or core) + trail
+
+@router.post("/chat/stream")
+async def chat_stream(body: dict):
+    """
+    Same contract as /chat, delivered as Server-Sent Events:
+      event: meta   -> message/session ids and titles (sent before the agent replies)
+      event: delta  -> {"text": <UI-language segment>, "text_en": <English segment>}
+      event: done   -> the full /chat response body
+    Segments are cut at sentence/bullet boundaries and translated as soon as each one
+    is complete; bot_message is written to the DB when the stream closes.
+    """
+    t_request = time.perf_counter()
+    inputs = _chat_inputs(body)
+    db = await get_conn()
+    # everything before the downstream call (context, title, EN normalisation, payload)
+    run = await _chat_graph.run({"db": db, **inputs},
+                                targets=("payload", "answer_cache", "session_name_ui", "input_lang"))
+    _observe_stages(run)
+    current_title, renamed = run["title_final"]
+    ui_language = run["user_info"]["language"] or "en"
+    meta = {
+        "message_id": inputs["message_id"],
+        "session_id": inputs["session_id"],
+        "user_email": inputs["user_email"],
+        "session_name": current_title or DEFAULT_TITLE,
+        "session_name_ui": run["session_name_ui"],
+        "renamed": renamed,
+        "relevance_used": bool(run["relevant"]),
+        "answer_cache": run["answer_cache"].kind if run["answer_cache"] else None,
+    }
+    probe: Optional[Probe] = run["answer_cache"]
+
+    async def _events() -> AsyncIterator[bytes]:
+        t0 = time.perf_counter()
+        final: Dict[str, Any] = {}
+        parts_en: List[str] = []
+        parts_ui: List[str] = []
+        queue: "asyncio.Queue[Optional[Tuple[str, asyncio.Task]]]" = asyncio.Queue()
+
+        async def _produce() -> None:
+            # read downstream, cut segments, start each translation immediately
+            seg = SegmentBuffer()
+            t_down = time.perf_counter()
+            if probe is not None and probe.hit:
+                _record_cache_hit(run["payload"], probe.answer)
+                source = _replay(probe.answer)
+            else:
+                source = _stream_downstream(run["payload"], final)
+            try:
+                async for chunk in source:
+                    for s in seg.feed(chunk):
+                        queue.put_nowait((s, asyncio.create_task(_translate_segment(s, ui_language))))
+                for s in seg.flush():
+                    queue.put_nowait((s, asyncio.create_task(_translate_segment(s, ui_language))))
+                final["downstream_s"] = time.perf_counter() - t_down
+            finally:
+                queue.put_nowait(None)
+
+        producer = asyncio.create_task(_produce())
+        completed = False
+        try:
+            yield _sse("meta", meta)
+            first = True
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                seg_en, task = item
+                seg_ui = await task
+                parts_en.append(seg_en)
+                parts_ui.append(seg_ui)
+                if first:
+                    log.info("/chat/stream first segment after %.3fs", time.perf_counter() - t0)
+                    first = False
+                yield _sse("delta", {"text": seg_ui, "text_en": seg_en})
+            await producer
+            completed = True
+            bot_reply_en = "".join(parts_en).strip() or FETCH_FAILED_REPLY
+            bot_reply_ui = "".join(parts_ui).strip() or bot_reply_en
+            if probe is not None and not probe.hit and _cacheable_reply(bot_reply_en):
+                answer_cache.store(probe, bot_reply_en, final.get("downstream_s", 0.0))
+            yield _sse("done", {**meta, "bot_msg": bot_reply_ui, "bot_msg_en": bot_reply_en})
+        finally:
+            if not producer.done():
+                producer.cancel()
+            # persist the turn on close (also when the client went away mid-stream); a task
+            # of its own because a cancelled generator must not abort the write, which
+            # goes through the write-behind queue like /chat
+            bot_reply_en = "".join(parts_en).strip() or (FETCH_FAILED_REPLY if completed else None)
+            _spawn(_record_turn(
+                db, run.results, bot_reply_en, final.get("end_time") or datetime.now(timezone.utc),
+                "".join(parts_ui).strip() if completed else None, run["session_name_ui"],
+            ), "stream turn record")
+            log.info("Total /chat/stream latency: %.3fs", time.perf_counter() - t0)
+            REQUEST_SECONDS.labels("/chat/stream").observe_since(t_request)
+
+    return StreamingResponse(_events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -3,13 +3,14 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from typing import Optional
 import uuid
-from db import get_conn, fetchrow, execute
+from db import get_conn, fetchrow
+from services.write_behind import queue as write_behind
 
 router = APIRouter(tags=["feedback"])
 IST = ZoneInfo("Asia/Kolkata")
 
 async def _session_exists(db, user_email: str, session_id: str) -> bool:
-    row = await fetchrow(db, "SELECT 1 FROM sessions WHERE user_email=$1 AND session_id=$2 LIMIT 1",
+    row = await fetchrow(db, "SELECT 1 FROM chat_sessions WHERE user_email=$1 AND session_id=$2",
                          user_email, session_id)
     return row is not None
 
@@ -31,10 +32,11 @@ async def submit_feedback(body: dict):
 
     feedback_id = str(uuid.uuid4())
     now_utc = datetime.now(timezone.utc)
-    await execute(db, """
-        INSERT INTO feedback (feedback_id, session_id, user_email, action, comment, created_time)
-        VALUES ($1,$2,$3,$4,$5,$6)
-    """, feedback_id, session_id, user_email, action, comment, now_utc)
+    # existence is checked synchronously (404 contract); the insert is queued
+    await write_behind.submit_feedback(
+        db, feedback_id=feedback_id, session_id=session_id, user_email=user_email,
+        action=action, comment=comment, created_time=now_utc,
+    )
 
     return {"status_code": 200, "data": {
         "feedback_id": feedback_id,
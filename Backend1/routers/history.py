@@ -1,22 +1,121 @@
 # routers/history.py
+import time
 from fastapi import APIRouter, HTTPException
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
-import asyncio  # needed for asyncio.to_thread
-from db import get_conn, fetch, fetchrow
-from routers.translator import translate_many, _norm_lang
+from db import get_conn, fetch
+from routers.translator import _norm_lang
+from services.metrics import REQUEST_SECONDS
+from services.message_translations import translate_fields, USER_QUERY, BOT_MESSAGE, SESSION_TITLE
+from services.profile_cache import get_profile
+from services.write_behind import queue as write_behind
+from utils.cursor import encode_cursor, decode_cursor
 
 router = APIRouter(tags=["history"])
 IST = ZoneInfo("Asia/Kolkata")
+MAX_PAGE_SIZE = 200
+
+# rows that carry neither a question nor an answer are hidden from history
+_NON_EMPTY_MESSAGE = """
+  NOT (
+    (COALESCE(user_query_en, user_query_raw) IS NULL OR btrim(COALESCE(user_query_en, user_query_raw)) = '')
+    AND (bot_message IS NULL OR btrim(bot_message) = '')
+  )
+"""
+
+def _page_size(raw, default: int) -> int:
+    try:
+        n = int(raw) if raw is not None else default
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="limit must be an integer")
+    return max(1, min(n, MAX_PAGE_SIZE))
+
+def _cursor_arg(body: dict, name: str):
+    raw = (body.get(name) or "").strip()
+    if not raw:
+        return None
+    try:
+        return decode_cursor(raw)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"invalid {name} cursor")
+
+async def _fetch_messages(db, user_email: str, session_id: str, limit, before, after):
+    """
+    Keyset page over (created_time, message_id), returned oldest -> newest.
+      after:  messages newer than the cursor (oldest first)
+      before: messages older than the cursor (the newest `limit` of them)
+      neither: the latest page, or the whole session when limit is None (legacy callers)
+    Returns (rows, has_more) where has_more means more rows exist in the paging direction.
+    """
+    where, vals = ["user_email=$1", "session_id=$2", _NON_EMPTY_MESSAGE], [user_email, session_id]
+    if after:
+        vals += list(after)
+        where.append(f"(created_time, message_id) > (${len(vals)-1}, ${len(vals)})")
+    if before:
+        vals += list(before)
+        where.append(f"(created_time, message_id) < (${len(vals)-1}, ${len(vals)})")
+    # newer-than pages read forward; everything else reads backward from the newest end
+    order = "ASC" if after else "DESC"
+    sql = f"""
+        SELECT message_id,
+               COALESCE(user_query_en, user_query_raw) AS user_query_en,
+               bot_message,
+               created_time, end_time
+        FROM chat_messages
+        WHERE {" AND ".join(where)}
+        ORDER BY created_time {order}, message_id {order}
+    """
+    if limit is not None:
+        vals.append(limit + 1)
+        sql += f" LIMIT ${len(vals)}"
+    rows = list(await fetch(db, sql, *vals))
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+    if order == "DESC":
+        rows.reverse()
+    if not before:
+        rows, has_more = _with_pending(rows, has_more, user_email, session_id, limit, after)
+    return rows, has_more
+
+def _with_pending(rows, has_more, user_email: str, session_id: str, limit, after):
+    """Add turns still waiting in the write-behind queue (they are newer than any DB row)."""
+    seen = {r["message_id"] for r in rows}
+    extra = [
+        {
+            "message_id": t["message_id"],
+            "user_query_en": t.get("user_query_en") or t.get("user_query_raw"),
+            "bot_message": t.get("bot_message"),
+            "created_time": t["created_time"],
+            "end_time": t.get("end_time"),
+        }
+        for t in write_behind.pending_turns(session_id)
+        if t["user_email"] == user_email and t["message_id"] not in seen
+        and (after is None or (t["created_time"], t["message_id"]) > after)
+    ]
+    if not extra:
+        return rows, has_more
+    rows = rows + extra
+    if limit is not None and len(rows) > limit:
+        # newest page keeps the newest rows; an `after` page keeps the oldest ones
+        rows = rows[:limit] if after else rows[-limit:]
+        has_more = True
+    return rows, has_more
 
 async def _get_user_lang_from_db(user_email: str) -> str:
     db = await get_conn()
-    row = await fetchrow(db, "SELECT language FROM user_information WHERE user_email=$1", user_email)
-    lang = (row["language"] if row else None) or "en"
+    lang = (await get_profile(db, user_email))["language"] or "en"
     return _norm_lang(lang) or "en"
 
 @router.post("/history")
 async def history(body: dict):
+    t0 = time.perf_counter()
+    try:
+        return await _history(body)
+    finally:
+        REQUEST_SECONDS.labels("/history").observe_since(t0)
+
+async def _history(body: dict):
     domain = (body.get("domain") or "").strip()
     language_body = (body.get("language") or "").strip()
 
@@ -30,21 +129,15 @@ async def history(body: dict):
         if not target_lang:
             target_lang = "en"
 
+        # Keyset pagination: `before` pages back through older messages, `after` fetches only
+        # what is newer than the client's last message. Without limit/cursors the whole
+        # session is returned, as before.
+        before, after = _cursor_arg(body, "before"), _cursor_arg(body, "after")
+        paged = before or after or body.get("limit") is not None
+        limit = _page_size(body.get("limit"), 50) if paged else None
+
         db = await get_conn()
-        rows = await fetch(db, """
-            SELECT message_id,
-                   COALESCE(user_query_en, user_query_raw) AS user_query_en,
-                   bot_message,
-                   created_time, end_time
-            FROM sessions
-            WHERE user_email=$1 AND session_id=$2
-              AND message_id IS NOT NULL
-              AND NOT (
-                (COALESCE(user_query_en, user_query_raw) IS NULL OR btrim(COALESCE(user_query_en, user_query_raw)) = '')
-                AND (bot_message IS NULL OR btrim(bot_message) = '')
-              )
-            ORDER BY created_time ASC
-        """, user_email, session_id)
+        rows, has_more = await _fetch_messages(db, user_email, session_id, limit, before, after)
 
         mids, user_en, bot_en, meta = [], [], [], []
         for r in rows:
@@ -56,9 +149,14 @@ async def history(body: dict):
             meta.append((created, ended))
 
         if target_lang != "en" and (user_en or bot_en):
-            # run sync translator in a thread to avoid blocking the event loop
-            user_disp = await asyncio.to_thread(translate_many, user_en, target_lang, "en")
-            bot_disp  = await asyncio.to_thread(translate_many, bot_en,  target_lang, "en")
+            # stored UI renderings first; only rows never seen in this language hit the translator
+            shown = await translate_fields(
+                db,
+                [(mid, USER_QUERY, u) for mid, u in zip(mids, user_en)]
+                + [(mid, BOT_MESSAGE, b) for mid, b in zip(mids, bot_en)],
+                target_lang, "en",
+            )
+            user_disp, bot_disp = shown[:len(mids)], shown[len(mids):]
         else:
             user_disp, bot_disp = user_en, bot_en
 
@@ -72,12 +170,27 @@ async def history(body: dict):
                 "created_time": created,
                 "end_time": ended,
             })
-        return {"status_code": 200, "data": data}
+
+        resp = {"status_code": 200, "data": data}
+        if paged:
+            first, last = (rows[0], rows[-1]) if rows else (None, None)
+            # page further back with before=next_cursor (None once the start of the session is reached)
+            resp["next_cursor"] = encode_cursor(first["created_time"], first["message_id"]) if (first and has_more and not after) else None
+            # poll with after=latest_cursor for new turns (only meaningful on the newest page);
+            # keep the caller's cursor when nothing newer came back
+            if before:
+                resp["latest_cursor"] = None
+            else:
+                resp["latest_cursor"] = (encode_cursor(last["created_time"], last["message_id"]) if last
+                                         else (body.get("after") or None))
+            resp["has_more"] = has_more
+        return resp
 
     elif domain == "list-session":
         user_email = (body.get("user_email") or "").strip()
-        limit = int(body.get("limit", 25))
+        limit = _page_size(body.get("limit"), 25)
         offset = int(body.get("offset", 0))
+        cursor = _cursor_arg(body, "cursor")
         if not user_email:
             raise HTTPException(status_code=400, detail="user_email is required")
 
@@ -86,15 +199,27 @@ async def history(body: dict):
             target_lang = "en"
 
         db = await get_conn()
-        rows = await fetch(db, """
-            SELECT session_id, COALESCE(session_name, 'Welcome') AS session_name,
-                   MAX(created_time) AS last_activity
-            FROM sessions
-            WHERE user_email=$1
-            GROUP BY session_id, session_name
-            ORDER BY last_activity DESC
-            LIMIT $2 OFFSET $3
-        """, user_email, limit, offset)
+        if cursor:
+            # keyset page on (last_activity, session_id); cost does not grow with depth
+            rows = await fetch(db, """
+                SELECT session_id, title AS session_name, last_activity
+                FROM chat_sessions
+                WHERE user_email=$1 AND (last_activity, session_id) < ($2, $3)
+                ORDER BY last_activity DESC, session_id DESC
+                LIMIT $4
+            """, user_email, cursor[0], cursor[1], limit + 1)
+        else:
+            # first page, or legacy offset paging
+            rows = await fetch(db, """
+                SELECT session_id, title AS session_name, last_activity
+                FROM chat_sessions
+                WHERE user_email=$1
+                ORDER BY last_activity DESC, session_id DESC
+                LIMIT $2 OFFSET $3
+            """, user_email, limit + 1, offset)
+        rows = list(rows)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
         now_ist = datetime.now(timezone.utc).astimezone(IST)
         groups = {"Today": [], "Yesterday": [], "Past 7 days": [], "Past Month": [], "Older than a month": []}
@@ -108,7 +233,8 @@ async def history(body: dict):
             names.append(nm)
 
         if target_lang != "en" and names:
-            names_ui = await asyncio.to_thread(translate_many, names, target_lang)
+            names_ui = await translate_fields(
+                db, [(str(sid), SESSION_TITLE, nm) for (sid, nm, _, _) in items], target_lang, None)
         else:
             names_ui = names
 
@@ -125,7 +251,8 @@ async def history(body: dict):
             else:
                 groups["Older than a month"].append(it)
 
-        return {"status_code": 200, "data": groups}
+        next_cursor = encode_cursor(rows[-1]["last_activity"], str(rows[-1]["session_id"])) if (rows and has_more) else None
+        return {"status_code": 200, "data": groups, "next_cursor": next_cursor}
 
     else:
         raise HTTPException(status_code=400, detail="Invalid domain")
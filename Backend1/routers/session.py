@@ -3,6 +3,9 @@ from zoneinfo import ZoneInfo
 from fastapi import APIRouter, HTTPException
 import uuid
 from db import get_conn, execute
+from routers.translator import atranslate_text
+from services import message_translations as mt
+from services.profile_cache import get_profile
 
 router = APIRouter(tags=["session"])
 IST = ZoneInfo("Asia/Kolkata")
@@ -16,8 +19,8 @@ async def create_session(body: dict):
     now_utc = datetime.now(timezone.utc)
     db = await get_conn()
     await execute(db, """
-        INSERT INTO sessions (user_email, session_id, session_name, created_time)
-        VALUES ($1,$2,'New Chat',$3)
+        INSERT INTO chat_sessions (user_email, session_id, title, created_time, last_activity)
+        VALUES ($1,$2,'New Chat',$3,$3)
     """, user_email, session_id, now_utc)
     return {"user_email": user_email, "session_id": session_id, "created_time": now_utc.astimezone(IST).isoformat()}
 
@@ -32,16 +35,34 @@ async def manage_session(body: dict):
         new_name = (body.get("session_name") or "").strip()
         if not (user_email and session_id and new_name):
             raise HTTPException(status_code=400, detail="user_email, session_id, session_name required")
-        res = await execute(db, "UPDATE sessions SET session_name=$1 WHERE user_email=$2 AND session_id=$3",
+        res = await execute(db, "UPDATE chat_sessions SET title=$1 WHERE user_email=$2 AND session_id=$3",
                             new_name, user_email, session_id)
         if res.endswith("0"):
             raise HTTPException(status_code=404, detail="Session not found")
+        await mt.invalidate(db, [session_id], mt.SESSION_TITLE)
+        # store the title in the owner's UI language now, as /chat does for the auto
+        # title, so the next /history load does not pay a translator call for it
+        lang = (await get_profile(db, user_email))["language"] or "en"
+        if lang != "en":
+            title_ui = await atranslate_text(new_name, lang, None)
+            if title_ui and title_ui != new_name:  # unchanged is usually a translator fallback
+                await mt.put_many(db, [(session_id, mt.SESSION_TITLE, lang, title_ui)])
         return {"status_code": 200}
 
     elif domain == "delete-session":
         if not (user_email and session_id):
             raise HTTPException(status_code=400, detail="user_email and session_id required")
-        res = await execute(db, "DELETE FROM sessions WHERE user_email=$1 AND session_id=$2",
+        # chat_messages rows go with it (ON DELETE CASCADE); stored translations are keyed
+        # by message/session id only, so clear them explicitly
+        await execute(db, """
+            DELETE FROM message_translations
+            WHERE message_id IN (
+                SELECT session_id FROM chat_sessions WHERE session_id=$1 AND user_email=$2
+                UNION ALL
+                SELECT message_id FROM chat_messages WHERE session_id=$1 AND user_email=$2
+            )
+        """, session_id, user_email)
+        res = await execute(db, "DELETE FROM chat_sessions WHERE user_email=$1 AND session_id=$2",
                             user_email, session_id)
         if res.endswith("0"):
             raise HTTPException(status_code=404, detail="Session not found")
@@ -1,14 +1,20 @@
 # src/routers/translator.py
 from __future__ import annotations
 
+import asyncio
 import html
 import logging
 import os
 import time
-from functools import lru_cache
-from typing import Any, Dict, Iterable, List, Optional
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
 
-import requests
+import httpx
+
+from services.metrics import FALLBACKS, TRANSLATOR_ERRORS, TRANSLATOR_SECONDS
+from services.translation_memory import memory as translation_memory, tm_key
 
 try:
     from src.config import settings
@@ -17,9 +23,12 @@ except Exception:  # pragma: no cover
 
 log = logging.getLogger("translator")
 
-BASE_URL = "https://translation.googleapis.com/language/translate/v2"
+# overridable so the load-test harness can point at a local stand-in
+BASE_URL = os.getenv("GOOGLE_TRANSLATE_URL", "https://translation.googleapis.com/language/translate/v2")
 SUPPORTED_LANGS = {"en","hi","mr","gu","bn","ta","te","kn","ml","pa","or","as"}
 
+T = TypeVar("T")
+
 def _norm_lang(lang: Optional[str]) -> Optional[str]:
     if not lang: return None
     primary = lang.strip().lower().replace(" ", "").split("-")[0].split("_")[0]
@@ -45,94 +54,362 @@ def _get_api_key() -> Optional[str]:
         pass
     return None
 
-def _google_translate_batch(
+# ---------- HTTP plumbing ----------
+# Async first: every network call goes through the shared httpx.AsyncClient from
+# app.py (keep-alive + HTTP/2 multiplexing), so callers never tie up worker threads.
+# The sync functions below are thin wrappers that run the async path to completion.
+_client_override: ContextVar[Optional[httpx.AsyncClient]] = ContextVar("translator_client", default=None)
+_own_client: Optional[httpx.AsyncClient] = None
+
+def _http() -> httpx.AsyncClient:
+    override = _client_override.get()
+    if override is not None:
+        return override
+    try:
+        from app import _httpx_client  # shared client (lifespan-managed)
+    except Exception:  # pragma: no cover
+        _httpx_client = None
+    if _httpx_client is not None:
+        return _httpx_client
+    # Outside the FastAPI app (scripts): lazily create a module-owned pooled client
+    global _own_client
+    if _own_client is None or _own_client.is_closed:
+        _own_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=20, max_connections=50),
+        )
+    return _own_client
+
+def _run_sync(fn: Callable[..., Awaitable[T]], *args: Any) -> T:
+    """Run an async translator call from sync code (own loop + short-lived client)."""
+    async def _runner() -> T:
+        async with httpx.AsyncClient(http2=True) as c:
+            token = _client_override.set(c)
+            try:
+                return await fn(*args)
+            finally:
+                _client_override.reset(token)
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(_runner())
+    # Called from inside a running loop (legacy sync caller): don't nest loops
+    with ThreadPoolExecutor(max_workers=1) as ex:
+        return ex.submit(asyncio.run, _runner()).result()
+
+async def _google_translate_request(
     texts: List[str],
     target_lang: str,
-    source_lang: Optional[str] = None,
+    source_lang: Optional[str],
+    key: str,
     timeout: int = 12,
     retries: int = 2,
 ) -> List[str]:
-    key = _get_api_key()
-    if not key:
-        return texts
-
-    target_lang = _norm_lang(target_lang) or "en"
+    """One batched v2 call with retries; raises if every attempt fails."""
     params: Dict[str, Any] = {"target": target_lang, "key": key}
     if source_lang:
         params["source"] = _norm_lang(source_lang) or source_lang
-    data = [("q", t if t is not None else "") for t in texts]
+    data = {"q": [t if t is not None else "" for t in texts]}
 
     last_err: Optional[Exception] = None
+    timer = TRANSLATOR_SECONDS.labels("translate", target_lang)
     for attempt in range(retries + 1):
+        t0 = time.perf_counter()
         try:
-            r = requests.post(BASE_URL, params=params, data=data, timeout=timeout)
+            r = await _http().post(BASE_URL, params=params, data=data, timeout=timeout)
             r.raise_for_status()
             payload = r.json()
             translations = payload["data"]["translations"]
+            timer.observe_since(t0)
             return [html.unescape(tr.get("translatedText", "")) for tr in translations]
         except Exception as e:
+            timer.observe_since(t0)
+            TRANSLATOR_ERRORS.labels("translate").inc()
             last_err = e
             log.warning("translate batch failed (attempt %s/%s): %s", attempt+1, retries+1, e)
             if attempt < retries:
-                time.sleep(0.6 * (attempt + 1))
-            else:
-                break
-    if last_err:
-        log.warning("translate failed, returning originals: %s", last_err)
-    return texts
+                await asyncio.sleep(0.6 * (attempt + 1))  # non-blocking backoff
+    raise last_err  # type: ignore[misc]
 
-def detect_languages(texts: List[str], timeout: int = 8) -> List[Optional[str]]:
+async def _google_translate_batch_async(
+    texts: List[str],
+    target_lang: str,
+    source_lang: Optional[str] = None,
+    timeout: int = 12,
+    retries: int = 2,
+) -> List[str]:
     key = _get_api_key()
     if not key:
-        return [None]*len(texts)
+        return texts
+    target_lang = _norm_lang(target_lang) or "en"
+    try:
+        return await _google_translate_request(texts, target_lang, source_lang, key, timeout, retries)
+    except Exception as e:
+        log.warning("translate failed, returning originals: %s", e)
+        return texts
+
+# ---------- cross-request micro-batching ----------
+# Concurrent /chat requests each want one or two segments translated. Instead of
+# one outbound call per segment, segments from every in-flight coroutine that
+# arrive within a short window are grouped by (op, target, source) and sent as one
+# v2 call (up to 128 `q` segments), then fanned back to their callers.
+BATCH_WINDOW_MS = float(os.getenv("TRANSLATE_BATCH_WINDOW_MS", "5"))  # 0 disables batching
+BATCH_MAX_SEGMENTS = min(int(os.getenv("TRANSLATE_BATCH_MAX_SEGMENTS", "128")), 128)  # API cap
+BATCH_MAX_CHARS = int(os.getenv("TRANSLATE_BATCH_MAX_CHARS", "25000"))
+
+_GroupKey = Tuple[str, str, Optional[str]]  # (op, target, source)
+
+class _PendingGroup:
+    __slots__ = ("entries", "segments", "chars", "timer")
+
+    def __init__(self) -> None:
+        self.entries: List[Tuple[List[str], "asyncio.Future[List[Any]]"]] = []
+        self.segments = 0
+        self.chars = 0
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+class _MicroBatcher:
+    """Per-event-loop dispatcher with flush-on-size and flush-on-timeout."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, window_ms: float, max_segments: int, max_chars: int):
+        self._loop = loop
+        self._window = window_ms / 1000.0
+        self._max_segments = max_segments
+        self._max_chars = max_chars
+        self._groups: Dict[_GroupKey, _PendingGroup] = {}
+        self._dispatching: Set[asyncio.Task] = set()  # strong refs until each batch settles
+        self.batches_sent = 0
+        self.segments_sent = 0
+
+    async def submit(self, op: str, target_lang: str, source_lang: Optional[str], texts: List[str]) -> List[Any]:
+        if not texts:
+            return []
+        if self._window <= 0 or len(texts) >= self._max_segments:
+            # batching disabled / caller already has a full batch: send directly (chunked)
+            out: List[Any] = []
+            for i in range(0, len(texts), self._max_segments):
+                out.extend(await self._send(op, target_lang, source_lang, texts[i:i + self._max_segments]))
+            return out
+
+        key: _GroupKey = (op, target_lang, source_lang)
+        chars = sum(len(t or "") for t in texts)
+        group = self._groups.get(key)
+        if group is not None and (group.segments + len(texts) > self._max_segments
+                                  or group.chars + chars > self._max_chars):
+            self._flush(key)  # would overflow one request -> ship what we have
+            group = None
+        if group is None:
+            group = self._groups[key] = _PendingGroup()
+            group.timer = self._loop.call_later(self._window, self._flush, key)
+
+        fut: "asyncio.Future[List[Any]]" = self._loop.create_future()
+        group.entries.append((texts, fut))
+        group.segments += len(texts)
+        group.chars += chars
+        if group.segments >= self._max_segments:
+            self._flush(key)
+        return await fut
+
+    def _flush(self, key: _GroupKey) -> None:
+        group = self._groups.pop(key, None)
+        if group is None:
+            return
+        if group.timer is not None:
+            group.timer.cancel()
+        task = self._loop.create_task(self._dispatch(key, group.entries))
+        self._dispatching.add(task)
+        task.add_done_callback(lambda t: self._dispatched(t, group.entries))
+
+    def _dispatched(self, task: asyncio.Task, entries: List[Tuple[List[str], "asyncio.Future[List[Any]]"]]) -> None:
+        # _dispatch settles every future itself; this covers it dying outside its own
+        # try (cancelled at shutdown, a bug) so no waiter hangs
+        self._dispatching.discard(task)
+        if task.cancelled():
+            err: BaseException = asyncio.CancelledError()
+        elif task.exception() is not None:
+            err = task.exception()
+        else:
+            return
+        for _, fut in entries:
+            if not fut.done():
+                if isinstance(err, asyncio.CancelledError):
+                    fut.cancel()
+                else:
+                    fut.set_exception(err)
+
+    async def _dispatch(self, key: _GroupKey, entries: List[Tuple[List[str], "asyncio.Future[List[Any]]"]]) -> None:
+        op, target_lang, source_lang = key
+        flat = [t for texts, _ in entries for t in texts]
+        try:
+            results = await self._send(op, target_lang, source_lang, flat)
+            if len(results) != len(flat):
+                raise RuntimeError(f"batched {op} returned {len(results)} results for {len(flat)} segments")
+        except Exception as e:
+            for _, fut in entries:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        pos = 0
+        for texts, fut in entries:
+            if not fut.done():  # caller may have been cancelled meanwhile
+                fut.set_result(results[pos:pos + len(texts)])
+            pos += len(texts)
+
+    async def _send(self, op: str, target_lang: str, source_lang: Optional[str], texts: List[str]) -> List[Any]:
+        key = _get_api_key()
+        if not key:
+            raise RuntimeError("GOOGLE_TRANSLATE_API_KEY not set")
+        self.batches_sent += 1
+        self.segments_sent += len(texts)
+        if op == "detect":
+            return await _google_detect_request(texts, key)
+        return await _google_translate_request(texts, target_lang, source_lang, key)
+
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _MicroBatcher]" = weakref.WeakKeyDictionary()
+
+def _batcher() -> _MicroBatcher:
+    # one dispatcher per event loop (the app loop; sync wrappers run their own)
+    loop = asyncio.get_running_loop()
+    b = _batchers.get(loop)
+    if b is None:
+        b = _batchers[loop] = _MicroBatcher(loop, BATCH_WINDOW_MS, BATCH_MAX_SEGMENTS, BATCH_MAX_CHARS)
+    return b
+
+def translator_batch_stats() -> Dict[str, float]:
+    sent = sum(b.batches_sent for b in list(_batchers.values()))
+    segs = sum(b.segments_sent for b in list(_batchers.values()))
+    return {"batches_sent": sent, "segments_sent": segs,
+            "avg_segments_per_batch": round(segs / sent, 2) if sent else 0.0}
+
+async def _translate_with_memory(texts: List[str], target_lang: str, source_lang: Optional[str]) -> List[str]:
+    """
+    Translate through the two-tier translation memory: only segments missing from
+    both tiers go to Google (as one batched call, duplicates collapsed). Failed calls
+    fall back to the originals and are never stored.
+    """
+    key = _get_api_key()
+    if not key:
+        return texts
+    target_lang = _norm_lang(target_lang) or "en"
+    source_lang = _norm_lang(source_lang)
+    keys = [tm_key(t, target_lang, source_lang) for t in texts]
+    found = await translation_memory.lookup_many(list(dict.fromkeys(keys)))
+
+    missing: Dict[str, str] = {}
+    for k, t in zip(keys, texts):
+        if k not in found and k not in missing:
+            missing[k] = t
+    if missing:
+        try:
+            translated = await _batcher().submit("translate", target_lang, source_lang, list(missing.values()))
+        except Exception as e:
+            log.warning("translate failed, returning originals: %s", e)
+            FALLBACKS.labels("translate_error").inc()
+            translated = None
+        if translated is not None and len(translated) == len(missing):
+            fresh = dict(zip(missing.keys(), translated))
+            found.update(fresh)
+            await translation_memory.store_many(fresh, target_lang)
+    return [found.get(k, t) for k, t in zip(keys, texts)]
+
+def translation_memory_stats() -> Dict[str, float]:
+    return {**translation_memory.stats(), **translator_batch_stats()}
+
+async def _google_detect_request(texts: List[str], key: str, timeout: int = 8) -> List[Optional[str]]:
+    """One batched /detect call; raises on failure."""
+    url = f"{BASE_URL}/detect"
+    params = {"key": key}
+    data = {"q": [t if t is not None else "" for t in texts]}
+    t0 = time.perf_counter()
     try:
-        url = f"{BASE_URL}/detect"
-        params = {"key": key}
-        data = [("q", t if t is not None else "") for t in texts]
-        r = requests.post(url, params=params, data=data, timeout=timeout)
+        r = await _http().post(url, params=params, data=data, timeout=timeout)
         r.raise_for_status()
         payload = r.json()
-        out: List[Optional[str]] = []
-        for lst in payload.get("data", {}).get("detections", []):
-            if isinstance(lst, list) and lst:
-                out.append(_norm_lang(lst[0].get("language")))
-            else:
-                out.append(None)
-        while len(out) < len(texts):
+    except Exception:
+        TRANSLATOR_ERRORS.labels("detect").inc()
+        raise
+    finally:
+        TRANSLATOR_SECONDS.labels("detect", "").observe_since(t0)
+    out: List[Optional[str]] = []
+    for lst in payload.get("data", {}).get("detections", []):
+        if isinstance(lst, list) and lst:
+            out.append(_norm_lang(lst[0].get("language")))
+        else:
             out.append(None)
-        return out
+    while len(out) < len(texts):
+        out.append(None)
+    return out
+
+async def adetect_languages(texts: List[str], timeout: int = 8) -> List[Optional[str]]:
+    key = _get_api_key()
+    if not key:
+        return [None]*len(texts)
+    try:
+        return await _batcher().submit("detect", "", None, texts)
     except Exception as e:
         log.warning("detect_languages failed: %s", e)
         return [None]*len(texts)
 
-def detect_language(text: Optional[str]) -> Optional[str]:
+async def adetect_language(text: Optional[str]) -> Optional[str]:
     if not text or not text.strip():
         return None
-    return detect_languages([text])[0]
+    return (await adetect_languages([text]))[0]
 
-@lru_cache(maxsize=50_000)
-def _cached_translate_single(text: str, target_lang: str, source_lang: Optional[str]) -> str:
-    return _google_translate_batch([text], target_lang, source_lang=source_lang)[0]
+async def _cached_translate_single(text: str, target_lang: str, source_lang: Optional[str]) -> str:
+    return (await _translate_with_memory([text], target_lang, source_lang))[0]
 
-def translate_text(text: Optional[str], target_lang: str, source_lang: Optional[str] = None) -> Optional[str]:
+async def atranslate_text(text: Optional[str], target_lang: str, source_lang: Optional[str] = None) -> Optional[str]:
     if text is None: return None
     if not text.strip(): return text
     target_lang = _norm_lang(target_lang) or "en"
     try:
-        return _cached_translate_single(text, target_lang, source_lang)
+        return await _cached_translate_single(text, target_lang, source_lang)
     except Exception as e:
         log.warning("translate_text failed (fallback to original): %s", e)
         return text
 
-def translate_many(texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[str]:
+async def atranslate_many(texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[str]:
     if not texts: return texts
     target_lang = _norm_lang(target_lang) or "en"
     try:
-        return _google_translate_batch(texts, target_lang, source_lang=source_lang)
+        return await _translate_with_memory(texts, target_lang, source_lang)
     except Exception as e:
         log.warning("translate_many failed (fallback to originals): %s", e)
         return texts
 
+async def ato_english(text: Optional[str], source_lang: Optional[str] = None) -> Optional[str]:
+    if text is None or not text.strip(): return text
+    try:
+        return (await _translate_with_memory([text], "en", source_lang))[0]
+    except Exception as e:
+        log.warning("to_english failed (fallback to original): %s", e)
+        return text
+
+# ---------- sync wrappers (kept for existing callers/scripts) ----------
+def _google_translate_batch(
+    texts: List[str],
+    target_lang: str,
+    source_lang: Optional[str] = None,
+    timeout: int = 12,
+    retries: int = 2,
+) -> List[str]:
+    return _run_sync(_google_translate_batch_async, texts, target_lang, source_lang, timeout, retries)
+
+def detect_languages(texts: List[str], timeout: int = 8) -> List[Optional[str]]:
+    return _run_sync(adetect_languages, texts, timeout)
+
+def detect_language(text: Optional[str]) -> Optional[str]:
+    return _run_sync(adetect_language, text)
+
+def translate_text(text: Optional[str], target_lang: str, source_lang: Optional[str] = None) -> Optional[str]:
+    return _run_sync(atranslate_text, text, target_lang, source_lang)
+
+def translate_many(texts: List[str], target_lang: str, source_lang: Optional[str] = None) -> List[str]:
+    return _run_sync(atranslate_many, texts, target_lang, source_lang)
+
+def to_english(text: Optional[str], source_lang: Optional[str] = None) -> Optional[str]:
+    return _run_sync(ato_english, text, source_lang)
+
 def translate_payload(payload: Any, target_lang: str, keys: Iterable[str], source_lang: Optional[str] = None) -> Any:
     target_lang = _norm_lang(target_lang) or "en"
     keys = set(keys)
@@ -150,11 +427,3 @@ def translate_payload(payload: Any, target_lang: str, keys: Iterable[str], sourc
         else:
             return node
     return _walk(payload)
-
-def to_english(text: Optional[str], source_lang: Optional[str] = None) -> Optional[str]:
-    if text is None or not text.strip(): return text
-    try:
-        return _google_translate_batch([text], "en", source_lang=_norm_lang(source_lang))[0]
-    except Exception as e:
-        log.warning("to_english failed (fallback to original): %s", e)
-        return text
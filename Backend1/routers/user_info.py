@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException
 from typing import Optional
-from db import get_conn, fetchrow, execute
+from db import get_conn, execute
 from routers.translator import _norm_lang
+from services.profile_cache import get_profile, invalidate, notify_changed
 
 router = APIRouter(tags=["user-info"])
 
@@ -28,14 +29,7 @@ async def get_user_info(body: dict):
     if not user_email:
         raise HTTPException(status_code=400, detail="user_email is required")
     db = await get_conn()
-    row = await fetchrow(db, "SELECT mode, language, pincode FROM user_information WHERE user_email=$1", user_email)
-    if not row:
-        return {"status_code": 200, "data": {"mode":"general","language":"en","pincode":None}}
-    return {"status_code": 200, "data": {
-        "mode": row["mode"] or "general",
-        "language": row["language"] or "en",
-        "pincode": row["pincode"]
-    }}
+    return {"status_code": 200, "data": await get_profile(db, user_email)}
 
 @router.post("/user-info/update")
 async def update_user_info(body: dict):
@@ -60,4 +54,6 @@ async def update_user_info(body: dict):
     vals.append(user_email)
 
     await execute(db, f"UPDATE user_information SET {', '.join(sets)} WHERE user_email=${len(vals)}", *vals)
+    invalidate(user_email)
+    await notify_changed(db, user_email)
     return {"status_code": 200, "message": "User information updated."}
@@ -0,0 +1,143 @@
+# src/services/admission.py
+"""
+Admission control for the KisanSaathi (Backend2) call.
+
+At most ADMISSION_MAX_CONCURRENCY calls are in flight; the rest wait in per-user
+FIFO queues served round-robin, so one chatty user (or a retry storm from one
+client) only delays their own requests. Waiting is bounded on both axes:
+
+  ADMISSION_MAX_QUEUE           total waiters; beyond it new calls are rejected at once
+  ADMISSION_MAX_QUEUE_PER_USER  waiters per user
+  ADMISSION_MAX_WAIT_S          a waiter not admitted by then is rejected
+
+Rejections raise AdmissionRejected(reason); the caller decides between a 503 and a
+degraded reply (ADMISSION_OVERLOAD_MODE). Queue waits go to the
+agri_admission_wait_seconds histogram.
+
+    async with admission.slot(user_email):
+        r = await client.post(...)
+"""
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Deque, Dict
+
+from config import settings
+from services.metrics import ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"downstream admission rejected: {reason}")
+        self.reason = reason
+
+
+class AdmissionController:
+    def __init__(self, max_concurrency: int, max_queue: int, max_queue_per_user: int, max_wait_s: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.max_queue_per_user = max(1, max_queue_per_user)
+        self.max_wait_s = max_wait_s
+        self._in_flight = 0
+        self._queued = 0
+        # user -> waiters; order of keys is the round-robin order
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.admitted = self.timed_out = 0
+        self.rejected: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def slot(self, user: str) -> AsyncIterator[None]:
+        await self.acquire(user)
+        try:
+            yield
+        finally:
+            self.release()
+
+    async def acquire(self, user: str) -> None:
+        t0 = time.perf_counter()
+        if self._in_flight < self.max_concurrency and not self._queued:
+            self._in_flight += 1
+            self.admitted += 1
+            ADMISSION_WAIT_SECONDS.labels("admitted").observe(0.0)
+            return
+        if self._queued >= self.max_queue:
+            self._reject("queue_full", t0)
+        q = self._queues.get(user)
+        if q is not None and len(q) >= self.max_queue_per_user:
+            self._reject("user_queue_full", t0)
+
+        fut: asyncio.Future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(user, deque()).append(fut)
+        self._queued += 1
+        try:
+            await asyncio.wait_for(fut, self.max_wait_s if self.max_wait_s > 0 else None)
+        except asyncio.TimeoutError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # granted in the same tick the wait ran out: pass it on
+            else:
+                self._forget(user, fut)
+            self.timed_out += 1
+            self._reject("timeout", t0)
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                self.release()  # granted just as the caller went away: pass it on
+            else:
+                self._forget(user, fut)
+            raise
+        self.admitted += 1
+        ADMISSION_WAIT_SECONDS.labels("admitted").observe_since(t0)
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        while self._in_flight < self.max_concurrency and self._queues:
+            user, q = next(iter(self._queues.items()))
+            fut = q.popleft()
+            self._queued -= 1
+            if q:
+                self._queues.move_to_end(user)  # round-robin: this user goes to the back
+            else:
+                del self._queues[user]
+            if fut.done():
+                continue
+            self._in_flight += 1
+            fut.set_result(None)
+
+    def _forget(self, user: str, fut: asyncio.Future) -> None:
+        q = self._queues.get(user)
+        if q is None or fut not in q:
+            return
+        q.remove(fut)
+        self._queued -= 1
+        if not q:
+            del self._queues[user]
+
+    def _reject(self, reason: str, t0: float) -> None:
+        self.rejected[reason] = self.rejected.get(reason, 0) + 1
+        ADMISSION_REJECTED.labels(reason).inc()
+        ADMISSION_WAIT_SECONDS.labels("rejected").observe_since(t0)
+        raise AdmissionRejected(reason)
+
+    def stats(self) -> Dict[str, object]:
+        return {
+            "in_flight": self._in_flight,
+            "queued": self._queued,
+            "queued_users": len(self._queues),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "timed_out": self.timed_out,
+            "rejected": dict(self.rejected),
+        }
+
+
+admission = AdmissionController(
+    max_concurrency=settings.ADMISSION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_queue_per_user=settings.ADMISSION_MAX_QUEUE_PER_USER,
+    max_wait_s=settings.ADMISSION_MAX_WAIT_S,
+)
+
+
+def admission_stats() -> Dict[str, object]:
+    return admission.stats()
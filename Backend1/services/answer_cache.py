@@ -0,0 +1,227 @@
+# src/services/answer_cache.py
+"""
+Answer cache for repeated /chat questions (in-process, per worker).
+
+Key: normalised English query (user_msg_en) + mode + location bucket (first three
+pincode digits, i.e. the sorting district). Answers are cached in English, so
+every UI language shares them.
+
+Lookup order:
+  exact    same normalised text in the same (mode, bucket)
+  similar  same (mode, bucket, intent) and the same entities (crops, inputs, places,
+           numbers), with embedding cosine >= ANSWER_CACHE_SIMILARITY when
+           RELEVANCE_EMBED_MODEL is set, otherwise content-term Jaccard >=
+           ANSWER_CACHE_LEXICAL_SIMILARITY
+
+TTL by intent: weather and prices go stale within the hour, schemes in a day,
+agronomy practice in a week (ANSWER_CACHE_TTL_*_S).
+
+Callers skip the cache when the query was enriched with chat history (the answer
+then depends on the conversation) and never store fallback replies.
+"""
+import asyncio
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import settings
+from services.metrics import CACHE_EVENTS
+from services.relevance_scorer import embed, query_terms
+
+_PUNCT = re.compile(r"[^\w\s]")
+_SPACE = re.compile(r"\s+")
+
+_INTENTS: List[Tuple[str, re.Pattern]] = [
+    ("weather", re.compile(r"\b(weather|rain\w*|forecast|temperature|humid\w*|wind|storm|monsoon|hail\w*|frost)\b")),
+    ("price", re.compile(r"\b(price\w*|rate|rates|mandi|market|msp|bhav|sell\w*)\b")),
+    ("scheme", re.compile(r"\b(scheme\w*|subsid\w*|loan\w*|kcc|credit card|insurance|pm ?kisan|yojana)\b")),
+]
+
+
+def normalize(text: str) -> str:
+    return _SPACE.sub(" ", _PUNCT.sub(" ", (text or "").lower())).strip()
+
+
+def intent_of(normalized: str) -> str:
+    for name, pat in _INTENTS:
+        if pat.search(normalized):
+            return name
+    return "agronomy"
+
+
+def location_bucket(pincode: Optional[str]) -> str:
+    digits = re.sub(r"\D", "", pincode or "")
+    return digits[:3] if len(digits) >= 3 else ""
+
+
+@dataclass
+class Probe:
+    """Result of a lookup; pass it back to store() on a miss."""
+    key: Tuple[str, str, str]             # (mode, bucket, normalised text)
+    partition: Tuple[str, str, str]       # (mode, bucket, intent)
+    terms: Set[str]
+    entities: Set[str]
+    vector: Optional[List[float]] = None
+    answer: Optional[str] = None
+    kind: Optional[str] = None            # "exact" | "similar" on a hit
+
+    @property
+    def hit(self) -> bool:
+        return self.answer is not None
+
+
+@dataclass
+class _Entry:
+    answer: str
+    expires_at: float
+    latency_s: float
+    partition: Tuple[str, str, str]
+    terms: Set[str]
+    entities: Set[str]
+    vector: Optional[List[float]] = None
+    hits: int = field(default=0)
+
+
+class AnswerCache:
+    def __init__(self, maxsize: int, ttls: Dict[str, float], similarity: float,
+                 lexical_similarity: float, max_scan: int = 500):
+        self.maxsize = maxsize
+        self.ttls = ttls
+        self.similarity = similarity
+        self.lexical_similarity = lexical_similarity
+        self.max_scan = max_scan
+        self._data: "OrderedDict[Tuple[str, str, str], _Entry]" = OrderedDict()
+        self._partitions: Dict[Tuple[str, str, str], "OrderedDict[Tuple[str, str, str], None]"] = {}
+        self.hits_exact = self.hits_similar = self.misses = self.skipped = self.stores = 0
+        self.saved_s = 0.0
+
+    # ---------- lookup ----------
+    async def lookup(self, query_en: str, mode: str, pincode: Optional[str]) -> Optional[Probe]:
+        """A Probe (hit or miss), or None when the query cannot be cached."""
+        text = normalize(query_en)
+        if not text or self.maxsize <= 0:
+            return None
+        mode, bucket = mode or "general", location_bucket(pincode)
+        terms, entities = query_terms(query_en)  # original casing: place names
+        probe = Probe(key=(mode, bucket, text), partition=(mode, bucket, intent_of(text)),
+                      terms=terms, entities=entities)
+        now = time.monotonic()
+
+        entry = self._get(probe.key, now)
+        if entry is not None:
+            return self._hit(probe, entry, "exact")
+
+        if settings.RELEVANCE_EMBED_MODEL:
+            vecs = await asyncio.to_thread(embed, [text])
+            probe.vector = vecs[0] if vecs else None
+        best, best_sim = None, 0.0
+        for key in reversed(list(self._partitions.get(probe.partition, ()))[-self.max_scan:]):
+            cand = self._get(key, now, touch=False)
+            if cand is None or cand.entities != probe.entities:
+                continue
+            sim = self._similarity(probe, cand)
+            if sim > best_sim:
+                best, best_sim = cand, sim
+        if best is not None:
+            return self._hit(probe, best, "similar")
+        self.misses += 1
+        CACHE_EVENTS.labels("answer", "miss").inc()
+        return probe
+
+    def _similarity(self, probe: Probe, cand: _Entry) -> float:
+        if probe.vector is not None and cand.vector is not None:
+            sim = sum(a * b for a, b in zip(probe.vector, cand.vector))
+            return sim if sim >= self.similarity else 0.0
+        union = probe.terms | cand.terms
+        sim = len(probe.terms & cand.terms) / len(union) if union else 0.0
+        return sim if sim >= self.lexical_similarity else 0.0
+
+    def _hit(self, probe: Probe, entry: _Entry, kind: str) -> Probe:
+        entry.hits += 1
+        probe.answer, probe.kind = entry.answer, kind
+        if kind == "exact":
+            self.hits_exact += 1
+        else:
+            self.hits_similar += 1
+        self.saved_s += entry.latency_s
+        CACHE_EVENTS.labels("answer", f"hit_{kind}").inc()
+        return probe
+
+    def skip(self) -> None:
+        self.skipped += 1
+        CACHE_EVENTS.labels("answer", "skip").inc()
+
+    # ---------- store ----------
+    def store(self, probe: Probe, answer: str, latency_s: float) -> None:
+        intent = probe.partition[2]
+        ttl = self.ttls.get(intent, 0.0)
+        if probe.hit or not answer or ttl <= 0:
+            return
+        self._drop(probe.key)
+        self._data[probe.key] = _Entry(answer, time.monotonic() + ttl, latency_s, probe.partition,
+                                       probe.terms, probe.entities, probe.vector)
+        self._partitions.setdefault(probe.partition, OrderedDict())[probe.key] = None
+        self.stores += 1
+        while len(self._data) > self.maxsize:
+            self._drop(next(iter(self._data)))
+
+    def _get(self, key, now: float, touch: bool = True) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= now:
+            self._drop(key)
+            return None
+        if touch:
+            self._data.move_to_end(key)
+        return entry
+
+    def _drop(self, key) -> None:
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return
+        part = self._partitions.get(entry.partition)
+        if part is not None:
+            part.pop(key, None)
+            if not part:
+                del self._partitions[entry.partition]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._partitions.clear()
+
+    def stats(self) -> Dict[str, float]:
+        hits = self.hits_exact + self.hits_similar
+        lookups = hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits_exact": self.hits_exact,
+            "hits_similar": self.hits_similar,
+            "misses": self.misses,
+            "skipped_enriched": self.skipped,
+            "stores": self.stores,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "saved_latency_s": round(self.saved_s, 3),
+            "avg_saved_ms": round(1000.0 * self.saved_s / hits, 1) if hits else 0.0,
+            "similarity": "embedding" if settings.RELEVANCE_EMBED_MODEL else "lexical",
+        }
+
+
+cache = AnswerCache(
+    maxsize=settings.ANSWER_CACHE_SIZE,
+    ttls={
+        "weather": settings.ANSWER_CACHE_TTL_WEATHER_S,
+        "price": settings.ANSWER_CACHE_TTL_PRICE_S,
+        "scheme": settings.ANSWER_CACHE_TTL_SCHEME_S,
+        "agronomy": settings.ANSWER_CACHE_TTL_AGRONOMY_S,
+    },
+    similarity=settings.ANSWER_CACHE_SIMILARITY,
+    lexical_similarity=settings.ANSWER_CACHE_LEXICAL_SIMILARITY,
+)
+
+
+def answer_cache_stats() -> Dict[str, float]:
+    return cache.stats()
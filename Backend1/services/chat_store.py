@@ -0,0 +1,152 @@
+# src/services/chat_store.py
+"""
+Database access for one /chat turn, in as few round trips as possible.
+
+load_context()  one statement, one pooled connection: session title, the user's
+                profile and the last N turns (LATERAL subquery over chat_messages).
+record_turn()   one statement after the reply is known: bumps the session's
+                last_activity/message_count (and title when it was auto-renamed and
+                nobody renamed it since), inserts the complete message row and upserts
+                the UI-language translations.
+
+Both go through conn.fetchrow/execute on an acquired connection, so asyncpg's
+per-connection statement cache keeps them as named prepared statements: after the
+first use on a connection only Bind/Execute go over the wire.
+"""
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from services import message_translations as mt
+from services.metrics import DB_QUERY_SECONDS
+from services.profile_cache import DEFAULT_PROFILE, cache as profile_cache
+
+_LOAD_CONTEXT = """
+    SELECT cs.title,
+           ui.user_email IS NOT NULL AS has_profile,
+           ui.mode, ui.language, ui.pincode,
+           t.queries, t.replies, t.ids, t.times
+    FROM chat_sessions cs
+    LEFT JOIN user_information ui ON ui.user_email = cs.user_email
+    CROSS JOIN LATERAL (
+        SELECT array_agg(m.q ORDER BY m.created_time, m.message_id) AS queries,
+               array_agg(m.b ORDER BY m.created_time, m.message_id) AS replies,
+               array_agg(m.message_id ORDER BY m.created_time, m.message_id) AS ids,
+               array_agg(m.created_time ORDER BY m.created_time, m.message_id) AS times
+        FROM (
+            SELECT COALESCE(user_query_en, '') AS q, COALESCE(bot_message, '') AS b,
+                   created_time, message_id
+            FROM chat_messages
+            WHERE session_id = cs.session_id
+            ORDER BY created_time DESC, message_id DESC
+            LIMIT $3
+        ) m
+    ) t
+    WHERE cs.session_id = $1 AND cs.user_email = $2
+"""
+
+RECORD_TURN_SQL = """
+    WITH s AS (
+        UPDATE chat_sessions
+        SET last_activity = $6,
+            message_count = message_count + 1,
+            -- the auto title only replaces the title the turn saw: a turn written late
+            -- (write-behind retry, spill replay) must not revert a manual rename
+            title = CASE WHEN $9::text IS NOT NULL AND title IS NOT DISTINCT FROM $14::text
+                         THEN $9 ELSE title END
+        WHERE session_id = $2 AND user_email = $1
+          -- idempotent: replaying an already-written turn (write-behind spill) is a no-op
+          AND NOT EXISTS (SELECT 1 FROM chat_messages WHERE message_id = $3)
+        RETURNING session_id, title
+    ), m AS (
+        INSERT INTO chat_messages (message_id, session_id, user_email,
+                                   user_query_raw, user_query_en, created_time,
+                                   bot_message, end_time)
+        SELECT $3, s.session_id, $1, $4, $5, $6, $7, $8 FROM s
+        RETURNING message_id
+    ), stale AS (
+        -- a renamed title invalidates its translations in the other languages
+        DELETE FROM message_translations
+        WHERE $9::text IS NOT NULL AND message_id = $2 AND field = 'session_title'
+          AND lang <> ALL($12::text[])
+          AND EXISTS (SELECT 1 FROM s WHERE s.title = $9)
+    )
+    INSERT INTO message_translations (message_id, field, lang, text)
+    SELECT k.message_id, k.field, k.lang, k.text
+    FROM unnest($10::text[], $11::text[], $12::text[], $13::text[]) AS k(message_id, field, lang, text)
+    WHERE EXISTS (SELECT 1 FROM m)
+      -- a title translation only while the session still has the title it translates
+      AND (k.field <> 'session_title'
+           OR EXISTS (SELECT 1 FROM s WHERE s.title IS NOT DISTINCT FROM COALESCE($9, $14::text)))
+    ON CONFLICT (message_id, field, lang) DO UPDATE SET text = EXCLUDED.text
+"""
+
+
+async def load_context(pool, session_id: str, user_email: str,
+                       n_turns: int = 5) -> Optional[Dict[str, Any]]:
+    """
+    {"title", "profile", "turns", "turn_keys"} for the session, or None when the session
+    does not exist for this user. turns are (user_query_en, bot_message), oldest ->
+    newest; turn_keys the matching (created_time, message_id). Also refreshes the
+    profile cache with the row it read.
+    """
+    version = profile_cache.version(user_email)
+    t0 = time.perf_counter()
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(_LOAD_CONTEXT, session_id, user_email, n_turns)
+    DB_QUERY_SECONDS.labels("load_context").observe_since(t0)
+    if row is None:
+        return None
+    if row["has_profile"]:
+        profile = {"mode": row["mode"] or "general", "language": row["language"] or "en", "pincode": row["pincode"]}
+    else:
+        profile = dict(DEFAULT_PROFILE)
+    profile_cache.put(user_email, profile, version)
+    turns = list(zip(row["queries"] or [], row["replies"] or []))
+    turn_keys = list(zip(row["times"] or [], row["ids"] or []))
+    return {"title": row["title"], "profile": profile, "turns": turns, "turn_keys": turn_keys}
+
+
+async def record_turn(pool, **turn) -> None:
+    """
+    Persist a finished turn (keyword arguments of record_turn_args). new_title is set
+    when the turn renamed the session and applies only while the title is still
+    old_title (the one the turn loaded); translations are (message_id, field, lang, text)
+    rows for message_translations.
+    """
+    t0 = time.perf_counter()
+    async with pool.acquire() as conn:
+        await conn.execute(RECORD_TURN_SQL, *record_turn_args(**turn))
+    DB_QUERY_SECONDS.labels("record_turn").observe_since(t0)
+
+
+def record_turn_args(*, user_email: str, session_id: str, message_id: str,
+                     user_query_raw: str, user_query_en: str, created_time: datetime,
+                     bot_message: Optional[str], end_time: Optional[datetime],
+                     new_title: Optional[str] = None, old_title: Optional[str] = None,
+                     translations: Sequence[Tuple[str, str, str, str]] = ()) -> tuple:
+    """Positional parameters of RECORD_TURN_SQL (also used for executemany batches)."""
+    rows = [r for r in translations if r[0] and r[3]]
+    return (
+        user_email, session_id, message_id, user_query_raw, user_query_en, created_time,
+        bot_message, end_time, new_title,
+        [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows],
+        old_title,
+    )
+
+
+def ui_translations(message_id: str, session_id: str, ui_language: str, input_lang: str,
+                    user_msg_original: str, bot_reply_en: Optional[str], bot_reply_ui: Optional[str],
+                    title: str, title_ui: Optional[str]) -> List[Tuple[str, str, str, str]]:
+    """UI text this turn already produced, as message_translations rows."""
+    if ui_language == "en":
+        return []
+    rows = []
+    if bot_reply_ui and bot_reply_ui != bot_reply_en:
+        rows.append((message_id, mt.BOT_MESSAGE, ui_language, bot_reply_ui))
+    if input_lang == ui_language:
+        # the user already wrote in the UI language: show their own words
+        rows.append((message_id, mt.USER_QUERY, ui_language, user_msg_original))
+    if title_ui and title_ui != title:
+        rows.append((session_id, mt.SESSION_TITLE, ui_language, title_ui))
+    return rows
@@ -0,0 +1,306 @@
+# src/services/downstream.py
+"""
+Client for one or more KisanSaathi (Backend2) replicas.
+
+Endpoints come from KISANSATHI_URLS (comma-separated; falls back to KISANSATHI_URL).
+
+Selection   least outstanding requests among the endpoints whose breaker lets
+            traffic through; ties go to the lower latency EWMA.
+Breaker     per endpoint: DOWNSTREAM_BREAKER_FAILURES consecutive failures (connect
+            errors, timeouts, 5xx) open it for DOWNSTREAM_BREAKER_COOLDOWN_S; then
+            a single probe request decides between closing and re-opening.
+Hedging     a call still unanswered after the recent p95 (at least
+            DOWNSTREAM_HEDGE_MIN_S) is sent once more to a different endpoint; the
+            first good answer wins and the other request is cancelled. Hedges are
+            capped at DOWNSTREAM_HEDGE_BUDGET of all calls so a slow fleet is not
+            hit with double load. A failed attempt fails over to another endpoint.
+            Callers turn hedging off for turns that change state downstream
+            (hedge=False), e.g. when Backend2 keeps the chat history.
+Timeout     DOWNSTREAM_ATTEMPT_TIMEOUT_S bounds each attempt and counts as a
+            failure of that endpoint; DOWNSTREAM_TIMEOUT_S bounds the whole call
+            (0 = unbounded).
+
+Streams (/KisanSaathi/stream) use the same selection and breakers, without hedging.
+record() posts a turn answered without the agents (answer cache) to
+/KisanSaathi/record so the chat's ADK session still has it.
+"""
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional
+
+import httpx
+
+from config import settings
+from services.metrics import DOWNSTREAM_HEDGES
+
+_LATENCY_WINDOW = 200
+
+
+class DownstreamError(Exception):
+    """No usable reply from any endpoint."""
+
+
+class _Endpoint:
+    def __init__(self, url: str, stream_url: str):
+        self.url = url
+        self.stream_url = stream_url
+        self.record_url = url.rstrip("/") + "/record"
+        self.outstanding = 0
+        self.state = "closed"          # closed | open | half_open
+        self.opened_at = 0.0
+        self.probing = False
+        self.consecutive_failures = 0
+        self.successes = self.failures = 0
+        self.ewma_s: Optional[float] = None
+        self.latencies: Deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def available(self, now: float, cooldown_s: float) -> bool:
+        if self.state == "open" and now - self.opened_at >= cooldown_s:
+            self.state = "half_open"
+        if self.state == "half_open":
+            return not self.probing
+        return self.state == "closed"
+
+    def record_success(self, elapsed_s: float) -> None:
+        self.successes += 1
+        self.consecutive_failures = 0
+        self.state, self.probing = "closed", False
+        self.latencies.append(elapsed_s)
+        self.ewma_s = elapsed_s if self.ewma_s is None else 0.8 * self.ewma_s + 0.2 * elapsed_s
+
+    def record_failure(self, threshold: int) -> None:
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.state == "half_open" or self.consecutive_failures >= threshold:
+            self.state, self.opened_at = "open", time.monotonic()
+        self.probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        s = sorted(self.latencies)
+        return {
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "ewma_ms": round(self.ewma_s * 1000.0, 1) if self.ewma_s is not None else None,
+            "p50_ms": round(s[len(s) // 2] * 1000.0, 1) if s else None,
+            "p95_ms": round(s[min(len(s) - 1, int(0.95 * len(s)))] * 1000.0, 1) if s else None,
+        }
+
+
+class DownstreamClient:
+    def __init__(self, urls: List[str], stream_url: str = "", timeout_s: float = 0.0,
+                 attempt_timeout_s: float = 0.0, hedge: bool = True, hedge_min_s: float = 2.0, hedge_default_s: float = 8.0,
+                 hedge_budget: float = 0.1, breaker_failures: int = 5, breaker_cooldown_s: float = 15.0):
+        self.endpoints = [
+            _Endpoint(u, stream_url if (stream_url and len(urls) == 1) else u.rstrip("/") + "/stream")
+            for u in urls
+        ]
+        self.timeout_s = timeout_s
+        self.attempt_timeout_s = attempt_timeout_s
+        self.hedge = hedge
+        self.hedge_min_s = hedge_min_s
+        self.hedge_default_s = hedge_default_s
+        self.hedge_budget = hedge_budget
+        self.breaker_failures = max(1, breaker_failures)
+        self.breaker_cooldown_s = breaker_cooldown_s
+        self._recent: Deque[float] = deque(maxlen=_LATENCY_WINDOW)  # all endpoints, successful calls
+        self.calls = self.hedges = self.hedge_wins = self.attempt_timeouts = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.endpoints)
+
+    # ---------- selection ----------
+    def _pick(self, exclude=()) -> Optional[_Endpoint]:
+        now = time.monotonic()
+        candidates = [ep for ep in self.endpoints
+                      if ep not in exclude and ep.available(now, self.breaker_cooldown_s)]
+        if not candidates:
+            return None
+        best = min(candidates, key=lambda ep: (ep.outstanding, ep.ewma_s or 0.0, random.random()))
+        if best.state == "half_open":
+            best.probing = True
+        return best
+
+    def hedge_delay_s(self) -> float:
+        if len(self._recent) < 20:
+            return max(self.hedge_min_s, self.hedge_default_s)
+        s = sorted(self._recent)
+        return max(self.hedge_min_s, s[int(0.95 * (len(s) - 1))])
+
+    def _may_hedge(self) -> bool:
+        return self.hedge and len(self.endpoints) > 1 and self.hedges < self.hedge_budget * self.calls + 1
+
+    # ---------- one-shot call ----------
+    async def call(self, client: httpx.AsyncClient, payload: Dict[str, Any], hedge: bool = True) -> Dict[str, Any]:
+        """
+        JSON reply of POST /KisanSaathi; raises DownstreamError when every attempt failed.
+        hedge=False for a turn that must not run twice (a failed attempt still fails over).
+        """
+        if not self.endpoints:
+            raise DownstreamError("no KisanSaathi endpoints configured")
+        self.calls += 1
+        if self.timeout_s > 0:
+            try:
+                async with asyncio.timeout(self.timeout_s):
+                    return await self._call(client, payload, hedge)
+            except TimeoutError:
+                raise DownstreamError(f"no reply within {self.timeout_s:g}s")
+        return await self._call(client, payload, hedge)
+
+    async def _call(self, client: httpx.AsyncClient, payload: Dict[str, Any], hedge: bool) -> Dict[str, Any]:
+        first = self._pick()
+        if first is None:
+            raise DownstreamError("all KisanSaathi endpoints are unavailable (circuit open)")
+        tasks: Dict[asyncio.Task, _Endpoint] = {
+            asyncio.create_task(self._attempt(client, first, payload)): first
+        }
+        tried = {first}
+        hedge = hedge and self._may_hedge()
+        hedge_at: Optional[float] = time.monotonic() + self.hedge_delay_s() if hedge else None
+        hedge_task: Optional[asyncio.Task] = None
+        last_err: Optional[BaseException] = None
+        try:
+            while tasks:
+                wait = None if hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(tasks, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    # slow: hedge to another endpoint, at most once
+                    hedge_at = None
+                    ep = self._pick(exclude=tried) if self._may_hedge() else None
+                    if ep is not None:
+                        tried.add(ep)
+                        self.hedges += 1
+                        DOWNSTREAM_HEDGES.labels("sent").inc()
+                        hedge_task = asyncio.create_task(self._attempt(client, ep, payload))
+                        tasks[hedge_task] = ep
+                    continue
+                for t in done:
+                    tasks.pop(t)
+                    if t.exception() is None:
+                        if t is hedge_task:
+                            self.hedge_wins += 1
+                            DOWNSTREAM_HEDGES.labels("won").inc()
+                        return t.result()
+                    last_err = t.exception()
+                if not tasks:
+                    # every attempt so far failed: fail over once to an untried endpoint
+                    ep = self._pick(exclude=tried)
+                    if ep is not None and len(tried) < 3:
+                        tried.add(ep)
+                        tasks[asyncio.create_task(self._attempt(client, ep, payload))] = ep
+            raise DownstreamError(str(last_err) or type(last_err).__name__) from last_err
+        finally:
+            for t in tasks:
+                t.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _attempt(self, client: httpx.AsyncClient, ep: _Endpoint, payload: Dict[str, Any]) -> Dict[str, Any]:
+        ep.outstanding += 1
+        t0 = time.monotonic()
+        try:
+            # the attempt's own deadline surfaces as TimeoutError (a failure of this
+            # endpoint); a cancellation from outside still arrives as CancelledError
+            try:
+                async with asyncio.timeout(self.attempt_timeout_s or None):
+                    r = await client.post(ep.url, json=payload)
+            except TimeoutError:
+                self.attempt_timeouts += 1
+                raise DownstreamError(f"no reply from {ep.url} within {self.attempt_timeout_s:g}s")
+            if r.status_code >= 500:
+                raise httpx.HTTPStatusError(f"{r.status_code} from {ep.url}", request=r.request, response=r)
+            r.raise_for_status()
+            data = r.json() if r.content else {}
+        except asyncio.CancelledError:
+            ep.probing = False  # the other request won; says nothing about this endpoint
+            raise
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code >= 500:
+                ep.record_failure(self.breaker_failures)
+            else:
+                ep.probing = False
+            raise
+        except Exception:
+            ep.record_failure(self.breaker_failures)
+            raise
+        finally:
+            ep.outstanding -= 1
+        elapsed = time.monotonic() - t0
+        ep.record_success(elapsed)
+        self._recent.append(elapsed)
+        return data
+
+    # ---------- served elsewhere ----------
+    async def record(self, client: httpx.AsyncClient, payload: Dict[str, Any], timeout_s: float = 10.0) -> None:
+        """Store a turn (payload + bot_reply) in the chat's Backend2 session without running the agents."""
+        ep = self._pick()
+        if ep is None:
+            raise DownstreamError("all KisanSaathi endpoints are unavailable (circuit open)")
+        try:
+            r = await client.post(ep.record_url, json=payload, timeout=timeout_s)
+            r.raise_for_status()
+        finally:
+            ep.probing = False  # not a probe of the agent path
+
+    # ---------- streaming ----------
+    async def stream_lines(self, client: httpx.AsyncClient, payload: Dict[str, Any]) -> AsyncIterator[str]:
+        """Lines of POST /KisanSaathi/stream from the least-loaded available endpoint."""
+        ep = self._pick()
+        if ep is None:
+            raise DownstreamError("all KisanSaathi endpoints are unavailable (circuit open)")
+        self.calls += 1
+        ep.outstanding += 1
+        t0 = time.monotonic()
+        try:
+            async with client.stream("POST", ep.stream_url, json=payload) as r:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    yield line
+        except (asyncio.CancelledError, GeneratorExit):
+            ep.probing = False
+            raise
+        except Exception:
+            ep.record_failure(self.breaker_failures)
+            raise
+        finally:
+            ep.outstanding -= 1
+        ep.record_success(time.monotonic() - t0)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "attempt_timeouts": self.attempt_timeouts,
+            "hedge_delay_ms": round(self.hedge_delay_s() * 1000.0, 1),
+            "endpoints": [ep.stats() for ep in self.endpoints],
+        }
+
+
+def _urls() -> List[str]:
+    urls = [u.strip() for u in settings.KISANSATHI_URLS.split(",") if u.strip()]
+    return urls or ([settings.KISANSATHI_URL] if settings.KISANSATHI_URL else [])
+
+
+downstream = DownstreamClient(
+    _urls(),
+    stream_url=settings.KISANSATHI_STREAM_URL,
+    timeout_s=settings.DOWNSTREAM_TIMEOUT_S,
+    attempt_timeout_s=settings.DOWNSTREAM_ATTEMPT_TIMEOUT_S,
+    hedge=settings.DOWNSTREAM_HEDGE_ENABLED,
+    hedge_min_s=settings.DOWNSTREAM_HEDGE_MIN_S,
+    hedge_default_s=settings.DOWNSTREAM_HEDGE_DEFAULT_S,
+    hedge_budget=settings.DOWNSTREAM_HEDGE_BUDGET,
+    breaker_failures=settings.DOWNSTREAM_BREAKER_FAILURES,
+    breaker_cooldown_s=settings.DOWNSTREAM_BREAKER_COOLDOWN_S,
+)
+
+
+def downstream_stats() -> Dict[str, Any]:
+    return downstream.stats()
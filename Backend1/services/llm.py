@@ -5,7 +5,7 @@ from config import settings
 def get_model():
     if not settings.GOOGLE_API_KEY:
         raise RuntimeError("GOOGLE_API_KEY not set")
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    genai.configure(api_key=settings.GOOGLE_API_KEY, **settings.GENAI_CONFIGURE_KWARGS)
     return genai.GenerativeModel(
         model_name="gemini-1.5-flash",
         generation_config={
@@ -0,0 +1,94 @@
+# src/services/message_translations.py
+"""
+Persistent per-message translations: (message_id, field, lang) -> text.
+
+/chat stores the UI text it already produced (bot reply, the user's own wording,
+the session title); /history reads it back and only sends the missing rows to the
+translator, storing what comes back. Session titles are keyed by session_id with
+field "session_title".
+"""
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from db import fetch, execute
+from routers.translator import atranslate_many
+from services.metrics import CACHE_EVENTS
+
+log = logging.getLogger("message_translations")
+
+USER_QUERY = "user_query"
+BOT_MESSAGE = "bot_message"
+SESSION_TITLE = "session_title"
+
+Key = Tuple[str, str]  # (message_id, field)
+
+
+async def get_many(db, keys: Sequence[Key], lang: str) -> Dict[Key, str]:
+    if not keys:
+        return {}
+    rows = await fetch(db, """
+        SELECT t.message_id, t.field, t.text
+        FROM message_translations t
+        JOIN unnest($2::text[], $3::text[]) AS k(message_id, field)
+          ON t.message_id = k.message_id AND t.field = k.field
+        WHERE t.lang = $1
+    """, lang, [k[0] for k in keys], [k[1] for k in keys])
+    return {(r["message_id"], r["field"]): r["text"] for r in rows}
+
+
+async def put_many(db, rows: Iterable[Tuple[str, str, str, str]]) -> None:
+    """rows: (message_id, field, lang, text); existing entries are overwritten."""
+    rows = [r for r in rows if r[0] and r[3]]
+    if not rows:
+        return
+    try:
+        await execute(db, """
+            INSERT INTO message_translations (message_id, field, lang, text)
+            SELECT * FROM unnest($1::text[], $2::text[], $3::text[], $4::text[])
+            ON CONFLICT (message_id, field, lang) DO UPDATE SET text = EXCLUDED.text
+        """, [r[0] for r in rows], [r[1] for r in rows], [r[2] for r in rows], [r[3] for r in rows])
+    except Exception as e:
+        # a missed write only costs a translator call on the next /history load
+        log.warning("storing message translations failed: %s", e)
+
+
+async def invalidate(db, message_ids: Sequence[str], field: Optional[str] = None) -> None:
+    """Drop stored translations (all languages) when the source text changes."""
+    if not message_ids:
+        return
+    if field:
+        await execute(db, "DELETE FROM message_translations WHERE message_id = ANY($1::text[]) AND field=$2",
+                      list(message_ids), field)
+    else:
+        await execute(db, "DELETE FROM message_translations WHERE message_id = ANY($1::text[])",
+                      list(message_ids))
+
+
+async def translate_fields(db, items: Sequence[Tuple[str, str, str]], lang: str,
+                           source: Optional[str] = "en") -> List[str]:
+    """
+    items: (message_id, field, english_text). Returns the `lang` text for each item,
+    reading stored translations first and translating (then storing) only the misses.
+    """
+    if not items:
+        return []
+    try:
+        stored = await get_many(db, [(mid, field) for mid, field, _ in items], lang)
+    except Exception as e:
+        log.warning("reading message translations failed: %s", e)
+        stored = {}
+
+    out: List[Optional[str]] = [stored.get((mid, field)) for mid, field, _ in items]
+    miss = [i for i, v in enumerate(out) if v is None and (items[i][2] or "").strip()]
+    CACHE_EVENTS.labels("message_translations", "hit").inc(len(stored))
+    CACHE_EVENTS.labels("message_translations", "miss").inc(len(miss))
+    if miss:
+        translated = await atranslate_many([items[i][2] for i in miss], lang, source)
+        new_rows = []
+        for i, t in zip(miss, translated):
+            out[i] = t
+            # an unchanged text is usually a translator fallback: don't persist it
+            if t and t != items[i][2]:
+                new_rows.append((items[i][0], items[i][1], lang, t))
+        await put_many(db, new_rows)
+    return [v if v is not None else items[i][2] for i, v in enumerate(out)]
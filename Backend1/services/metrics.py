@@ -0,0 +1,199 @@
+# src/services/metrics.py
+"""
+Minimal Prometheus instrumentation (text exposition format 0.0.4), no dependency.
+
+Recording is allocation-light so it can stay on in production: a labelled child is
+created once per label combination and cached; observe() is a bisect plus two
+additions, inc() a single addition. No locks are taken: almost everything records
+from the event loop thread, and the rare update from a worker thread (the relevance
+check) can at worst lose one sample, which is fine for monitoring.
+
+    DB_QUERY_SECONDS.labels("load_context").observe(elapsed)
+    t0 = time.perf_counter(); ...; TRANSLATOR_SECONDS.labels("translate", "hi").observe_since(t0)
+    FALLBACKS.labels("downstream_error").inc()
+
+Gauges that already exist as counters elsewhere (translation memory, profile cache,
+write-behind queue) are read at scrape time through register_collector(), so they
+cost nothing on the request path.
+"""
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# seconds; covers sub-ms cache/DB hits up to slow LLM calls
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels_text(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _HistogramChild:
+    __slots__ = ("_buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def observe_since(self, t0: float) -> None:
+        self.observe(time.perf_counter() - t0)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        _registry.append(self)
+
+    @abstractmethod
+    def _new_child(self):
+        """A fresh child for one label combination."""
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {values}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name} {self.help}")
+        out.append(f"# TYPE {self.name} {self.kind}")
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, help_text, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def render(self, out: List[str]) -> None:
+        super().render(out)
+        for values, child in list(self._children.items()):
+            labels = _labels_text(self.labelnames, values)
+            cumulative = 0
+            for bound, n in zip(self.buckets, child.counts):
+                cumulative += n
+                le = 'le="%s"' % bound
+                out.append(f"{self.name}_bucket{_labels_text(self.labelnames, values, le)} {cumulative}")
+            le = 'le="+Inf"'
+            out.append(f"{self.name}_bucket{_labels_text(self.labelnames, values, le)} {child.count}")
+            out.append(f"{self.name}_sum{labels} {child.sum}")
+            out.append(f"{self.name}_count{labels} {child.count}")
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def render(self, out: List[str]) -> None:
+        out.append(f"# HELP {self.name}_total {self.help}")
+        out.append(f"# TYPE {self.name}_total counter")
+        for values, child in list(self._children.items()):
+            out.append(f"{self.name}_total{_labels_text(self.labelnames, values)} {child.value}")
+
+
+_registry: List[_Metric] = []
+# name -> (help, type, fn returning {label-tuple: value}, labelnames)
+_collectors: List[Tuple[str, str, str, Tuple[str, ...], Callable[[], Dict[Tuple[str, ...], float]]]] = []
+
+
+def register_collector(name: str, help_text: str, kind: str, labelnames: Iterable[str],
+                       fn: Callable[[], Dict[Tuple[str, ...], float]]) -> None:
+    """Expose values computed at scrape time (kind: "gauge" or "counter")."""
+    _collectors.append((name, help_text, kind, tuple(labelnames), fn))
+
+
+def render_latest() -> str:
+    out: List[str] = []
+    for metric in _registry:
+        metric.render(out)
+    for name, help_text, kind, labelnames, fn in _collectors:
+        try:
+            values = fn()
+        except Exception:
+            continue
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+        for label_values, v in values.items():
+            out.append(f"{name}{_labels_text(labelnames, label_values)} {float(v)}")
+    return "\n".join(out) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ---------- Backend1 metrics ----------
+REQUEST_SECONDS = Histogram(
+    "agri_request_seconds", "End-to-end handler latency.", ("endpoint",))
+CHAT_STAGE_SECONDS = Histogram(
+    "agri_chat_stage_seconds", "Wall-clock time of each /chat stage.", ("stage",))
+DB_QUERY_SECONDS = Histogram(
+    "agri_db_query_seconds", "Database statement latency by query name.", ("query",))
+TRANSLATOR_SECONDS = Histogram(
+    "agri_translator_request_seconds", "Google Translate HTTP calls (one batch each).", ("op", "lang"))
+TRANSLATOR_ERRORS = Counter(
+    "agri_translator_errors", "Failed Google Translate HTTP attempts.", ("op",))
+RELEVANCE_SECONDS = Histogram(
+    "agri_relevance_seconds", "History relevance check latency by deciding backend.", ("decision",))
+DOWNSTREAM_SECONDS = Histogram(
+    "agri_downstream_seconds", "KisanSaathi call latency.", ("mode", "outcome"),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0))
+DOWNSTREAM_PROMPT_TOKENS = Histogram(
+    "agri_downstream_prompt_tokens", "Prompt tokens of the KisanSaathi agent run (as reported by Backend2).",
+    ("context",), buckets=(250, 500, 1000, 1500, 2000, 3000, 4000, 6000, 8000, 12000, 16000, 32000))
+DOWNSTREAM_AGENT_SECONDS = Histogram(
+    "agri_downstream_agent_seconds", "Agent run time inside Backend2; the rest of the call is transport and queueing.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 7.5, 10.0, 15.0, 20.0, 30.0, 60.0))
+FALLBACKS = Counter(
+    "agri_fallbacks", "Replies degraded to a fallback (e.g. \"Sorry, I couldn't fetch\").", ("reason",))
+DOWNSTREAM_HEDGES = Counter(
+    "agri_downstream_hedges", "Hedged KisanSaathi requests sent, and how many answered first.", ("result",))
+ADMISSION_WAIT_SECONDS = Histogram(
+    "agri_admission_wait_seconds", "Time a KisanSaathi call waited for an admission slot.", ("outcome",),
+    buckets=(0.0, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 15.0, 30.0))
+ADMISSION_REJECTED = Counter(
+    "agri_admission_rejected", "KisanSaathi calls refused by admission control.", ("reason",))
+WRITE_BEHIND_DROPPED = Counter(
+    "agri_write_behind_dropped", "Queued writes dead-lettered after WRITE_BEHIND_MAX_ATTEMPTS failed row writes.", ("kind",))
+CACHE_EVENTS = Counter(
+    "agri_cache_events", "Cache hits and misses on the request path.", ("cache", "result"))
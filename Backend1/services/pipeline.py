@@ -0,0 +1,122 @@
+# src/services/pipeline.py
+"""
+Tiny dependency-graph runner for request handlers.
+
+A handler declares its work as named stages, each with the stages it depends on.
+`StageGraph.run()` starts every stage as soon as its dependencies are done, so
+independent stages (DB reads, language detection, history fetch) overlap on the
+event loop instead of running one after another. Per-stage wall-clock timings
+are recorded on every run.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+StageFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class Stage:
+    name: str
+    fn: StageFn
+    deps: Tuple[str, ...] = ()
+
+
+@dataclass
+class StageRun:
+    """Result of one graph run: stage outputs (plus inputs) and timings in ms."""
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+
+    def __getitem__(self, name: str) -> Any:
+        return self.results[name]
+
+    def timing_summary(self) -> str:
+        parts = [f"{k}={v:.1f}" for k, v in sorted(self.timings_ms.items(), key=lambda kv: -kv[1])]
+        return " ".join(parts)
+
+
+class StageGraph:
+    """
+    Declared DAG of async stages.
+
+    Each stage receives the shared context dict: the run inputs plus the outputs
+    of every stage that has completed so far (keyed by stage name). A stage must
+    only read the outputs of stages it lists in `deps`.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._stages: Dict[str, Stage] = {}
+
+    def stage(self, name: str, deps: Iterable[str] = ()) -> Callable[[StageFn], StageFn]:
+        """Decorator form of `add()`."""
+        def _wrap(fn: StageFn) -> StageFn:
+            self.add(name, fn, deps)
+            return fn
+        return _wrap
+
+    def add(self, name: str, fn: StageFn, deps: Iterable[str] = ()) -> None:
+        if name in self._stages:
+            raise ValueError(f"stage {name!r} already declared in graph {self.name!r}")
+        deps = tuple(deps)
+        for d in deps:
+            if d not in self._stages:
+                # stages must be declared in dependency order -> graph stays acyclic
+                raise ValueError(f"stage {name!r} depends on undeclared stage {d!r}")
+        self._stages[name] = Stage(name, fn, deps)
+
+    def _closure(self, targets: Optional[Iterable[str]]) -> List[str]:
+        """Stages needed to produce `targets` (all stages when None), in declaration order."""
+        if targets is None:
+            return list(self._stages)
+        needed, todo = set(), list(targets)
+        while todo:
+            n = todo.pop()
+            if n in needed:
+                continue
+            if n not in self._stages:
+                raise KeyError(f"unknown stage {n!r}")
+            needed.add(n)
+            todo.extend(self._stages[n].deps)
+        return [n for n in self._stages if n in needed]
+
+    async def run(self, inputs: Optional[Dict[str, Any]] = None,
+                  targets: Optional[Iterable[str]] = None) -> StageRun:
+        """
+        Run the graph (or just what `targets` needs). The first stage error cancels
+        every stage still pending and is re-raised unchanged, so handlers keep their
+        HTTPException semantics.
+        """
+        run = StageRun(results=dict(inputs or {}))
+        ctx = run.results
+        tasks: Dict[str, asyncio.Task] = {}
+        t_start = time.perf_counter()
+
+        async def _run_stage(st: Stage) -> Any:
+            if st.deps:
+                await asyncio.gather(*(tasks[d] for d in st.deps))
+            t0 = time.perf_counter()
+            try:
+                out = await st.fn(ctx)
+            finally:
+                run.timings_ms[st.name] = (time.perf_counter() - t0) * 1000.0
+            ctx[st.name] = out
+            return out
+
+        for name in self._closure(targets):
+            tasks[name] = asyncio.create_task(_run_stage(self._stages[name]), name=f"{self.name}:{name}")
+
+        try:
+            await asyncio.gather(*tasks.values())
+        except BaseException:
+            for t in tasks.values():
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+            raise
+        finally:
+            run.total_ms = (time.perf_counter() - t_start) * 1000.0
+        return run
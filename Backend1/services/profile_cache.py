@@ -0,0 +1,188 @@
+# src/services/profile_cache.py
+"""
+Per-user profile cache (mode / language / pincode from user_information).
+
+The row only changes through /user-info/update, so /chat and /history read it from a
+bounded in-process LRU with a TTL instead of hitting Postgres every request.
+
+Invalidation:
+  - the worker that handles the update calls invalidate() directly
+  - notify_changed() sends pg_notify on PROFILE_CACHE_CHANNEL; every worker runs a
+    LISTEN connection (start_listener()/stop_listener() from the app lifespan) and drops
+    the key when the notification arrives
+  - if the LISTEN connection is lost, the whole cache is cleared (notifications may
+    have been missed) and the listener reconnects; the TTL bounds staleness either way
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import asyncpg
+
+from config import settings
+from db import fetchrow
+
+log = logging.getLogger("profile_cache")
+
+DEFAULT_PROFILE: Dict[str, Any] = {"mode": "general", "language": "en", "pincode": None}
+
+
+class ProfileCache:
+    def __init__(self, maxsize: int, ttl_s: float):
+        self.maxsize = maxsize
+        self.ttl_s = ttl_s
+        self._data: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # bumped on every invalidation so a load that raced an update is not cached
+        self._versions: Dict[str, int] = {}
+        self.hits = self.misses = self.invalidations = 0
+
+    def get(self, user_email: str) -> Optional[Dict[str, Any]]:
+        item = self._data.get(user_email)
+        if item is None:
+            self.misses += 1
+            return None
+        expires_at, profile = item
+        if expires_at < time.monotonic():
+            del self._data[user_email]
+            self.misses += 1
+            return None
+        self._data.move_to_end(user_email)
+        self.hits += 1
+        return dict(profile)
+
+    def version(self, user_email: str) -> int:
+        return self._versions.get(user_email, 0)
+
+    def put(self, user_email: str, profile: Dict[str, Any], version: int) -> None:
+        if version != self.version(user_email):
+            return
+        self._data[user_email] = (time.monotonic() + self.ttl_s, dict(profile))
+        self._data.move_to_end(user_email)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, user_email: str) -> None:
+        self._data.pop(user_email, None)
+        self._versions[user_email] = self.version(user_email) + 1
+        self.invalidations += 1
+        if len(self._versions) > 4 * self.maxsize:
+            self._versions.clear()  # stale versions only matter for in-flight loads
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "invalidations": self.invalidations,
+            "listening": _listen_conn is not None and not _listen_conn.is_closed(),
+        }
+
+
+cache = ProfileCache(settings.PROFILE_CACHE_SIZE, settings.PROFILE_CACHE_TTL_S)
+
+
+async def get_profile(conn, user_email: str) -> Dict[str, Any]:
+    """{mode, language, pincode} for the user, with defaults when there is no row."""
+    profile = cache.get(user_email)
+    if profile is not None:
+        return profile
+    version = cache.version(user_email)
+    row = await fetchrow(conn, "SELECT mode, language, pincode FROM user_information WHERE user_email=$1", user_email)
+    if not row:
+        profile = dict(DEFAULT_PROFILE)
+    else:
+        profile = {"mode": row["mode"] or "general", "language": row["language"] or "en", "pincode": row["pincode"]}
+    cache.put(user_email, profile, version)
+    return dict(profile)
+
+
+def invalidate(user_email: str) -> None:
+    cache.invalidate(user_email)
+
+
+async def notify_changed(conn, user_email: str) -> None:
+    """Tell the other workers to drop their copy (pg_notify is delivered on commit)."""
+    try:
+        await conn.execute("SELECT pg_notify($1, $2)", settings.PROFILE_CACHE_CHANNEL, user_email)
+    except Exception as e:
+        log.warning("profile invalidation notify failed: %s", e)
+
+
+def profile_cache_stats() -> Dict[str, Any]:
+    return cache.stats()
+
+
+# -------- LISTEN side --------
+_listen_conn: Optional[asyncpg.Connection] = None
+_reconnect_task: Optional[asyncio.Task] = None
+_stopping = False
+
+
+def _on_notify(_conn, _pid, _channel, payload: str) -> None:
+    if payload:
+        cache.invalidate(payload)
+
+
+def _on_terminate(_conn) -> None:
+    global _reconnect_task
+    if _stopping:
+        return
+    log.warning("profile cache LISTEN connection lost; clearing cache and reconnecting")
+    cache.clear()
+    _reconnect_task = asyncio.get_running_loop().create_task(_reconnect())
+
+
+async def _connect() -> None:
+    global _listen_conn
+    conn = await asyncpg.connect(dsn=settings.DATABASE_URL)
+    await conn.add_listener(settings.PROFILE_CACHE_CHANNEL, _on_notify)
+    conn.add_termination_listener(_on_terminate)
+    _listen_conn = conn
+
+
+async def _reconnect() -> None:
+    delay = 1.0
+    while not _stopping:
+        try:
+            await _connect()
+            cache.clear()  # anything cached while we were deaf may be stale
+            return
+        except Exception as e:
+            log.warning("profile cache LISTEN reconnect failed: %s", e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+
+async def start_listener() -> None:
+    global _stopping
+    _stopping = False
+    if not settings.DATABASE_URL or settings.PROFILE_CACHE_TTL_S <= 0:
+        return
+    try:
+        await _connect()
+    except Exception as e:
+        # not fatal: the TTL still bounds staleness for updates made by other workers
+        log.warning("profile cache LISTEN unavailable: %s", e)
+
+
+async def stop_listener() -> None:
+    global _listen_conn, _stopping
+    _stopping = True
+    if _reconnect_task and not _reconnect_task.done():
+        _reconnect_task.cancel()
+    if _listen_conn is not None:
+        try:
+            await _listen_conn.close()
+        except Exception:
+            pass
+        _listen_conn = None
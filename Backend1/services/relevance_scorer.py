@@ -0,0 +1,219 @@
+# src/services/relevance_scorer.py
+"""
+Local relevance scorer: is the recent chat history useful for the current query?
+
+Features (all computed on the English text /chat already has):
+  - lexical overlap between the query and each turn (stop-words removed, light stemming)
+  - entity matches: crops, pesticides/fertilizers, places and numbers (pincodes, doses)
+  - recency: the newest turn counts most, older turns decay geometrically
+  - follow-up cues: pronouns / elliptical openers ("what about ...", "and for ...", "same for")
+  - optional embedding similarity (sentence-transformers), when RELEVANCE_EMBED_MODEL is set
+
+score() returns a probability-like value in 0..1. classify() turns it into True/False for
+clear cases and None for the borderline band, which callers escalate to the LLM.
+"""
+import math
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Tuple
+
+from config import settings
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+_STOP = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "been", "am", "do", "does", "did",
+    "i", "me", "my", "we", "our", "you", "your", "he", "she", "they", "them", "their",
+    "to", "of", "in", "on", "for", "with", "at", "by", "from", "about", "into", "as",
+    "and", "or", "but", "if", "so", "than", "then", "there", "here", "what", "which",
+    "who", "whom", "how", "when", "where", "why", "can", "could", "should", "would",
+    "will", "shall", "may", "might", "must", "have", "has", "had", "please", "tell",
+    "give", "know", "want", "need", "get", "some", "any", "all", "more", "much", "many",
+    "very", "also", "just", "now", "today", "ok", "okay", "thanks", "thank", "hi", "hello",
+}
+
+# Domain entities: a shared one between query and history is strong evidence
+_CROPS = {
+    "wheat", "rice", "paddy", "maize", "corn", "cotton", "sugarcane", "soybean", "soyabean",
+    "mustard", "groundnut", "peanut", "onion", "potato", "tomato", "chilli", "chili", "brinjal",
+    "okra", "cabbage", "cauliflower", "banana", "mango", "grape", "pomegranate", "orange",
+    "gram", "chickpea", "tur", "arhar", "moong", "urad", "lentil", "jowar", "bajra", "millet",
+    "ragi", "barley", "jute", "tea", "coffee", "coconut", "arecanut", "turmeric", "ginger",
+    "garlic", "cumin", "sunflower", "sesame", "castor", "cucumber", "watermelon", "papaya",
+}
+_INPUTS = {
+    "urea", "dap", "npk", "potash", "mop", "ssp", "zinc", "sulphur", "gypsum", "compost",
+    "vermicompost", "manure", "fertilizer", "fertiliser", "pesticide", "insecticide",
+    "fungicide", "herbicide", "weedicide", "imidacloprid", "chlorpyrifos", "mancozeb",
+    "carbendazim", "glyphosate", "cypermethrin", "neem", "trichoderma", "emamectin",
+    "thiamethoxam", "acephate", "profenofos", "spinosad", "copper", "bordeaux",
+}
+_TOPICS = {
+    "weather", "rain", "rainfall", "forecast", "temperature", "humidity", "wind", "irrigation",
+    "sowing", "harvest", "yield", "price", "mandi", "market", "scheme", "subsidy", "loan",
+    "insurance", "kcc", "pmkisan", "disease", "pest", "blight", "rust", "wilt", "aphid",
+    "bollworm", "whitefly", "borer", "locust", "soil", "seed", "variety",
+}
+
+# Queries that lean on earlier turns ("what about...", "is it safe", "same for ...")
+_FOLLOW_UP_OPENERS = re.compile(
+    r"^\s*(and|also|what about|how about|same|then|so|but|ok(ay)?|if so|in that case|"
+    r"what if|why|how much of|how often|when should i)\b",
+    re.IGNORECASE,
+)
+_BACK_REFERENCE = re.compile(r"\byou (said|mentioned|told|suggested|recommended)\b|\bdid you say\b", re.IGNORECASE)
+_ANAPHORA = {"it", "its", "this", "that", "these", "those", "them", "they", "same", "above",
+             "previous", "earlier", "there", "one", "ones"}
+
+_RECENCY_DECAY = 0.6
+
+
+def _stem(w: str) -> str:
+    for suf in ("ing", "ies", "es", "ed", "s"):
+        if len(w) > len(suf) + 2 and w.endswith(suf):
+            return w[: -len(suf)] + ("y" if suf == "ies" else "")
+    return w
+
+
+def _tokens(text: str) -> List[str]:
+    return _WORD.findall((text or "").lower())
+
+
+def _content(tokens: List[str]) -> Set[str]:
+    return {_stem(w) for w in tokens if w not in _STOP and len(w) > 1}
+
+
+def _entities(tokens: List[str], places: Set[str]) -> Set[str]:
+    ents = {w for w in tokens if w in _CROPS or w in _INPUTS or w in places}
+    ents.update(w for w in tokens if w.isdigit() and len(w) >= 3)  # pincodes, doses, years
+    return ents
+
+
+def _places(text: str) -> Set[str]:
+    # Capitalised words that are not sentence-initial: good enough for district/state names
+    out = set()
+    for sent in re.split(r"[.?!\n]+", text or ""):
+        words = sent.split()
+        for w in words[1:]:
+            w = w.strip(",;:()\"'")
+            if len(w) > 2 and w[0].isupper() and w[1:].islower():
+                out.add(w.lower())
+    return out - _STOP
+
+
+@lru_cache(maxsize=1)
+def _embedder():
+    """sentence-transformers model, or None when disabled / not installed."""
+    name = settings.RELEVANCE_EMBED_MODEL
+    if not name:
+        return None
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        return None
+    return SentenceTransformer(name)
+
+
+def _embed_similarity(query: str, turn_texts: List[str]) -> Optional[List[float]]:
+    model = _embedder()
+    if model is None:
+        return None
+    vecs = model.encode([query] + turn_texts, normalize_embeddings=True)
+    q = vecs[0]
+    return [float(sum(a * b for a, b in zip(q, v))) for v in vecs[1:]]
+
+
+def features(query: str, turns: List[Tuple[str, str]]) -> Dict[str, float]:
+    """Raw features; exposed for the eval script."""
+    q_tokens = _tokens(query)
+    q_content = _content(q_tokens)
+    places = _places(query) | {p for u, b in turns for p in _places(f"{u}\n{b}")}
+    q_ents = _entities(q_tokens, places)
+    q_topics = {w for w in q_tokens if w in _TOPICS}
+
+    n = len(turns)
+    weights = [_RECENCY_DECAY ** (n - 1 - i) for i in range(n)]
+    wsum = sum(weights) or 1.0
+    turn_texts = [f"{u or ''}\n{b or ''}" for u, b in turns]
+    sims = _embed_similarity(query, turn_texts) if turns else None
+
+    overlap = entity = topic = embed = 0.0
+    for i, text in enumerate(turn_texts):
+        t_tokens = _tokens(text)
+        t_content = _content(t_tokens)
+        w = weights[i] / wsum
+        if q_content:
+            overlap += w * len(q_content & t_content) / len(q_content)
+        if q_ents and (q_ents & _entities(t_tokens, places)):
+            entity = max(entity, weights[i])
+        if q_topics and (q_topics & set(t_tokens)):
+            topic = max(topic, weights[i])
+        if sims is not None:
+            embed += w * max(0.0, sims[i])
+
+    anaphora = 1.0 if (
+        _FOLLOW_UP_OPENERS.search(query or "")
+        or _BACK_REFERENCE.search(query or "")
+        or any(w in _ANAPHORA for w in q_tokens)
+    ) else 0.0
+    # A query that names its own crop/input, shares none with history and does not point
+    # back at it ("same for tomato?") is self-contained
+    own_entities = 1.0 if (q_ents and entity == 0.0 and not anaphora) else 0.0
+    return {
+        "overlap": overlap,
+        "entity": entity,
+        "topic": topic,
+        "anaphora": anaphora,
+        "short": 1.0 if len(q_content) <= 2 else 0.0,
+        "own_entities": own_entities,
+        "embed": embed if sims is not None else -1.0,
+    }
+
+
+def score(query: str, turns: List[Tuple[str, str]]) -> float:
+    """Probability-like relevance of `turns` for `query`, in 0..1."""
+    if not turns or not (query or "").strip():
+        return 0.0
+    f = features(query, turns)
+    z = (
+        -1.6
+        + 3.0 * f["overlap"]
+        + 1.8 * f["entity"]
+        + 0.6 * f["topic"]
+        + 1.4 * f["anaphora"]
+        + 0.6 * f["short"] * f["anaphora"]
+        - 1.2 * f["own_entities"]
+    )
+    if f["embed"] >= 0.0:
+        z += 3.0 * (f["embed"] - 0.35)
+    return 1.0 / (1.0 + math.exp(-z))
+
+
+def classify(query: str, turns: List[Tuple[str, str]],
+             low: Optional[float] = None, high: Optional[float] = None) -> Tuple[Optional[bool], float]:
+    """
+    (decision, score): decision is True/False when the score is outside the borderline
+    band [low, high], otherwise None (caller should ask the LLM).
+    """
+    low = settings.RELEVANCE_LOW if low is None else low
+    high = settings.RELEVANCE_HIGH if high is None else high
+    s = score(query, turns)
+    if s >= high:
+        return True, s
+    if s <= low:
+        return False, s
+    return None, s
+
+
+def query_terms(text: str) -> Tuple[Set[str], Set[str]]:
+    """(content terms, entities) of one text; also used by the answer cache."""
+    tokens = _tokens(text)
+    return _content(tokens), _entities(tokens, _places(text))
+
+
+def embed(texts: List[str]) -> Optional[List[List[float]]]:
+    """Unit-length embeddings with the RELEVANCE_EMBED_MODEL model, or None when it is off."""
+    model = _embedder()
+    if model is None:
+        return None
+    return [list(map(float, v)) for v in model.encode(texts, normalize_embeddings=True)]
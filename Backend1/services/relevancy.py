@@ -1,12 +1,38 @@
-from typing import List, Tuple
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
 import google.generativeai as genai
 from config import settings
+from services.metrics import RELEVANCE_SECONDS
+from services.relevance_scorer import classify
+
+log = logging.getLogger("relevancy")
 
 # Init Gemini
 if settings.GOOGLE_API_KEY:
-    genai.configure(api_key=settings.GOOGLE_API_KEY)
+    genai.configure(api_key=settings.GOOGLE_API_KEY, **settings.GENAI_CONFIGURE_KWARGS)
 
 _MODEL_NAME = "gemini-2.0-flash"
+_model = None
+_model_lock = threading.Lock()
+
+# how each decision was taken (see relevance_stats())
+_stats: Dict[str, int] = {"local_true": 0, "local_false": 0, "llm": 0, "llm_errors": 0}
+
+
+def _get_model():
+    # GenerativeModel is a thin, thread-safe wrapper: build it once, not per request
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = genai.GenerativeModel(_MODEL_NAME)
+    return _model
+
+
+def relevance_stats() -> Dict[str, int]:
+    return dict(_stats)
 
 
 def format_turns_for_prompt(turns: List[Tuple[str, str]]) -> str:
@@ -24,7 +50,7 @@ def format_turns_for_prompt(turns: List[Tuple[str, str]]) -> str:
     return "\n".join(lines)
 
 
-def is_relevant(query: str, turns: List[Tuple[str, str]]) -> bool:
+def _llm_is_relevant(query: str, turns: List[Tuple[str, str]]) -> bool:
     """
     Ask Gemini to return strictly 'true' or 'false' (lowercase)
     whether the previous context is useful to answer the current query.
@@ -32,6 +58,7 @@ def is_relevant(query: str, turns: List[Tuple[str, str]]) -> bool:
     """
     if not settings.GOOGLE_API_KEY or not turns:
         return False
+    _stats["llm"] += 1
     try:
         history_text = format_turns_for_prompt(turns)
         prompt = f"""You are a strict relevance checker.
@@ -45,14 +72,45 @@ Current task:
 User now asks: "{query}"
 Is the previous context relevant? (true/false only)"""
 
-        model = genai.GenerativeModel(_MODEL_NAME)
-        resp = model.generate_content(prompt)
+        resp = _get_model().generate_content(prompt)
         out = (resp.text or "").strip().lower()
         return out.startswith("t")  # 'true'
     except Exception:
+        _stats["llm_errors"] += 1
         return False
 
 
+def is_relevant(query: str, turns: List[Tuple[str, str]]) -> bool:
+    """
+    Is the previous context useful to answer the current query?
+    Clear cases are decided by the local scorer; borderline scores go to Gemini
+    (settings.RELEVANCE_BACKEND selects hybrid / local / llm).
+    """
+    if not turns:
+        return False
+    t0 = time.perf_counter()
+    backend = settings.RELEVANCE_BACKEND
+    if backend == "llm":
+        try:
+            return _llm_is_relevant(query, turns)
+        finally:
+            RELEVANCE_SECONDS.labels("llm").observe_since(t0)
+
+    decision, score = classify(query, turns)
+    if decision is None:
+        if backend == "local" or not settings.GOOGLE_API_KEY:
+            decision = score >= 0.5
+        else:
+            log.debug("relevance borderline (%.2f), asking LLM", score)
+            try:
+                return _llm_is_relevant(query, turns)
+            finally:
+                RELEVANCE_SECONDS.labels("llm").observe_since(t0)
+    _stats["local_true" if decision else "local_false"] += 1
+    RELEVANCE_SECONDS.labels("local").observe_since(t0)
+    return decision
+
+
 def build_enriched_prompt(query: str, turns: List[Tuple[str, str]]) -> str:
     """
     Build the enriched prompt ADK should see when relevance=True.
@@ -0,0 +1,236 @@
+# src/services/script_detect.py
+"""
+Offline language detector for the languages we support (see SUPPORTED_LANGS).
+
+Most Indic inputs are unambiguous from their Unicode block alone (Tamil, Telugu,
+Gujarati, ...). Two blocks are shared: Devanagari (hi / mr) and Bengali (bn / as).
+Those are separated with a few orthographic markers plus a character-trigram
+model trained at import time on a small embedded seed corpus. Latin-script input
+is only called English when it has at least two unambiguous English words and no
+romanized Indic words; everything else is left to the remote detector.
+
+detect_local() returns (lang, confidence). Callers should use the remote detector
+when confidence is below their threshold.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Unicode block -> languages written in it
+_BLOCKS: List[Tuple[int, int, Tuple[str, ...]]] = [
+    (0x0900, 0x097F, ("hi", "mr")),
+    (0x0980, 0x09FF, ("bn", "as")),
+    (0x0A00, 0x0A7F, ("pa",)),
+    (0x0A80, 0x0AFF, ("gu",)),
+    (0x0B00, 0x0B7F, ("or",)),
+    (0x0B80, 0x0BFF, ("ta",)),
+    (0x0C00, 0x0C7F, ("te",)),
+    (0x0C80, 0x0CFF, ("kn",)),
+    (0x0D00, 0x0D7F, ("ml",)),
+]
+_LATIN = ("en",)
+
+# Letters that only one language of a shared block uses
+_MARKERS: Dict[str, str] = {
+    "ळ": "mr",  # ळ  (Marathi retroflex lateral; rare in Hindi)
+    "ৰ": "as",  # ৰ  (Assamese ra)
+    "ৱ": "as",  # ৱ  (Assamese wa)
+    "র": "bn",  # র  (Bengali ra; Assamese writes ৰ instead)
+}
+
+_SEED: Dict[str, List[str]] = {
+    "hi": [
+        "मेरी गेहूं की फसल में पीले पत्ते क्यों हो रहे हैं",
+        "इस हफ्ते मौसम कैसा रहेगा और क्या बारिश होगी",
+        "प्याज का आज का भाव क्या है",
+        "धान की बुवाई कब करनी चाहिए",
+        "कपास में कीड़े लग गए हैं, कौन सी दवा डालूं",
+        "मुझे किसान क्रेडिट कार्ड के बारे में बताइए",
+        "खेत में पानी कितनी बार देना है",
+        "यह खाद कितनी मात्रा में डालनी है",
+        "सरकार की नई योजना के लिए आवेदन कैसे करें",
+        "मेरे पास दो एकड़ जमीन है और मैं सोयाबीन उगाना चाहता हूं",
+        "टमाटर के पौधों में रोग लग गया है उसका इलाज बताओ",
+        "कल तापमान कितना रहेगा",
+    ],
+    "mr": [
+        "माझ्या गव्हाच्या पिकाची पाने पिवळी का होत आहेत",
+        "या आठवड्यात हवामान कसे असेल आणि पाऊस पडेल का",
+        "कांद्याचा आजचा भाव काय आहे",
+        "भाताची पेरणी कधी करावी",
+        "कापसावर कीड पडली आहे, कोणते औषध फवारू",
+        "मला किसान क्रेडिट कार्डबद्दल माहिती द्या",
+        "शेताला किती वेळा पाणी द्यायचे",
+        "हे खत किती प्रमाणात टाकायचे आहे",
+        "सरकारच्या नवीन योजनेसाठी अर्ज कसा करायचा",
+        "माझ्याकडे दोन एकर जमीन आहे आणि मला सोयाबीन लावायचे आहे",
+        "टोमॅटोच्या झाडांना रोग लागला आहे त्यावर उपाय सांगा",
+        "उद्या तापमान किती असेल",
+    ],
+    "bn": [
+        "আমার ধানের পাতা হলুদ হয়ে যাচ্ছে কেন",
+        "এই সপ্তাহে আবহাওয়া কেমন থাকবে আর বৃষ্টি হবে কি",
+        "আজ পেঁয়াজের দাম কত",
+        "গম কখন বপন করতে হবে",
+        "পাটে পোকা লেগেছে, কোন ওষুধ দেব",
+        "আমাকে কিষাণ ক্রেডিট কার্ড সম্পর্কে বলুন",
+        "জমিতে কতবার জল দিতে হবে",
+        "এই সার কতটা পরিমাণে দিতে হবে",
+        "সরকারি নতুন প্রকল্পের জন্য কীভাবে আবেদন করব",
+        "আমার দুই বিঘা জমি আছে এবং আমি সরষে চাষ করতে চাই",
+        "কাল তাপমাত্রা কত থাকবে",
+    ],
+    "as": [
+        "মোৰ ধানৰ পাত হালধীয়া হৈ গৈছে কিয়",
+        "এই সপ্তাহত বতৰ কেনেকুৱা হ'ব আৰু বৰষুণ হ'বনে",
+        "আজি পিঁয়াজৰ দাম কিমান",
+        "ঘেঁহু কেতিয়া সিঁচিব লাগে",
+        "চাহ বাগিচাত পোক লাগিছে, কি দৰব দিম",
+        "মোক কিষাণ ক্ৰেডিট কাৰ্ডৰ বিষয়ে কওক",
+        "পথাৰত কিমান বাৰ পানী দিব লাগে",
+        "এই সাৰ কিমান পৰিমাণে দিব লাগে",
+        "চৰকাৰৰ নতুন আঁচনিৰ বাবে কেনেকৈ আবেদন কৰিম",
+        "মোৰ দুই বিঘা মাটি আছে আৰু মই সৰিয়হ খেতি কৰিব বিচাৰো",
+        "কাইলৈ উষ্ণতা কিমান হ'ব",
+    ],
+}
+
+# English words that are not also common romanized Indic words. Short ones such as
+# "me", "do", "to", "in", "is", "a", "i" are deliberately absent: "kapas me keeda",
+# "do ekad me soybean" and "is saal ..." are Hinglish.
+_EN_WORDS = {
+    "the", "are", "was", "what", "how", "when", "which", "where", "why", "who",
+    "of", "for", "my", "and", "with", "should", "can", "will", "does", "this", "that",
+    "it", "from", "about", "tell", "give", "please", "today", "tomorrow", "week",
+    "price", "weather", "much", "many", "best", "time", "apply", "scheme", "forecast",
+}
+_EN_MIN_WORDS = 2
+# Frequent romanized Hindi/Marathi/Bengali/... words; any hit => leave to remote
+_ROMANIZED_WORDS = {
+    "hai", "hain", "kya", "kaise", "kab", "me", "mein", "mera", "meri", "mere", "aur", "nahi",
+    "ka", "ki", "ke", "ko", "se", "kitna", "kitni", "batao", "bataiye", "mujhe", "kar",
+    "saal", "ekad", "ekar", "laga", "lagi", "gaya", "gayi", "keeda", "kida", "kide", "dawa",
+    "gehu", "gehun", "kapas", "sundi",
+    "aahe", "ahe", "kay", "kasa", "kashi", "mala", "majha", "maza", "ani", "kiti", "pani",
+    "ami", "amar", "kemon", "koto", "ache", "kothay", "mor", "kiman", "kenekoi",
+    "mausam", "barish", "baarish", "fasal", "kheti", "khet", "bhav", "paus", "havaman",
+    "enna", "eppadi", "ela", "emi", "enti", "hege", "yenu", "kem", "shu", "chhe",
+}
+
+_WORD = re.compile(r"[^\W\d_]+", re.UNICODE)
+
+
+def _trigrams(text: str) -> List[str]:
+    grams: List[str] = []
+    for w in _WORD.findall(text):
+        w = f" {w} "
+        grams.extend(w[i:i + 3] for i in range(len(w) - 2))
+    return grams
+
+
+class _TrigramModel:
+    """Add-one smoothed character-trigram model per language."""
+
+    def __init__(self, corpus: Dict[str, List[str]]):
+        self.counts: Dict[str, Counter] = {}
+        self.totals: Dict[str, int] = {}
+        vocab = set()
+        for lang, lines in corpus.items():
+            c = Counter(g for line in lines for g in _trigrams(line))
+            self.counts[lang] = c
+            self.totals[lang] = sum(c.values())
+            vocab.update(c)
+        self.vocab = len(vocab) + 1
+
+    def avg_logprob(self, text: str, lang: str) -> float:
+        grams = _trigrams(text)
+        if not grams:
+            return 0.0
+        c, total = self.counts[lang], self.totals[lang] + self.vocab
+        return sum(math.log((c.get(g, 0) + 1) / total) for g in grams) / len(grams)
+
+
+_MODEL = _TrigramModel(_SEED)
+
+
+def _block_langs(ch: str) -> Optional[Tuple[str, ...]]:
+    cp = ord(ch)
+    if cp < 0x80:
+        return _LATIN if ch.isalpha() else None
+    for lo, hi, langs in _BLOCKS:
+        if lo <= cp <= hi:
+            return langs
+    return None
+
+
+def _split_shared(text: str, langs: Tuple[str, ...]) -> Tuple[str, float]:
+    """Pick between languages sharing one block; returns (lang, probability)."""
+    marks = Counter(_MARKERS[ch] for ch in text if ch in _MARKERS and _MARKERS[ch] in langs)
+    scores = {lang: _MODEL.avg_logprob(text, lang) for lang in langs}
+    # markers are near-definitive orthographic evidence: weigh them heavily
+    for lang, n in marks.items():
+        scores[lang] += 1.5 * n
+    ranked = sorted(scores.items(), key=lambda kv: -kv[1])
+    (best, s1), (_, s2) = ranked[0], ranked[1]
+    # logistic on the per-trigram log-likelihood margin; short inputs carry less evidence
+    k = 8.0 * min(1.0, len(_trigrams(text)) / 10.0)
+    p = 1.0 / (1.0 + math.exp(-k * (s1 - s2)))
+    return best, p
+
+
+def _en_hits(text: str) -> Tuple[int, Optional[int]]:
+    """(word count, English word count); the latter is None when any word is romanized Indic."""
+    words = [w.lower() for w in _WORD.findall(text)]
+    if any(w in _ROMANIZED_WORDS for w in words):
+        return len(words), None
+    return len(words), sum(1 for w in words if w in _EN_WORDS)
+
+
+def _latin(text: str) -> Tuple[Optional[str], float]:
+    n, en_hits = _en_hits(text)
+    if not n:
+        return None, 0.0
+    if en_hits is None:
+        return None, 0.2  # romanized Indic: the remote detector knows better
+    if en_hits < _EN_MIN_WORDS:
+        return "en", 0.5  # too little signal either way
+    return "en", min(0.99, 0.6 + en_hits / n)
+
+
+def plain_english(text: Optional[str]) -> bool:
+    """
+    True when the text is Latin-only with at least two English words and no
+    romanized Indic words.
+    """
+    if not text or any(_block_langs(ch) not in (None, _LATIN) for ch in text):
+        return False
+    _, en_hits = _en_hits(text)
+    return en_hits is not None and en_hits >= _EN_MIN_WORDS
+
+
+def detect_local(text: Optional[str]) -> Tuple[Optional[str], float]:
+    """
+    Returns (lang, confidence in 0..1). lang is None when nothing could be guessed.
+    """
+    if not text or not text.strip():
+        return None, 0.0
+    per_block: Counter = Counter()
+    letters = 0
+    for ch in text:
+        langs = _block_langs(ch)
+        if langs is not None:
+            per_block[langs] += 1
+            letters += 1
+    if not letters:
+        return None, 0.0
+
+    langs, n = per_block.most_common(1)[0]
+    share = n / letters
+    if langs is _LATIN:
+        lang, conf = _latin(text)
+        return lang, conf * share
+    if len(langs) == 1:
+        return langs[0], share
+    lang, p = _split_shared(text, langs)
+    return lang, p * share
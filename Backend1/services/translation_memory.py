@@ -0,0 +1,173 @@
+# src/services/translation_memory.py
+"""
+Two-tier translation memory used by every translator entry point.
+
+  L1: in-process LRU (per worker, microseconds)
+  L2: local SQLite file in WAL mode (shared by all uvicorn workers on the host,
+      survives restarts/deploys)
+
+Entries are keyed by a hash of (text, source, target). Translations never expire:
+the same source text always maps to the same output for a given language pair.
+"""
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from config import settings
+
+log = logging.getLogger("translation_memory")
+
+
+def tm_key(text: str, target_lang: str, source_lang: Optional[str]) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update((source_lang or "auto").encode())
+    h.update(b"\x00")
+    h.update(target_lang.encode())
+    h.update(b"\x00")
+    h.update(text.encode("utf-8"))
+    return h.hexdigest()
+
+
+class TranslationMemory:
+    def __init__(self, path: str, l1_size: int = 50_000):
+        self.path = path
+        self.l1_size = l1_size
+        self._l1: "OrderedDict[str, str]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._l2_disabled = not path
+        # counters (read via stats())
+        self.l1_hits = 0
+        self.l2_hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    # ---------- L1 ----------
+    def get_l1(self, key: str) -> Optional[str]:
+        val = self._l1.get(key)
+        if val is not None:
+            self._l1.move_to_end(key)
+        return val
+
+    def _put_l1(self, key: str, val: str) -> None:
+        self._l1[key] = val
+        self._l1.move_to_end(key)
+        if len(self._l1) > self.l1_size:
+            self._l1.popitem(last=False)
+
+    # ---------- L2 (blocking; call through asyncio.to_thread) ----------
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if self._l2_disabled:
+            return None
+        if self._conn is None:
+            try:
+                conn = sqlite3.connect(self.path, timeout=2.0, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS translation_memory (
+                      k TEXT PRIMARY KEY,
+                      target_lang TEXT NOT NULL,
+                      translated TEXT NOT NULL,
+                      created_at INTEGER NOT NULL
+                    ) WITHOUT ROWID
+                """)
+                self._conn = conn
+            except Exception as e:
+                log.warning("translation memory L2 disabled (%s): %s", self.path, e)
+                self._l2_disabled = True
+                return None
+        return self._conn
+
+    def get_l2_many(self, keys: List[str]) -> Dict[str, str]:
+        if not keys:
+            return {}
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return {}
+            try:
+                out: Dict[str, str] = {}
+                # stay well under SQLite's bound-parameter limit
+                for i in range(0, len(keys), 500):
+                    chunk = keys[i:i + 500]
+                    marks = ",".join("?" * len(chunk))
+                    for k, v in conn.execute(f"SELECT k, translated FROM translation_memory WHERE k IN ({marks})", chunk):
+                        out[k] = v
+                return out
+            except Exception as e:
+                log.warning("translation memory read failed: %s", e)
+                return {}
+
+    def put_l2_many(self, rows: Iterable[tuple]) -> None:
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            conn = self._db()
+            if conn is None:
+                return
+            try:
+                now = int(time.time())
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translation_memory (k, target_lang, translated, created_at) VALUES (?,?,?,?)",
+                    [(k, tgt, val, now) for k, tgt, val in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception as e:
+                log.warning("translation memory write failed: %s", e)
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception:
+                    pass
+
+    # ---------- async facade ----------
+    async def lookup_many(self, keys: List[str]) -> Dict[str, str]:
+        """Return {key: translation} for every key found in L1 or L2; updates counters."""
+        found: Dict[str, str] = {}
+        l1_missing: List[str] = []
+        for k in keys:
+            v = self.get_l1(k)
+            if v is not None:
+                found[k] = v
+            else:
+                l1_missing.append(k)
+        self.l1_hits += len(found)
+        if l1_missing:
+            from_l2 = await asyncio.to_thread(self.get_l2_many, l1_missing)
+            for k, v in from_l2.items():
+                self._put_l1(k, v)
+            found.update(from_l2)
+            self.l2_hits += len(from_l2)
+            self.misses += len(l1_missing) - len(from_l2)
+        return found
+
+    async def store_many(self, items: Dict[str, str], target_lang: str) -> None:
+        if not items:
+            return
+        for k, v in items.items():
+            self._put_l1(k, v)
+        self.writes += len(items)
+        await asyncio.to_thread(self.put_l2_many, [(k, target_lang, v) for k, v in items.items()])
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.l1_hits + self.l2_hits + self.misses
+        return {
+            "l1_hits": self.l1_hits,
+            "l2_hits": self.l2_hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "l1_size": len(self._l1),
+            "hit_ratio": round((self.l1_hits + self.l2_hits) / lookups, 4) if lookups else 0.0,
+            "l2_enabled": not self._l2_disabled,
+        }
+
+
+# Process-wide instance
+memory = TranslationMemory(settings.TRANSLATION_MEMORY_PATH, settings.TRANSLATION_MEMORY_L1_SIZE)
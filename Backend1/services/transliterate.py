@@ -0,0 +1,246 @@
+# src/services/transliterate.py
+"""
+In-process transliteration of romanized Indic text into the user's native script.
+
+Farmers often type Hindi/Marathi in Latin letters ("kal barish hogi kya"). Google
+translates native script far better than romanized input, so /chat used to spend up
+to three translator round trips on such messages. This module does the romanized
+-> native step locally:
+
+  1. a per-language lexicon for frequent words (function words, farm vocabulary),
+  2. otherwise ITRANS-style rules that produce Devanagari, and
+  3. a codepoint shift from Devanagari into the other Brahmic blocks (the Unicode
+     Indic blocks share one layout), with fallbacks for letters a script lacks.
+
+Output is "good enough for machine translation", not orthographically perfect.
+"""
+import re
+import unicodedata
+from typing import Dict, List, Optional, Tuple
+
+# ---------- ITRANS-style rules (lowercase casual romanization) ----------
+_CONSONANTS: List[Tuple[str, str]] = sorted([
+    ("kh", "ख"), ("k", "क"), ("q", "क"), ("gh", "घ"), ("g", "ग"),
+    ("chh", "छ"), ("ch", "च"), ("c", "क"), ("jh", "झ"), ("j", "ज"), ("z", "ज"),
+    ("th", "थ"), ("t", "त"), ("dh", "ध"), ("d", "द"), ("n", "न"),
+    ("ph", "फ"), ("p", "प"), ("f", "फ"), ("bh", "भ"), ("b", "ब"), ("m", "म"),
+    ("y", "य"), ("r", "र"), ("l", "ल"), ("v", "व"), ("w", "व"),
+    ("sh", "श"), ("s", "स"), ("h", "ह"), ("x", "क्स"),
+], key=lambda kv: -len(kv[0]))
+
+# roman -> (independent vowel, matra); "" matra = inherent schwa
+_VOWELS: List[Tuple[str, Tuple[str, str]]] = sorted([
+    ("aa", ("आ", "ा")), ("ai", ("ऐ", "ै")), ("au", ("औ", "ौ")), ("a", ("अ", "")),
+    ("ee", ("ई", "ी")), ("ii", ("ई", "ी")), ("i", ("इ", "ि")),
+    ("oo", ("ऊ", "ू")), ("uu", ("ऊ", "ू")), ("u", ("उ", "ु")),
+    ("e", ("ए", "े")), ("o", ("ओ", "ो")),
+], key=lambda kv: -len(kv[0]))
+
+_VIRAMA = "्"
+_ANUSVARA = "ं"
+_NASALS = {"न", "म"}
+
+
+def _match(word: str, i: int, table):
+    for rom, val in table:
+        if word.startswith(rom, i):
+            return rom, val
+    return None, None
+
+
+def _word_to_deva(word: str) -> str:
+    out: List[str] = []
+    i, n = 0, len(word)
+    prev_consonant = False
+    while i < n:
+        rom, cons = _match(word, i, _CONSONANTS)
+        if rom:
+            j = i + len(rom)
+            nxt_cons, _ = _match(word, j, _CONSONANTS)
+            # n/m before another consonant (not a doubled nasal) -> anusvara
+            if cons in _NASALS and out and not prev_consonant and nxt_cons and word[j] != word[i]:
+                out.append(_ANUSVARA)
+                i = j
+                continue
+            if prev_consonant:
+                out.append(_VIRAMA)  # consonant cluster
+            out.append(cons)
+            prev_consonant = True
+            i = j
+            continue
+        rom, vowel = _match(word, i, _VOWELS)
+        if rom:
+            indep, matra = vowel
+            j = i + len(rom)
+            final = j >= n
+            if prev_consonant:
+                if final and rom == "a":
+                    matra = "ा"  # casual romanization: word-final a is long (kya, ka, hoga)
+                elif final and rom == "i":
+                    matra = "ी"
+                elif final and rom == "u":
+                    matra = "ू"
+                out.append(matra)
+            else:
+                out.append(indep)
+            prev_consonant = False
+            i = j
+            continue
+        out.append(word[i])  # unknown letter: keep as-is
+        prev_consonant = False
+        i += 1
+    return "".join(out)
+
+
+# ---------- Devanagari -> other Brahmic blocks ----------
+_BLOCK_BASE = {
+    "hi": 0x0900, "mr": 0x0900, "bn": 0x0980, "as": 0x0980, "pa": 0x0A00, "gu": 0x0A80,
+    "or": 0x0B00, "ta": 0x0B80, "te": 0x0C00, "kn": 0x0C80, "ml": 0x0D00,
+}
+# letters some scripts lack -> nearest letter they have (tried in order)
+_FALLBACK = {
+    "ख": "क", "ग": "क", "घ": "क", "छ": "च", "झ": "ज", "ठ": "ट", "ड": "ट", "ढ": "ट",
+    "थ": "त", "द": "त", "ध": "त", "फ": "प", "ब": "प", "भ": "प", "व": "ब", "श": "स",
+    "ऐ": "ए", "औ": "ओ", "ै": "े", "ौ": "ो", "ं": "न",
+}
+
+
+def _shift(ch: str, base: int) -> Optional[str]:
+    cp = ord(ch)
+    if not 0x0900 <= cp <= 0x097F:
+        return ch
+    cand = chr(cp - 0x0900 + base)
+    try:
+        unicodedata.name(cand)
+        return cand
+    except ValueError:
+        return None
+
+
+def _from_deva(text: str, lang: str) -> str:
+    base = _BLOCK_BASE[lang]
+    if base == 0x0900:
+        return text
+    out: List[str] = []
+    for ch in text:
+        mapped, cur = _shift(ch, base), ch
+        while mapped is None and cur in _FALLBACK:
+            cur = _FALLBACK[cur]
+            mapped = _shift(cur, base)
+        out.append(mapped if mapped is not None else ch)
+    s = "".join(out)
+    if lang == "as":
+        s = s.replace("র", "ৰ")
+    return s
+
+
+# ---------- lexicon (romanized -> native), checked before the rules ----------
+_LEXICON: Dict[str, Dict[str, str]] = {
+    "hi": {
+        "hai": "है", "hain": "हैं", "kya": "क्या", "kaise": "कैसे", "kab": "कब", "kitna": "कितना",
+        "kitni": "कितनी", "kitne": "कितने", "mein": "में", "me": "में", "main": "मैं", "mera": "मेरा",
+        "meri": "मेरी", "mere": "मेरे", "mujhe": "मुझे", "aur": "और", "nahi": "नहीं", "nahin": "नहीं",
+        "ka": "का", "ki": "की", "ke": "के", "ko": "को", "se": "से", "par": "पर", "ye": "ये", "yeh": "यह",
+        "kal": "कल", "aaj": "आज", "barish": "बारिश", "baarish": "बारिश", "mausam": "मौसम",
+        "fasal": "फसल", "kheti": "खेती", "khet": "खेत", "pani": "पानी", "paani": "पानी",
+        "gehu": "गेहूं", "gehun": "गेहूं", "dhan": "धान", "makka": "मक्का", "pyaz": "प्याज",
+        "pyaaz": "प्याज", "aalu": "आलू", "aloo": "आलू", "kapas": "कपास", "ganna": "गन्ना",
+        "bhav": "भाव", "daam": "दाम", "keemat": "कीमत", "khad": "खाद", "beej": "बीज", "dawa": "दवा",
+        "keeda": "कीड़ा", "kide": "कीड़े", "rog": "रोग", "batao": "बताओ", "bataiye": "बताइए",
+        "chahiye": "चाहिए", "karna": "करना", "kare": "करें", "karen": "करें", "hoga": "होगा",
+        "hogi": "होगी", "tapman": "तापमान", "garmi": "गर्मी", "thand": "ठंड", "yojana": "योजना",
+        "sarkari": "सरकारी", "kisan": "किसान", "mandi": "मंडी", "ekad": "एकड़", "acre": "एकड़",
+    },
+    "mr": {
+        "aahe": "आहे", "ahe": "आहे", "aahet": "आहेत", "kay": "काय", "ka": "का", "kasa": "कसा",
+        "kashi": "कशी", "kase": "कसे", "kadhi": "कधी", "kiti": "किती", "mala": "मला", "majha": "माझा",
+        "maza": "माझा", "majhi": "माझी", "mazi": "माझी", "majhya": "माझ्या", "mazya": "माझ्या",
+        "ani": "आणि", "aani": "आणि", "nahi": "नाही", "udya": "उद्या", "aaj": "आज", "paus": "पाऊस",
+        "havaman": "हवामान", "pik": "पीक", "shet": "शेत", "sheti": "शेती", "pani": "पाणी",
+        "gahu": "गहू", "bhat": "भात", "kanda": "कांदा", "kandyacha": "कांद्याचा", "kapus": "कापूस",
+        "us": "ऊस", "soybean": "सोयाबीन", "bhav": "भाव", "khat": "खत", "biyane": "बियाणे",
+        "aushadh": "औषध", "kid": "कीड", "rog": "रोग", "sanga": "सांगा", "dya": "द्या",
+        "padel": "पडेल", "yeil": "येईल", "tapman": "तापमान", "yojana": "योजना", "shetkari": "शेतकरी",
+    },
+    "bn": {
+        "ami": "আমি", "amar": "আমার", "ki": "কি", "kemon": "কেমন", "koto": "কত", "kobe": "কবে",
+        "kokhon": "কখন", "aaj": "আজ", "aj": "আজ", "kal": "কাল", "bristi": "বৃষ্টি", "brishti": "বৃষ্টি",
+        "abhawa": "আবহাওয়া", "dhan": "ধান", "jomi": "জমি", "jol": "জল", "dam": "দাম", "sar": "সার",
+        "hobe": "হবে", "ache": "আছে", "bolun": "বলুন", "chas": "চাষ", "krishok": "কৃষক",
+    },
+    "as": {
+        "moi": "মই", "mor": "মোৰ", "ki": "কি", "kiman": "কিমান", "ketiya": "কেতিয়া",
+        "kenekoi": "কেনেকৈ", "aji": "আজি", "kaile": "কাইলৈ", "borokhun": "বৰষুণ", "botor": "বতৰ",
+        "dhan": "ধান", "pani": "পানী", "dam": "দাম", "hobo": "হ'ব", "ase": "আছে", "kheti": "খেতি",
+    },
+    "gu": {
+        "shu": "શું", "chhe": "છે", "che": "છે", "kem": "કેમ", "ketlu": "કેટલું", "kyare": "ક્યારે",
+        "maru": "મારું", "aaje": "આજે", "kale": "કાલે", "varsad": "વરસાદ", "havaman": "હવામાન",
+        "paak": "પાક", "khetar": "ખેતર", "kapas": "કપાસ", "bhav": "ભાવ", "khatar": "ખાતર", "pani": "પાણી",
+    },
+    "pa": {
+        "ki": "ਕੀ", "hai": "ਹੈ", "kiven": "ਕਿਵੇਂ", "kado": "ਕਦੋਂ", "kinna": "ਕਿੰਨਾ", "mera": "ਮੇਰਾ",
+        "ajj": "ਅੱਜ", "kal": "ਕੱਲ੍ਹ", "meenh": "ਮੀਂਹ", "mausam": "ਮੌਸਮ", "fasal": "ਫ਼ਸਲ", "kanak": "ਕਣਕ",
+        "jhona": "ਝੋਨਾ", "pani": "ਪਾਣੀ", "khad": "ਖਾਦ", "bhaa": "ਭਾਅ",
+    },
+    "or": {
+        "kana": "କଣ", "kemiti": "କେମିତି", "kete": "କେତେ", "mora": "ମୋର", "aaji": "ଆଜି",
+        "barsha": "ବର୍ଷା", "paga": "ପାଗ", "dhana": "ଧାନ", "chasa": "ଚାଷ", "pani": "ପାଣି", "sara": "ସାର",
+    },
+    "ta": {
+        "enna": "என்ன", "eppadi": "எப்படி", "eppo": "எப்போ", "evvalavu": "எவ்வளவு", "en": "என்",
+        "inru": "இன்று", "naalai": "நாளை", "mazhai": "மழை", "nel": "நெல்", "payir": "பயிர்",
+        "thanneer": "தண்ணீர்", "uram": "உரம்", "vilai": "விலை", "vivasayam": "விவசாயம்",
+    },
+    "te": {
+        "emi": "ఏమి", "ela": "ఎలా", "eppudu": "ఎప్పుడు", "entha": "ఎంత", "naa": "నా", "eroju": "ఈరోజు",
+        "repu": "రేపు", "varsham": "వర్షం", "vari": "వరి", "panta": "పంట", "neeru": "నీరు",
+        "eruvu": "ఎరువు", "dhara": "ధర", "vyavasayam": "వ్యవసాయం",
+    },
+    "kn": {
+        "enu": "ಏನು", "yenu": "ಏನು", "hege": "ಹೇಗೆ", "yavaga": "ಯಾವಾಗ", "eshtu": "ಎಷ್ಟು", "nanna": "ನನ್ನ",
+        "ivattu": "ಇವತ್ತು", "naale": "ನಾಳೆ", "male": "ಮಳೆ", "bhatta": "ಭತ್ತ",
+        "neeru": "ನೀರು", "gobbara": "ಗೊಬ್ಬರ", "bele": "ಬೆಳೆ",
+    },
+    "ml": {
+        "enthu": "എന്ത്", "engane": "എങ്ങനെ", "eppol": "എപ്പോൾ", "ethra": "എത്ര", "ente": "എന്റെ",
+        "innu": "ഇന്ന്", "naale": "നാളെ", "mazha": "മഴ", "nellu": "നെല്ല്", "vila": "വില",
+        "vellam": "വെള്ളം", "valam": "വളം", "krishi": "കൃഷി",
+    },
+}
+
+_TOKEN = re.compile(r"[A-Za-z]+|[^A-Za-z]+")
+
+
+def supports(lang: Optional[str]) -> bool:
+    return bool(lang) and lang in _BLOCK_BASE
+
+
+def transliterate(text: Optional[str], lang: Optional[str]) -> Optional[str]:
+    """
+    Romanized text -> `lang` native script. Returns None when `lang` has no Brahmic
+    script here (e.g. "en") or the input is empty.
+    """
+    if not text or not text.strip() or not supports(lang):
+        return None
+    lex = _LEXICON.get(lang, {})
+    out: List[str] = []
+    for tok in _TOKEN.findall(text):
+        if not tok[0].isascii() or not tok[0].isalpha():
+            out.append(tok)
+            continue
+        low = tok.lower()
+        native = lex.get(low)
+        if native is None:
+            native = _from_deva(_word_to_deva(low), lang)
+        out.append(native)
+    return "".join(out)
+
+
+def lexicon_coverage(text: str, lang: Optional[str]) -> float:
+    """Share of Latin words found in `lang`'s lexicon (a cheap "is this romanized <lang>?" signal)."""
+    words = [w.lower() for w in re.findall(r"[A-Za-z]+", text or "")]
+    if not words or not supports(lang):
+        return 0.0
+    lex = _LEXICON.get(lang, {})
+    return sum(1 for w in words if w in lex) / len(words)
@@ -0,0 +1,368 @@
+# src/services/write_behind.py
+"""
+In-process write-behind queue for /chat turns and /feedback rows.
+
+Handlers enqueue and return; a background task flushes the queue in one transaction
+per batch (executemany, which asyncpg pipelines in a single round trip) whenever
+WRITE_BEHIND_MAX_BATCH items are waiting or every WRITE_BEHIND_FLUSH_MS.
+
+Durability: with WRITE_BEHIND_SPILL_PATH set, every item is appended to a local JSONL
+file before the handler returns and the file is rewritten with whatever is still
+pending after each successful flush. Items left there by a crash are replayed on
+the next start; the turn write is idempotent (keyed by message_id) and feedback
+inserts skip existing feedback_ids, so a replay after a partial flush is harmless.
+
+Read-your-writes: queued turns stay visible through merge_turns()/pending_title()
+until they are committed, so the next turn's context (and /history) see them.
+
+Poison rows: when a batch fails it is retried one row at a time, so one bad row (a
+NUL byte, a constraint violation) cannot hold up the rest. A row that keeps failing
+for any reason other than the database being unreachable is dropped after
+WRITE_BEHIND_MAX_ATTEMPTS tries, logged, counted in agri_write_behind_dropped and,
+with a spill file, appended to <spill>.dead for manual replay.
+
+When the queue is not running (scripts, benchmarks) submit_* write synchronously.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import asyncpg
+
+from config import settings
+from services.chat_store import RECORD_TURN_SQL, record_turn, record_turn_args
+from services.metrics import DB_QUERY_SECONDS, WRITE_BEHIND_DROPPED
+
+log = logging.getLogger("write_behind")
+
+_INSERT_FEEDBACK = """
+    INSERT INTO feedback (feedback_id, session_id, user_email, action, comment, created_time)
+    SELECT $1, $2, $3, $4, $5, $6
+    WHERE NOT EXISTS (SELECT 1 FROM feedback WHERE feedback_id = $1)
+"""
+_FEEDBACK_FIELDS = ("feedback_id", "session_id", "user_email", "action", "comment", "created_time")
+# the database (not the row) is the problem: retry with backoff, never drop
+_UNREACHABLE = (OSError, asyncio.TimeoutError, asyncpg.InterfaceError, asyncpg.PostgresConnectionError,
+                asyncpg.CannotConnectNowError, asyncpg.TooManyConnectionsError)
+
+
+def _encode(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return {"$dt": obj.isoformat()}
+    if isinstance(obj, dict):
+        return {k: _encode(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_encode(v) for v in obj]
+    return obj
+
+
+def _decode(obj: Any) -> Any:
+    if isinstance(obj, dict):
+        if set(obj) == {"$dt"}:
+            return datetime.fromisoformat(obj["$dt"])
+        return {k: _decode(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_decode(v) for v in obj]
+    return obj
+
+
+class WriteBehindQueue:
+    def __init__(self, flush_ms: float, max_batch: int, max_pending: int,
+                 spill_path: str = "", fsync: bool = False, max_attempts: int = 3):
+        self.flush_s = flush_ms / 1000.0
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.spill_path = spill_path
+        self.fsync = fsync
+        self.max_attempts = max(1, max_attempts)
+        self._items: List[Tuple[str, Dict[str, Any]]] = []   # ("turn" | "feedback", kwargs)
+        self._attempts: Dict[int, int] = {}                  # id(kwargs) -> failed row writes
+        self._overlay: Dict[str, Dict[str, Dict[str, Any]]] = {}  # session_id -> message_id -> turn
+        self._pool = None
+        self._task: Optional[asyncio.Task] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._spill = None
+        self._rewriting: Optional[asyncio.Future] = None
+        self.flushed = self.batches = self.failures = self.dropped = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------- lifecycle ----------
+    async def start(self, pool) -> None:
+        self._pool = pool
+        self._wake = asyncio.Event()
+        if self.spill_path:
+            for kind, kw in self._read_spill():
+                self._add(kind, kw)
+            if self._items:
+                log.warning("replaying %d queued writes from %s", len(self._items), self.spill_path)
+            self._rewrite_spill()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, attempts: int = 3) -> None:
+        """Stop the flusher and drain what is queued (called from the app lifespan)."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._rewriting is not None:
+            await asyncio.gather(self._rewriting, return_exceptions=True)
+        for i in range(attempts):
+            if not self._items:
+                break
+            try:
+                while self._items:
+                    await self._flush_once()
+            except Exception as e:
+                log.warning("drain attempt %d failed: %s", i + 1, e)
+                await asyncio.sleep(0.5 * (i + 1))
+        if self._items:
+            where = f"kept in {self.spill_path}" if self.spill_path else "LOST (no spill file)"
+            log.error("write-behind stopped with %d pending writes: %s", len(self._items), where)
+        if self._spill:
+            self._spill.close()
+            self._spill = None
+
+    # ---------- producers ----------
+    async def submit_turn(self, pool, **turn) -> None:
+        if not self.running:
+            await record_turn(pool, **turn)
+            return
+        await self._submit("turn", turn)
+
+    async def submit_feedback(self, pool, **row) -> None:
+        if not self.running:
+            async with pool.acquire() as conn:
+                await conn.execute(_INSERT_FEEDBACK, *(row[f] for f in _FEEDBACK_FIELDS))
+            return
+        await self._submit("feedback", row)
+
+    async def _submit(self, kind: str, kw: Dict[str, Any]) -> None:
+        while len(self._items) >= self.max_pending and self.running:
+            # backpressure: the database is not keeping up (or is down)
+            self._wake.set()
+            await asyncio.sleep(self.flush_s or 0.01)
+        self._add(kind, kw)
+        if self.spill_path:
+            self._append_spill(kind, kw)
+        if len(self._items) >= self.max_batch:
+            self._wake.set()
+
+    def _add(self, kind: str, kw: Dict[str, Any]) -> None:
+        self._items.append((kind, kw))
+        if kind == "turn":
+            self._overlay.setdefault(kw["session_id"], {})[kw["message_id"]] = kw
+
+    # ---------- read-your-writes ----------
+    def merge_turns(self, session_id: str, turns: List[Tuple[str, str]],
+                    turn_keys: List[Tuple[datetime, str]], n: int) -> List[Tuple[str, str]]:
+        """Last n (user_query_en, bot_message) turns: DB rows plus queued ones."""
+        pending = self._overlay.get(session_id)
+        if not pending:
+            return turns
+        rows = {mid: (ts, turn) for (ts, mid), turn in zip(turn_keys, turns)}
+        for mid, t in pending.items():
+            rows[mid] = (t["created_time"], (t.get("user_query_en") or "", t.get("bot_message") or ""))
+        ordered = sorted(rows.items(), key=lambda kv: (kv[1][0], kv[0]))
+        return [turn for _, (_, turn) in ordered][-n:]
+
+    def pending_turns(self, session_id: str) -> List[Dict[str, Any]]:
+        """Queued turns of a session, oldest first."""
+        pending = self._overlay.get(session_id) or {}
+        return sorted(pending.values(), key=lambda t: (t["created_time"], t["message_id"]))
+
+    def pending_title(self, session_id: str, title: Optional[str]) -> Optional[str]:
+        """Title the session will have once the queue drains; title is the stored one."""
+        for t in self.pending_turns(session_id):
+            # same rule as RECORD_TURN_SQL: an auto title only replaces the title it saw
+            if t.get("new_title") and t.get("old_title") == title:
+                title = t["new_title"]
+        return title
+
+    # ---------- flushing ----------
+    async def _loop(self) -> None:
+        backoff = self.flush_s
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while self._items:
+                    await self._flush_once()
+                backoff = self.flush_s
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.failures += 1
+                log.warning("write-behind flush failed (%d pending): %s", len(self._items), e)
+                backoff = min(max(backoff * 2, 0.1), 5.0)
+                await asyncio.sleep(backoff)
+
+    async def _flush_once(self) -> None:
+        batch = self._items[:self.max_batch]
+        if not batch:
+            return
+        dropped, t0 = self.dropped, time.perf_counter()
+        try:
+            async with self._pool.acquire() as conn:
+                async with conn.transaction():
+                    turns = [record_turn_args(**kw) for kind, kw in batch if kind == "turn"]
+                    feedback = [tuple(kw[f] for f in _FEEDBACK_FIELDS) for kind, kw in batch if kind == "feedback"]
+                    if turns:
+                        await conn.executemany(RECORD_TURN_SQL, turns)
+                    if feedback:
+                        await conn.executemany(_INSERT_FEEDBACK, feedback)
+            keep: List[Tuple[str, Dict[str, Any]]] = []
+        except _UNREACHABLE:
+            raise
+        except Exception as e:
+            log.warning("write-behind batch of %d failed (%s); retrying row by row", len(batch), e)
+            keep = await self._flush_rows(batch)
+        DB_QUERY_SECONDS.labels("write_behind_flush").observe_since(t0)
+        self._items[:len(batch)] = keep
+        kept = {id(kw) for _, kw in keep}
+        for kind, kw in batch:
+            if id(kw) in kept:
+                continue
+            self._attempts.pop(id(kw), None)
+            if kind == "turn":
+                pending = self._overlay.get(kw["session_id"])
+                if pending is not None:
+                    pending.pop(kw["message_id"], None)
+                    if not pending:
+                        del self._overlay[kw["session_id"]]
+        self.flushed += len(batch) - len(keep) - (self.dropped - dropped)
+        self.batches += 1
+        if self.spill_path:
+            await self._rewrite_spill_async()
+        if keep:
+            raise RuntimeError(f"{len(keep)} rows failed and will be retried")
+
+    async def _flush_rows(self, batch: List[Tuple[str, Dict[str, Any]]]) -> List[Tuple[str, Dict[str, Any]]]:
+        """Write the rows one by one; the ones to retry later (oldest first)."""
+        keep = []
+        for i, (kind, kw) in enumerate(batch):
+            try:
+                async with self._pool.acquire() as conn:
+                    if kind == "turn":
+                        await conn.execute(RECORD_TURN_SQL, *record_turn_args(**kw))
+                    else:
+                        await conn.execute(_INSERT_FEEDBACK, *(kw[f] for f in _FEEDBACK_FIELDS))
+            except _UNREACHABLE:
+                # database gone mid-way: keep this row and everything after it, untouched
+                return keep + batch[i:]
+            except Exception as e:
+                n = self._attempts.get(id(kw), 0) + 1
+                if n < self.max_attempts:
+                    self._attempts[id(kw)] = n
+                    keep.append((kind, kw))
+                else:
+                    self._dead_letter(kind, kw, e)
+        return keep
+
+    def _dead_letter(self, kind: str, kw: Dict[str, Any], err: Exception) -> None:
+        self.dropped += 1
+        WRITE_BEHIND_DROPPED.labels(kind).inc()
+        ref = kw.get("message_id") or kw.get("feedback_id")
+        log.error("write-behind dropped %s %s (session %s) after %d attempts: %s",
+                  kind, ref, kw.get("session_id"), self.max_attempts, err)
+        if not self.spill_path:
+            return
+        try:
+            with open(self.spill_path + ".dead", "a", encoding="utf-8") as f:
+                f.write(json.dumps({"kind": kind, "data": _encode(kw), "error": str(err)}, ensure_ascii=False) + "\n")
+        except OSError as e:
+            log.error("dead-letter write failed: %s", e)
+
+    # ---------- spill file ----------
+    def _read_spill(self) -> List[Tuple[str, Dict[str, Any]]]:
+        if not os.path.exists(self.spill_path):
+            return []
+        out = []
+        with open(self.spill_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    obj = json.loads(line)
+                    out.append((obj["kind"], _decode(obj["data"])))
+                except (ValueError, KeyError):
+                    log.warning("skipping unreadable spill line")  # torn last write
+        return out
+
+    def _append_spill(self, kind: str, kw: Dict[str, Any]) -> None:
+        if self._spill is None:
+            self._spill = open(self.spill_path, "a", encoding="utf-8")
+        self._spill.write(json.dumps({"kind": kind, "data": _encode(kw)}, ensure_ascii=False) + "\n")
+        self._spill.flush()
+        if self.fsync:
+            os.fsync(self._spill.fileno())
+
+    def _write_tmp(self, items: List[Tuple[str, Dict[str, Any]]], mode: str = "w") -> str:
+        tmp = self.spill_path + ".tmp"
+        with open(tmp, mode, encoding="utf-8") as f:
+            for kind, kw in items:
+                f.write(json.dumps({"kind": kind, "data": _encode(kw)}, ensure_ascii=False) + "\n")
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+        return tmp
+
+    def _swap_spill(self, tmp: str) -> None:
+        os.replace(tmp, self.spill_path)
+        if self._spill is not None:
+            self._spill.close()
+        self._spill = open(self.spill_path, "a", encoding="utf-8")
+
+    def _rewrite_spill(self) -> None:
+        self._swap_spill(self._write_tmp(self._items))
+
+    async def _rewrite_spill_async(self) -> None:
+        """
+        _rewrite_spill with the bulk write and fsync in a worker thread. Producers keep
+        appending to the old file meanwhile; those few items are copied over before the
+        swap (only this flusher removes items, so they are the tail past the snapshot).
+        """
+        snapshot = list(self._items)
+        # shielded: if the flusher is cancelled mid-write, stop() waits for the thread
+        fut = self._rewriting = asyncio.ensure_future(asyncio.to_thread(self._write_tmp, snapshot))
+        tmp = await asyncio.shield(fut)
+        self._rewriting = None
+        extra = self._items[len(snapshot):]
+        if extra:
+            self._write_tmp(extra, mode="a")
+        self._swap_spill(tmp)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "pending": len(self._items),
+            "flushed": self.flushed,
+            "batches": self.batches,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "spill_path": self.spill_path or None,
+        }
+
+
+queue = WriteBehindQueue(
+    flush_ms=settings.WRITE_BEHIND_FLUSH_MS,
+    max_batch=settings.WRITE_BEHIND_MAX_BATCH,
+    max_pending=settings.WRITE_BEHIND_MAX_PENDING,
+    spill_path=settings.WRITE_BEHIND_SPILL_PATH,
+    fsync=settings.WRITE_BEHIND_FSYNC,
+    max_attempts=settings.WRITE_BEHIND_MAX_ATTEMPTS,
+)
+
+
+def write_behind_stats() -> Dict[str, Any]:
+    return queue.stats()
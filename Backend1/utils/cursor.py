@@ -0,0 +1,33 @@
+# src/utils/cursor.py
+"""
+Opaque keyset-pagination cursors.
+
+A cursor encodes the sort key of a row, (timestamp, id), as url-safe base64 so
+clients treat it as a token. decode_cursor() raises ValueError on anything it did
+not produce.
+"""
+import base64
+from datetime import datetime, timedelta, timezone
+from typing import Tuple
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def encode_cursor(ts: datetime, key: str) -> str:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    micros = (ts - _EPOCH) // timedelta(microseconds=1)  # exact; float timestamps can be off by 1us
+    raw = f"{micros}|{key}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        micros, key = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8").split("|", 1)
+        ts = _EPOCH + timedelta(microseconds=int(micros))
+    except Exception as e:
+        raise ValueError(f"invalid cursor: {cursor!r}") from e
+    if not key:
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return ts, key
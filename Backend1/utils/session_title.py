@@ -11,7 +11,7 @@ try:
     import google.generativeai as genai  # type: ignore
     from config import settings  # to access GOOGLE_API_KEY if present
     if USE_LLM and getattr(settings, "GOOGLE_API_KEY", None):
-        genai.configure(api_key=settings.GOOGLE_API_KEY)
+        genai.configure(api_key=settings.GOOGLE_API_KEY, **settings.GENAI_CONFIGURE_KWARGS)
     else:
         genai = None  # type: ignore
 except Exception:
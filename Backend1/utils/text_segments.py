@@ -0,0 +1,50 @@
+# src/utils/text_segments.py
+"""
+Incremental sentence/bullet segmenter for streamed bot replies.
+
+Text arrives in arbitrary chunks; `SegmentBuffer.feed()` returns every segment that is
+complete so far (ending at a newline or at sentence punctuation followed by
+whitespace) and keeps the unfinished tail. `flush()` returns whatever is left when
+the stream ends. Segments keep their trailing whitespace, so "".join(segments)
+reproduces the input exactly.
+"""
+import re
+from typing import List
+
+# a segment ends after: a newline, or ./?/!/। (plus closing quotes/brackets/asterisks) followed by whitespace
+_BOUNDARY = re.compile(r"\n+|(?<=[.?!।])[\"')\]*]*\s+")
+# don't split after common abbreviations / decimals ("e.g. ", "approx. ", "Rs. ")
+_NO_SPLIT_BEFORE = re.compile(r"(?:\b(?:e\.g|i\.e|etc|approx|vs|Rs|No|Dr|Mr|Mrs|St)\.|\d\.)$", re.IGNORECASE)
+
+MIN_SEGMENT_CHARS = 12  # avoid translating tiny fragments ("1." / "**Tip:**") on their own
+
+
+class SegmentBuffer:
+    def __init__(self, min_chars: int = MIN_SEGMENT_CHARS):
+        self._buf = ""
+        self._min = min_chars
+
+    def feed(self, chunk: str) -> List[str]:
+        if not chunk:
+            return []
+        self._buf += chunk
+        out: List[str] = []
+        start = 0
+        for m in _BOUNDARY.finditer(self._buf):
+            end = m.end()
+            # the boundary must be fully received (whitespace may continue in the next chunk)
+            if end == len(self._buf):
+                break
+            head = self._buf[start:m.start()]
+            if "\n" not in m.group(0) and _NO_SPLIT_BEFORE.search(head):
+                continue
+            if len(self._buf[start:end].strip()) < self._min and "\n" not in m.group(0):
+                continue
+            out.append(self._buf[start:end])
+            start = end
+        self._buf = self._buf[start:]
+        return out
+
+    def flush(self) -> List[str]:
+        rest, self._buf = self._buf, ""
+        return [rest] if rest else []
@@ -1,16 +1,65 @@
+import asyncio
 import os
-import requests
+from contextvars import ContextVar
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List, Tuple
-from functools import lru_cache
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
+import httpx
 from dotenv import load_dotenv
 
+from pincode_gazetteer import PincodeGazetteer, normalize_pincode
+
 load_dotenv()
 
 OPENWEATHERMAP_API_KEY = os.getenv("OPENWEATHER_API_KEY")
+# overridable so the load-test harness can point at a local stand-in
+OPENWEATHER_BASE_URL = os.getenv("OPENWEATHER_BASE_URL", "https://api.openweathermap.org").rstrip("/")
+# Pincodes missing from the bundled gazetteer are geocoded remotely once and appended
+# here ("" = keep them in memory only).
+PINCODE_OVERLAY = os.getenv("PINCODE_OVERLAY", "pincode_overlay.jsonl")
+
+# Callers that need to know whether a run used the forecast (the intent router's
+# precision accounting) set this to a list; every call appends its pincode.
+FORECAST_CALLS: ContextVar[Optional[List[str]]] = ContextVar("FORECAST_CALLS", default=None)
+
+# --- NEW: one pooled async HTTP client (saves TCP/TLS setup time). The tools run on
+# the ADK event loop, so a blocking client stalled every other request in the worker
+# for up to the read timeout.
+_HTTP: Optional[httpx.AsyncClient] = None
+_HTTP_LIMITS = httpx.Limits(max_connections=50, max_keepalive_connections=20, keepalive_expiry=30.0)
+_GEO_TIMEOUT = httpx.Timeout(3.5, connect=0.5)        # read, connect (tighter but safe)
+_FORECAST_TIMEOUT = httpx.Timeout(4.0, connect=0.6)
+
+def _http() -> httpx.AsyncClient:
+    global _HTTP
+    if _HTTP is None or _HTTP.is_closed:
+        _HTTP = httpx.AsyncClient(base_url=OPENWEATHER_BASE_URL, limits=_HTTP_LIMITS)
+    return _HTTP
+
+async def aclose_http() -> None:
+    """Close the pooled client (app shutdown)."""
+    global _HTTP
+    if _HTTP is not None:
+        await _HTTP.aclose()
+        _HTTP = None
+
+# --- NEW: single-flight. Concurrent calls for the same key share one upstream request;
+# the shared task is shielded so a caller that gets cancelled doesn't cancel the others.
+_INFLIGHT: Dict[str, "asyncio.Future[Any]"] = {}
+STATS: Dict[str, int] = {"geo_fetches": 0, "forecast_fetches": 0, "cache_hits": 0, "coalesced": 0}
+
+async def _single_flight(key: str, fetch: Callable[[], Awaitable[Any]]) -> Any:
+    fut = _INFLIGHT.get(key)
+    if fut is None:
+        fut = asyncio.ensure_future(fetch())
+        _INFLIGHT[key] = fut
+        fut.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    else:
+        STATS["coalesced"] += 1
+    return await asyncio.shield(fut)
 
-# --- NEW: reuse a single HTTP session (saves TCP/TLS setup time)
-SESSION = requests.Session()
+def forecast_stats() -> Dict[str, Any]:
+    return {**STATS, "inflight": len(_INFLIGHT), "forecasts_cached": len(_FORECAST_CACHE),
+            "gazetteer": GAZETTEER.stats()}
 
 # --- NEW: small in-process cache for forecasts (TTL) + stale-ok fallback
 _FORECAST_CACHE: Dict[str, Dict[str, Any]] = {}
@@ -34,22 +83,34 @@ def _cache_get(key: str, allow_stale: bool = False):
 def _cache_set(key: str, value: Dict[str, Any]):
     _FORECAST_CACHE[key] = {"ts": _now_utc(), "value": value}
 
-@lru_cache(maxsize=256)
-def get_lat_lon_from_pincode(pincode: str) -> Optional[Tuple[float, float]]:
-    """Convert Indian pincode to (lat, lon) using OWM Geocoding API. LRU cached."""
-    if not OPENWEATHERMAP_API_KEY:
-        return None
+# --- NEW: pincode -> (lat, lon) from the offline India Post gazetteer (binary search,
+# no API call). Only failed remote lookups are retried; successes land in the overlay.
+GAZETTEER = PincodeGazetteer(overlay_path=PINCODE_OVERLAY or None)
+
+async def _fetch_lat_lon(pincode: str) -> Optional[Tuple[float, float]]:
+    STATS["geo_fetches"] += 1
     try:
-        r = SESSION.get(
-            "https://api.openweathermap.org/geo/1.0/zip",
+        r = await _http().get(
+            "/geo/1.0/zip",
             params={"zip": f"{pincode},IN", "appid": OPENWEATHERMAP_API_KEY},
-            timeout=(0.5, 3.5),  # connect, read (tighter but safe)
+            timeout=_GEO_TIMEOUT,
         )
         r.raise_for_status()
         data = r.json()
-        return float(data["lat"]), float(data["lon"])
+        coords = float(data["lat"]), float(data["lon"])
     except Exception:
         return None
+    await asyncio.to_thread(GAZETTEER.remember, pincode, *coords)
+    return coords
+
+async def get_lat_lon_from_pincode(pincode: str) -> Optional[Tuple[float, float]]:
+    """Convert Indian pincode to (lat, lon): offline gazetteer first, OWM Geocoding API for unknown codes."""
+    place = GAZETTEER.lookup(pincode)
+    if place is not None:
+        return place.lat, place.lon
+    if not OPENWEATHERMAP_API_KEY or normalize_pincode(pincode) is None:
+        return None
+    return await _single_flight(f"geo::{pincode}", lambda: _fetch_lat_lon(pincode))
 
 
 def _fmt_daily_record(d: Dict[str, Any]) -> Dict[str, Any]:
@@ -82,24 +143,33 @@ def _fmt_daily_record(d: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def get_agri_forecast_7d(pincode: str) -> Dict[str, Any]:
+async def get_agri_forecast_7d(pincode: str) -> Dict[str, Any]:
     """
     Tool: 7-day daily forecast for an Indian pincode using:
       https://api.openweathermap.org/data/2.5/forecast/daily?lat=..&lon=..&cnt=7&units=metric&appid=KEY
     Returns a concise 'report' + structured 'daily' list.
 
-    NOTE: Same interface as before. Adds:
-      - session reuse
+    NOTE: Same interface as before, now async (ADK awaits it). Adds:
+      - pooled async HTTP client
       - 8 min fresh TTL + 24h stale-ok cache
+      - single-flight: concurrent calls for one pincode share a fetch
       - tighter timeouts
       - graceful fallback ('degraded') if network is slow
     """
+    calls = FORECAST_CALLS.get()
+    if calls is not None:
+        calls.append(pincode)
     cache_key = f"7d::{pincode}"
 
     # 1) Fresh cache hit?
     cached = _cache_get(cache_key, allow_stale=False)
     if cached:
+        STATS["cache_hits"] += 1
         return cached
+    return await _single_flight(cache_key, lambda: _fetch_forecast(pincode, cache_key))
+
+
+async def _fetch_forecast(pincode: str, cache_key: str) -> Dict[str, Any]:
 
     if not OPENWEATHERMAP_API_KEY:
         out = {
@@ -115,7 +185,7 @@ def get_agri_forecast_7d(pincode: str) -> Dict[str, Any]:
         _cache_set(cache_key, out)
         return out
 
-    coords = get_lat_lon_from_pincode(pincode)
+    coords = await get_lat_lon_from_pincode(pincode)
     if not coords:
         # Try stale-ok cache before giving generic guidance
         stale = _cache_get(cache_key, allow_stale=True)
@@ -137,9 +207,10 @@ def get_agri_forecast_7d(pincode: str) -> Dict[str, Any]:
 
     lat, lon = coords
 
+    STATS["forecast_fetches"] += 1
     try:
-        r = SESSION.get(
-            "https://api.openweathermap.org/data/2.5/forecast/daily",
+        r = await _http().get(
+            "/data/2.5/forecast/daily",
             params={
                 "lat": lat,
                 "lon": lon,
@@ -147,7 +218,7 @@ def get_agri_forecast_7d(pincode: str) -> Dict[str, Any]:
                 "units": "metric",
                 "appid": OPENWEATHERMAP_API_KEY,
             },
-            timeout=(0.6, 4.0),  # connect, read
+            timeout=_FORECAST_TIMEOUT,
         )
         r.raise_for_status()
         data = r.json()
@@ -196,7 +267,7 @@ def get_agri_forecast_7d(pincode: str) -> Dict[str, Any]:
 
 # Optional quick test:
 if __name__ == "__main__":
-    out = get_agri_forecast_7d("721302")  # Mumbai GPO
+    out = asyncio.run(get_agri_forecast_7d("721302"))  # Mumbai GPO
     print(out["status"], "-", out.get("error_message"))
     print(out.get("report"))
 
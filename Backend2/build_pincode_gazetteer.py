@@ -0,0 +1,170 @@
+"""
+Build the offline pincode table (data/pincodes.npy + data/pincodes.json)
+from the India Post all-India pincode directory.
+
+Input is one row per post office, either the data.gov.in CSV (pincode, districtname,
+statename, latitude, longitude; header case does not matter) or JSONL with the same
+fields (e.g. pins.json.bz2 from the indiapins package). .gz/.bz2 are read directly.
+
+Per pincode:
+  - coordinates: median of its offices' coordinates. Strings like 18.85°, 25.43 N
+    and 17°57'17.7 are parsed. Swapped lat/lon pairs are fixed. Points outside India,
+    or more than MAX_DISTRICT_DEG from the district median, are dropped.
+  - no usable office coordinates: the district median, flagged as approximate
+  - district / state: the most common non-empty value among its offices
+
+Usage (from Backend2/):
+    python build_pincode_gazetteer.py all_india_pincode_directory.csv
+    python build_pincode_gazetteer.py pins.json.bz2 --source "indiapins 1.1.0"
+"""
+import argparse
+import bz2
+import csv
+import gzip
+import json
+import os
+import re
+import statistics
+from collections import Counter, defaultdict
+from datetime import date
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from pincode_gazetteer import FLAG_DISTRICT_CENTROID, NAMES_PATH, RECORD, TABLE_PATH, normalize_pincode
+
+LAT_RANGE, LON_RANGE = (6.0, 37.5), (68.0, 97.5)
+MAX_DISTRICT_DEG = 2.0
+
+_FIELDS = {
+    "pincode": ("pincode",),
+    "district": ("district", "districtname"),
+    "state": ("state", "statename"),
+    "lat": ("latitude", "lat"),
+    "lon": ("longitude", "lon", "long"),
+}
+_DMS = re.compile(r"(\d+(?:\.\d+)?)\s*°\s*(\d+(?:\.\d+)?)?\s*'?\s*(\d+(?:\.\d+)?)?")
+
+
+def _open(path: str):
+    if path.endswith(".bz2"):
+        return bz2.open(path, "rt", encoding="utf-8")
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _rows(path: str) -> Iterator[Dict[str, object]]:
+    stem = re.sub(r"\.(bz2|gz)$", "", path.lower())
+    with _open(path) as f:
+        raw = csv.DictReader(f) if stem.endswith(".csv") else (json.loads(l) for l in f if l.strip())
+        for row in raw:
+            lower = {str(k).strip().lower(): v for k, v in row.items()}
+            yield {name: next((lower[a] for a in aliases if a in lower), None) for name, aliases in _FIELDS.items()}
+
+
+def _coord(value) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value or "").strip()
+    if not text or text.upper() in {"NA", "N/A", "NULL", "NONE"}:
+        return None
+    m = _DMS.match(text)
+    if m and ("'" in text or m.group(2)):
+        d, mi, s = (float(g) if g else 0.0 for g in m.groups())
+        return d + mi / 60 + s / 3600
+    try:
+        return float(re.sub(r"[^0-9.\-]", "", text))
+    except ValueError:
+        return None
+
+
+def _in_india(lat: float, lon: float) -> bool:
+    return LAT_RANGE[0] <= lat <= LAT_RANGE[1] and LON_RANGE[0] <= lon <= LON_RANGE[1]
+
+
+def _point(row) -> Optional[Tuple[float, float]]:
+    lat, lon = _coord(row["lat"]), _coord(row["lon"])
+    if lat is None or lon is None:
+        return None
+    if _in_india(lat, lon):
+        return lat, lon
+    if _in_india(lon, lat):
+        return lon, lat
+    return None
+
+
+def _name(value) -> str:
+    return re.sub(r"\s+", " ", str(value or "")).strip().upper()
+
+
+def build(path: str) -> Tuple[np.ndarray, Dict[str, List[str]]]:
+    points: Dict[int, List[Tuple[float, float]]] = defaultdict(list)
+    places: Dict[int, Counter] = defaultdict(Counter)
+    for row in _rows(path):
+        pin = normalize_pincode(row["pincode"])
+        if pin is None:
+            continue
+        counts = places[pin]
+        place = (_name(row["district"]), _name(row["state"]))
+        if place[0]:
+            counts[place] += 1
+        pt = _point(row)
+        if pt is not None:
+            points[pin].append(pt)
+
+    home = {pin: (c.most_common(1)[0][0] if c else ("", "")) for pin, c in places.items()}
+    by_district: Dict[Tuple[str, str], List[Tuple[float, float]]] = defaultdict(list)
+    for pin, pts in points.items():
+        if home[pin][0]:
+            by_district[home[pin]].extend(pts)
+    centroid = {k: (statistics.median(p[0] for p in v), statistics.median(p[1] for p in v))
+                for k, v in by_district.items()}
+
+    districts, states = [""], [""]
+    d_index, s_index = {"": 0}, {"": 0}
+    records = []
+    for pin in sorted(home):
+        district, state = home[pin]
+        c = centroid.get((district, state))
+        pts = points.get(pin, [])
+        if c is not None:
+            pts = [p for p in pts if abs(p[0] - c[0]) <= MAX_DISTRICT_DEG and abs(p[1] - c[1]) <= MAX_DISTRICT_DEG]
+        if pts:
+            lat, lon, flags = statistics.median(p[0] for p in pts), statistics.median(p[1] for p in pts), 0
+        elif c is not None:
+            (lat, lon), flags = c, FLAG_DISTRICT_CENTROID
+        else:
+            continue  # nothing to place it with; left to the remote geocoder
+        for name, names, index in ((district, districts, d_index), (state, states, s_index)):
+            if name not in index:
+                index[name] = len(names)
+                names.append(name)
+        records.append((pin, lat, lon, d_index[district], s_index[state], flags))
+
+    table = np.array(records, dtype=RECORD)
+    return table, {"districts": districts, "states": states}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("input", help="India Post directory, CSV or JSONL (.gz/.bz2 ok)")
+    ap.add_argument("--source", default=None, help="provenance note stored in pincodes.json")
+    ap.add_argument("--table", default=TABLE_PATH)
+    ap.add_argument("--names", default=NAMES_PATH)
+    args = ap.parse_args()
+
+    table, names = build(args.input)
+    os.makedirs(os.path.dirname(args.table), exist_ok=True)
+    np.save(args.table, table)
+    meta = {"source": args.source or os.path.basename(args.input), "built": date.today().isoformat(),
+            "pincodes": int(len(table)), **names}
+    with open(args.names, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, separators=(",", ":"))
+    approx = int(np.count_nonzero(table["flags"] & FLAG_DISTRICT_CENTROID))
+    print(f"{len(table)} pincodes ({approx} at district centroid), {len(names['districts']) - 1} districts, "
+          f"{len(names['states']) - 1} states -> {args.table} ({os.path.getsize(args.table) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    main()
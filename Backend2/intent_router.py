@@ -0,0 +1,166 @@
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Tuple
+
+# Deterministic pre-router in front of the agent graph. A query it is sure about
+# (today: weather only) skips ROOT_AGENT -> Agronomy_agent -> tool -> back up, and
+# is answered from the forecast tool with a single summarisation call instead.
+# Everything unclear goes to the agents, so the rules favour precision over recall.
+
+# Score: strong term 2, weak term 1, time cue 1; route at >= ROUTE_SCORE when the
+# query is short, asks about the future (a time cue or forecast phrase is required)
+# and no other-domain, advice or past-tense term matched. Ambiguous weak terms ("hot",
+# "cold", "wind"... also mean cold storage, hot pepper, windmill) only count next to a
+# strong term or a forecast phrase ("will it", "is it going to"). "kal" / "कल" is both
+# yesterday and tomorrow, so it is a cue only next to a future-tense verb.
+ROUTE_SCORE = 2
+MAX_WORDS = 30
+
+_EN_STRONG = re.compile(
+    r"\b(weather|forecast\w*|mausam|mosam|mausum|havaman|hawaman|vatavaran)\b", re.IGNORECASE)
+_EN_WEAK = re.compile(
+    r"\b(rain\w*|showers?|drizzle|downpour|temperatures?|humid\w*|"
+    r"storms?|thunder\w*|cloud\w*|fog\w*|frost|hail\w*|cyclone|heatwave|barish|baarish|barsaat|barsat|"
+    r"varsha|paus|tapman|baadal|badal)\b", re.IGNORECASE)
+_EN_AMBIGUOUS = re.compile(
+    r"\b(temp|hot|heat|cold|chilly|wind|windy|winds|garmi|thand|thandi)\b", re.IGNORECASE)
+_EN_FORECAST_PHRASE = re.compile(
+    r"\b(will it|is it going to|going to be|will there be|expected|how (?:hot|cold|windy))\b", re.IGNORECASE)
+_EN_CUE = re.compile(
+    r"\b(today|tonight|tomorrow|this week|next (?:\d+|few|two|three|seven) days|weekend|coming days|"
+    r"will it|is it going to|expected|aaj|is hafte|agle)\b", re.IGNORECASE)
+_EN_KAL = re.compile(r"\bkal\b", re.IGNORECASE)
+_EN_FUTURE = re.compile(r"\b\w+(?:ega|egi|enge|oga|ogi)\b", re.IGNORECASE)
+_EN_PAST = re.compile(
+    r"\b(yesterday|last (?:night|evening|week|month|few days|\d+ days)|ago|how was|was it|did it|"
+    r"has it been|hui|hua|tha|thi|pichhle|pichle|beete)\b", re.IGNORECASE)
+# agronomy / market / scheme vocabulary: the answer needs more than a forecast
+_EN_OTHER = re.compile(
+    r"\b(spray\w*|pesticide\w*|fungicide\w*|insecticide\w*|herbicide\w*|weedicide\w*|fertili[sz]\w*|urea|dap|"
+    r"npk|manure|sow\w*|seed\w*|plant(?:ing)?|transplant\w*|harvest\w*|irrigat\w*|water(?:ing)?|pest\w*|"
+    r"disease\w*|fungus|blight|yellow\w*|variet\w*|yield\w*|price\w*|rate|mandi|market|sell\w*|loan\w*|"
+    r"scheme\w*|subsid\w*|insurance|claim|compensation|damage\w*|loss|rainfed|rain-fed|kharif|rabi|season\w*|"
+    r"month\w*|year\w*|onset|arrive\w*|arrival|suitable|grow\w*|climate|khad|buvai|sinchai|bhav|dawai|"
+    r"dava|keet|kida|storage|warehouse|godown|pepper\w*|chill?i\w*|capsicum|hybrid\w*|mill\w*|tractor\w*|"
+    r"pump\w*|motor\w*|machine\w*|milk|dairy|soil|fever|cattle|cows?|buffalo\w*|animal\w*|poultry|"
+    r"protect\w*|should i|what to do|what can i do|kya kar\w*|kaise bachaye\w*)\b", re.IGNORECASE)
+
+# Indian-language terms are matched as substrings: \b is unreliable inside Indic words
+# (vowel signs are not \w).
+_INDIC_STRONG = (
+    "मौसम", "हवामान", "મોસમ", "હવામાન", "আবহাওয়া", "বতৰ", "வானிலை", "వాతావరణ", "ಹವಾಮಾನ",
+    "കാലാവസ്ഥ", "ਮੌਸਮ", "ପାଣିପାଗ", "पूर्वानुमान", "अंदाज",
+)
+_INDIC_WEAK = (
+    "बारिश", "बरसात", "वर्षा", "पाऊस", "तापमान", "गर्मी", "ठंड", "आंधी", "तूफान", "ओले", "बादल",
+    "વરસાદ", "તાપમાન", "বৃষ্টি", "তাপমাত্রা", "மழை", "வெப்பநிலை", "వర్షం", "వాన", "ఉష్ణోగ్రత",
+    "ಮಳೆ", "ತಾಪಮಾನ", "മഴ", "താപനില", "ਮੀਂਹ", "ਬਾਰਿਸ਼", "ਤਾਪਮਾਨ", "ବର୍ଷା", "ତାପମାତ୍ରା",
+)
+_INDIC_CUE = (
+    "आज", "इस हफ्ते", "अगले", "उद्या", "या आठवड्यात", "આજે", "আজ", "আগামীকাল",
+    "இன்று", "நாளை", "ఈరోజు", "రేపు", "ಇಂದು", "ನಾಳೆ", "ഇന്ന്", "നാളെ", "ਅੱਜ", "ଆଜି",
+)
+# yesterday-or-tomorrow words and the future-tense endings that settle them
+_INDIC_KAL = ("कल", "કાલે", "ਕੱਲ੍ਹ", "କାଲି")
+_INDIC_FUTURE = ("ेगा", "ेगी", "ेंगे", "ोगा", "ोगी", "शे", "ੇਗਾ", "ੇਗੀ", "ିବ", "ହେବ")
+_INDIC_PAST = ("हुई", "हुआ", "था", "थी", "पिछले", "बीते", "ગઈકાલે", "ਪਿਛਲੇ")
+_INDIC_OTHER = (
+    "छिड़काव", "छिडकाव", "खाद", "यूरिया", "बुवाई", "बुआई", "सिंचाई", "कीट", "रोग", "दवा", "भाव", "मंडी",
+    "कीमत", "योजना", "लोन", "बीमा", "नुकसान", "फवारणी", "खत", "पेरणी", "बाजारभाव", "कर्ज",
+    "ખાતર", "છંટકાવ", "ભાવ", "সার", "দাম", "உரம்", "விலை", "ఎరువు", "ధర", "ಗೊಬ್ಬರ", "ಬೆಲೆ",
+    "വളം", "വില", "ਖਾਦ", "ਭਾਅ", "ସାର", "ଦର",
+    "काट", "कटाई", "क्या करूं", "क्या करूँ", "क्या करें", "बचाव", "बचाएं", "दूध", "पशु",
+)
+
+
+@dataclass
+class RouteDecision:
+    route: str                              # "weather" | "agent"
+    score: int = 0
+    reason: str = ""
+    matched: List[str] = field(default_factory=list)
+
+
+def route(query: str) -> RouteDecision:
+    text = (query or "").strip()
+    if not text:
+        return RouteDecision("agent", reason="empty")
+    if len(text.split()) > MAX_WORDS:
+        return RouteDecision("agent", reason="long")
+    other = _EN_OTHER.findall(text) + [t for t in _INDIC_OTHER if t in text]
+    strong = _EN_STRONG.findall(text) + [t for t in _INDIC_STRONG if t in text]
+    weak = _EN_WEAK.findall(text) + [t for t in _INDIC_WEAK if t in text]
+    if strong or _EN_FORECAST_PHRASE.search(text):
+        weak += _EN_AMBIGUOUS.findall(text)
+    cue = _EN_CUE.findall(text) + [t for t in _INDIC_CUE if t in text]
+    if _EN_FUTURE.search(text) or any(t in text for t in _INDIC_FUTURE):
+        cue += _EN_KAL.findall(text) + [t for t in _INDIC_KAL if t in text]
+    past = _EN_PAST.findall(text) + [t for t in _INDIC_PAST if t in text]
+    score = 2 * bool(strong) + bool(weak) + bool(cue)
+    matched = [m.lower() for m in strong + weak + cue]
+    if other:
+        return RouteDecision("agent", score, "other_domain:" + ",".join(sorted({o.lower() for o in other})), matched)
+    if past:
+        return RouteDecision("agent", score, "past:" + ",".join(sorted({p.lower() for p in past})), matched)
+    if not cue and not _EN_FORECAST_PHRASE.search(text):
+        return RouteDecision("agent", score, "no_time_cue", matched)
+    if score >= ROUTE_SCORE:
+        return RouteDecision("weather", score, "rules", matched)
+    return RouteDecision("agent", score, "below_threshold", matched)
+
+
+class RouterStats:
+    """
+    Counters behind /stats/router.
+
+    Precision: in INTENT_ROUTER_MODE=shadow every query still runs the agent graph,
+    and a routed query counts as correct when the agents called the forecast tool
+    too. Latency saved: routed runs x (mean full-graph time of runs that called the
+    forecast tool - mean routed time).
+    """
+
+    def __init__(self):
+        self.decisions: Dict[str, int] = {"weather": 0, "agent": 0}
+        self.direct_runs = self.direct_failures = 0
+        self.direct_s = 0.0
+        self.agent_weather_runs = 0
+        self.agent_weather_s = 0.0
+        # shadow mode confusion counts: (routed, agents used the forecast tool)
+        self.shadow: Dict[Tuple[bool, bool], int] = {}
+
+    def decided(self, decision: RouteDecision) -> None:
+        self.decisions[decision.route] = self.decisions.get(decision.route, 0) + 1
+
+    def direct(self, t0: float, ok: bool) -> None:
+        if ok:
+            self.direct_runs += 1
+            self.direct_s += time.perf_counter() - t0
+        else:
+            self.direct_failures += 1
+
+    def agent_run(self, t0: float, used_forecast: bool, decision: RouteDecision, shadow: bool) -> None:
+        if used_forecast:
+            self.agent_weather_runs += 1
+            self.agent_weather_s += time.perf_counter() - t0
+        if shadow:
+            key = (decision.route == "weather", used_forecast)
+            self.shadow[key] = self.shadow.get(key, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        direct_ms = 1000.0 * self.direct_s / self.direct_runs if self.direct_runs else None
+        agent_ms = 1000.0 * self.agent_weather_s / self.agent_weather_runs if self.agent_weather_runs else None
+        tp, fp = self.shadow.get((True, True), 0), self.shadow.get((True, False), 0)
+        fn = self.shadow.get((False, True), 0)
+        saved = (agent_ms - direct_ms) * self.direct_runs if direct_ms is not None and agent_ms is not None else None
+        return {
+            "decisions": dict(self.decisions),
+            "direct_runs": self.direct_runs,
+            "direct_failures": self.direct_failures,
+            "avg_direct_ms": round(direct_ms, 1) if direct_ms is not None else None,
+            "avg_agent_weather_ms": round(agent_ms, 1) if agent_ms is not None else None,
+            "est_saved_ms_total": round(saved, 1) if saved is not None else None,
+            "shadow": {"routed_and_tool": tp, "routed_no_tool": fp, "missed_tool": fn,
+                       "precision": round(tp / (tp + fp), 4) if tp + fp else None,
+                       "recall": round(tp / (tp + fn), 4) if tp + fn else None},
+        }
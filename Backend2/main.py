@@ -1,20 +1,28 @@
 import os
-import uuid
+import asyncio
 import json
 import re
+import time
+import logging
+import contextlib
 from datetime import datetime, timezone
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
 import google.generativeai as genai
+from google.genai import Client as GenAIClient
 from google.genai import types
+from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 
 from KisanSathi.agent import root_agent
 from KisanSathi.agent import generalized_agent
+from KisanSathi.Tools.forecasting_tool import FORECAST_CALLS, aclose_http, forecast_stats, get_agri_forecast_7d
+from intent_router import RouteDecision, RouterStats, route
+from session_store import BoundedSessionService, HistoryDB
 
 # Configure Google API key
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -23,6 +31,82 @@ if not GOOGLE_API_KEY:
 genai.configure(api_key=GOOGLE_API_KEY)
 
 app = FastAPI(title="KisanSathi Backend")
+logger = logging.getLogger("kisansathi")
+
+APP_NAME = "KisanSathi"
+ADK_SESSION_MAX = int(os.getenv("ADK_SESSION_MAX", "10000"))
+ADK_SESSION_IDLE_TTL_S = float(os.getenv("ADK_SESSION_IDLE_TTL_S", "3600"))
+# Compact per-session history: a postgresql:// DSN or a SQLite file ("" = memory only)
+ADK_SESSION_DB = os.getenv("ADK_SESSION_DB", "adk_sessions.sqlite3")
+ADK_SESSION_TOKEN_BUDGET = int(os.getenv("ADK_SESSION_TOKEN_BUDGET", "1200"))
+ADK_SESSION_TURN_MAX_TOKENS = int(os.getenv("ADK_SESSION_TURN_MAX_TOKENS", "300"))
+# Weather pre-router (intent_router.py): "on" answers routed queries from the forecast
+# tool directly, "shadow" only records what it would have done, "off" disables it.
+# Shadow by default: switch to "on" once /stats/router shows the live precision.
+INTENT_ROUTER_MODE = os.getenv("INTENT_ROUTER_MODE", "shadow").lower()
+
+# One session store and one Runner per agent for the whole process; building them
+# per request re-resolved the agent tree every call.
+session_service = BoundedSessionService(
+    max_sessions=ADK_SESSION_MAX,
+    idle_ttl_s=ADK_SESSION_IDLE_TTL_S,
+    db=HistoryDB(ADK_SESSION_DB) if ADK_SESSION_DB else None,
+    token_budget=ADK_SESSION_TOKEN_BUDGET,
+    turn_max_tokens=ADK_SESSION_TURN_MAX_TOKENS,
+)
+RUNNERS: Dict[str, Runner] = {}
+RUNNER_SETUP_MS: Dict[str, float] = {}
+
+def _build_runners() -> None:
+    for Agent in (root_agent, generalized_agent):
+        t0 = time.perf_counter()
+        RUNNERS[Agent.name] = Runner(app_name=APP_NAME, agent=Agent, session_service=session_service)
+        RUNNER_SETUP_MS[Agent.name] = round((time.perf_counter() - t0) * 1000.0, 3)
+    logger.info("ADK runners ready: %s", RUNNER_SETUP_MS)
+
+_build_runners()
+
+@app.on_event("shutdown")
+async def _flush_sessions() -> None:
+    await session_service.flush()
+    await aclose_http()
+
+def _lease(req: "KisanSathiRequest", pincode: str, Agent):
+    seed = [(t[0], t[1], Agent.name) for t in req.recent_turns if len(t) >= 2 and t[0] and t[1]]
+    return session_service.lease(APP_NAME, req.user_email, req.session_id, {"pincode": pincode}, seed=seed)
+
+router_stats = RouterStats()
+_genai_client: Optional[GenAIClient] = None
+
+def _summary_client() -> GenAIClient:
+    global _genai_client
+    if _genai_client is None:
+        _genai_client = GenAIClient(api_key=GOOGLE_API_KEY)
+    return _genai_client
+
+# prompt/output tokens of the top-level agent (AgentTool sub-agents not included)
+USAGE_TOTALS: Dict[str, float] = {"runs": 0, "prompt_tokens": 0, "output_tokens": 0, "history_tokens": 0, "agent_s": 0.0}
+
+def _new_usage(history_tokens: int) -> Dict[str, Any]:
+    return {"prompt_tokens": 0, "output_tokens": 0, "llm_calls": 0, "history_tokens": history_tokens,
+            "_t0": time.perf_counter()}
+
+def _add_usage(usage: Dict[str, Any], event) -> None:
+    meta = getattr(event, "usage_metadata", None)
+    if meta is None or event.partial:
+        return
+    usage["prompt_tokens"] += meta.prompt_token_count or 0
+    usage["output_tokens"] += meta.candidates_token_count or 0
+    usage["llm_calls"] += 1
+
+def _finish_usage(usage: Dict[str, Any]) -> Dict[str, Any]:
+    usage["agent_ms"] = round((time.perf_counter() - usage.pop("_t0")) * 1000.0, 1)
+    USAGE_TOTALS["runs"] += 1
+    USAGE_TOTALS["prompt_tokens"] += usage["prompt_tokens"]
+    USAGE_TOTALS["output_tokens"] += usage["output_tokens"]
+    USAGE_TOTALS["history_tokens"] += usage["history_tokens"]
+    USAGE_TOTALS["agent_s"] += usage["agent_ms"] / 1000.0
+    return usage
 
 class Meta(BaseModel):
     language: Optional[str] = None
@@ -35,6 +119,12 @@ class KisanSathiRequest(BaseModel):
     message_id: str
     user_query: str
     meta: Meta = Field(default_factory=Meta)
+    # caller's last (question, answer) turns, oldest first; only used to seed a chat
+    # this service has no history for yet
+    recent_turns: List[List[str]] = Field(default_factory=list)
+
+class RecordTurnRequest(KisanSathiRequest):
+    bot_reply: str
 
 class KisanSathiResponse(BaseModel):
     bot_reply: str
@@ -43,62 +133,162 @@ class KisanSathiResponse(BaseModel):
     message_id: Optional[str] = None
     user_email: Optional[str] = None
     pincode: Optional[str] = None
+    usage: Optional[Dict[str, Any]] = None
 
 # -------- Helper --------
-async def run_root_agent(enriched_query: str, pincode: str, Agent: str) -> str:
-    """Run the ADK root_agent once and return final text."""
-    session_service = InMemorySessionService()
-    adk_session_id = str(uuid.uuid4())
-
-    await session_service.create_session(
-        app_name="KisanSathi",
-        session_id=adk_session_id,
-        user_id="user1",
-        state={"pincode": pincode}
-    )
-
-    runner = Runner(
-        app_name="KisanSathi",
-        agent=Agent,
-        session_service=session_service
-    )
+_FENCE_RE = re.compile(r"^```(?:json)?\n|```$", flags=re.IGNORECASE)
 
+async def run_root_agent(req: "KisanSathiRequest", enriched_query: str, pincode: str, Agent,
+                         decision: Optional[RouteDecision] = None) -> tuple:
+    """Run the agent once in the chat's session; return (final text, token usage)."""
+    runner = RUNNERS[Agent.name]
     content = types.Content(role="user", parts=[types.Part(text=enriched_query)])
 
     final_text: Optional[str] = None
-    async for event in runner.run_async(
-        user_id="user1",
-        session_id=adk_session_id,
-        new_message=content,
-    ):
-        if event.is_final_response() and event.content and event.content.parts:
-            final_text = event.content.parts[0].text
-            break
+    async with _track_forecast(decision), \
+            _lease(req, pincode, Agent) as lease:
+        usage = _new_usage(lease.history_tokens)
+        async for event in runner.run_async(
+            user_id=req.user_email,
+            session_id=req.session_id,
+            new_message=content,
+        ):
+            _add_usage(usage, event)
+            if event.is_final_response() and event.content and event.content.parts:
+                final_text = event.content.parts[0].text
+                break
+        if final_text:
+            # the session keeps the bare question, not the CONTEXT block around it
+            lease.record(req.user_query, final_text, Agent.name, req.message_id)
 
     if not final_text:
         raise HTTPException(status_code=502, detail="No final response from agent")
 
-    cleaned = re.sub(r"^```(?:json)?\n|```$", "", final_text.strip(), flags=re.IGNORECASE)
-    return cleaned
+    cleaned = _FENCE_RE.sub("", final_text.strip())
+    return cleaned, _finish_usage(usage)
 
-# -------- Endpoint --------
+@contextlib.asynccontextmanager
+async def _track_forecast(decision: Optional[RouteDecision]):
+    """Note whether a full agent run used the forecast tool (router precision / savings)."""
+    calls: list = []
+    token = FORECAST_CALLS.set(calls)
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        FORECAST_CALLS.reset(token)
+    if decision is not None:
+        router_stats.agent_run(t0, bool(calls), decision, shadow=INTENT_ROUTER_MODE == "shadow")
 
-@app.get("/")
-async def root():
-    return {"name": "KisanSathi Backend API", "status": "ok"}
+def _decide(req: "KisanSathiRequest") -> Optional[RouteDecision]:
+    if INTENT_ROUTER_MODE not in {"on", "shadow"}:
+        return None
+    decision = route(req.user_query)
+    router_stats.decided(decision)
+    return decision
 
-@app.post("/KisanSaathi", response_model=KisanSathiResponse)
-async def kisansaathi(req: KisanSathiRequest):
-    if not (req.user_email and req.session_id and req.message_id and req.user_query):
-        raise HTTPException(status_code=400, detail="user_email, session_id, message_id, user_query are required")
+def _weather_prompt(req: "KisanSathiRequest", forecast: Dict[str, Any]) -> str:
+    general = (req.meta.mode or "").lower() == "general"
+    return (
+        "You are a farming assistant for Indian farmers. Answer the farmer's weather question using only "
+        "the 7-day forecast below.\n"
+        "- Reply in the same language as the question.\n"
+        f"- At most {100 if general else 120} words: 2–3 short lines on the weather, then one actionable farm tip "
+        "(irrigation, spraying or harvest timing).\n"
+        "- Highlight important words with bold (*word*). Never say you are an AI.\n\n"
+        f"FORECAST (pincode {forecast.get('pincode')}):\n{forecast.get('report')}\n\n"
+        f"QUESTION:\n{req.user_query}"
+    )
 
-    pincode = (req.meta.pincode or "").strip()
+async def answer_weather(req: "KisanSathiRequest", pincode: str, Agent) -> Optional[tuple]:
+    """
+    Routed weather query: forecast tool + one summarisation call, no agent hops.
+    None when anything goes wrong, and the caller runs the agents instead.
+    """
+    t0 = time.perf_counter()
+    try:
+        async with _lease(req, pincode, Agent) as lease:
+            usage = _new_usage(lease.history_tokens)
+            forecast = await get_agri_forecast_7d(pincode)
+            if forecast.get("status") not in {"success", "stale_ok"} or not forecast.get("report"):
+                raise RuntimeError(f"forecast {forecast.get('status')}")
+            resp = await _summary_client().aio.models.generate_content(
+                model=root_agent.model,
+                contents=_weather_prompt(req, forecast),
+                config=types.GenerateContentConfig(temperature=0.3, max_output_tokens=400),
+            )
+            text = (resp.text or "").strip()
+            if not text:
+                raise RuntimeError("empty summary")
+            meta = resp.usage_metadata
+            if meta is not None:
+                usage["prompt_tokens"] += meta.prompt_token_count or 0
+                usage["output_tokens"] += meta.candidates_token_count or 0
+            usage["llm_calls"] += 1
+            lease.record(req.user_query, text, Agent.name, req.message_id)
+    except Exception as e:
+        logger.warning("weather route failed, falling back to the agents: %s", e)
+        router_stats.direct(t0, ok=False)
+        return None
+    router_stats.direct(t0, ok=True)
+    usage["route"] = "weather"
+    return _FENCE_RE.sub("", text), _finish_usage(usage)
+
+def _postprocess_reply(bot_reply_text: str) -> str:
+    try:
+        parsed = json.loads(bot_reply_text)
+        bot_reply_text = json.dumps(parsed, ensure_ascii=False)
+    except json.JSONDecodeError:
+        pass
+    # Replace multiple newlines (>1) with a single newline
+    return re.sub(r"\n{2,}", "\n", bot_reply_text)
+
+class _StreamCleaner:
+    """
+    Incremental version of the reply post-processing: strips a leading ```/```json
+    fence line and a trailing ``` fence, trims outer whitespace and collapses newline
+    runs, without waiting for the whole reply. Trailing whitespace/backticks are held
+    back until more text shows they are not the end of the reply.
+    """
+
+    def __init__(self):
+        self._head: Optional[str] = ""   # text seen before we know whether a fence opens the reply
+        self._pending = ""
 
+    def feed(self, text: str) -> str:
+        if self._head is not None:
+            head = (self._head + text).lstrip()
+            if not head:
+                self._head = ""
+                return ""
+            if head.startswith("```") or "```".startswith(head):
+                if "\n" not in head:
+                    self._head = head  # wait for the end of the fence line
+                    return ""
+                first, rest = head.split("\n", 1)
+                if re.fullmatch(r"```(?:json)?", first.strip(), flags=re.IGNORECASE):
+                    head = rest
+            self._head = None
+            text = head
+        buf = re.sub(r"\n{2,}", "\n", self._pending + text)
+        tail = re.search(r"[\s`]*$", buf)
+        self._pending = buf[tail.start():]
+        return buf[:tail.start()]
+
+    def finish(self) -> str:
+        tail = (self._head or "") + self._pending
+        self._head, self._pending = None, ""
+        tail = tail.rstrip()
+        if tail.endswith("```"):
+            tail = tail[:-3]
+        return re.sub(r"\n{2,}", "\n", tail)
+
+def _build_enriched_query(req: "KisanSathiRequest", pincode: str) -> str:
     # NEW: build an enriched query the model will definitely read
     mode_str = "GENERAL" if (req.meta.mode or "").lower() == "general" else "PERSONALIZED"
     language = (req.meta.language or "en").strip() or "en"
 
-    enriched_query = (
+    return (
         "CONTEXT\n"
         f"PINCODE: {pincode}\n"
         f"MODE: {mode_str}\n"
@@ -110,14 +300,56 @@ async def kisansaathi(req: KisanSathiRequest):
         "USER QUERY\n"
         f"{req.user_query}"
     )
+
+def _validate(req: "KisanSathiRequest") -> None:
+    if not (req.user_email and req.session_id and req.message_id and req.user_query):
+        raise HTTPException(status_code=400, detail="user_email, session_id, message_id, user_query are required")
+
+# -------- Endpoint --------
+
+@app.get("/")
+async def root():
+    return {"name": "KisanSathi Backend API", "status": "ok"}
+
+@app.get("/stats/sessions")
+async def stats_sessions():
+    runs = USAGE_TOTALS["runs"] or 1
+    usage = {
+        "runs": USAGE_TOTALS["runs"],
+        "avg_prompt_tokens": round(USAGE_TOTALS["prompt_tokens"] / runs, 1),
+        "avg_output_tokens": round(USAGE_TOTALS["output_tokens"] / runs, 1),
+        "avg_history_tokens": round(USAGE_TOTALS["history_tokens"] / runs, 1),
+        "avg_agent_ms": round(1000.0 * USAGE_TOTALS["agent_s"] / runs, 1),
+    }
+    return {"status": "ok", "data": {"runner_setup_ms": RUNNER_SETUP_MS, "usage": usage, **session_service.stats()}}
+
+@app.get("/stats/router")
+async def stats_router():
+    return {"status": "ok", "data": {"mode": INTENT_ROUTER_MODE, **router_stats.stats()}}
+
+@app.get("/stats/forecast")
+async def stats_forecast():
+    return {"status": "ok", "data": forecast_stats()}
+
+@app.post("/KisanSaathi", response_model=KisanSathiResponse)
+async def kisansaathi(req: KisanSathiRequest):
+    _validate(req)
+
+    pincode = (req.meta.pincode or "").strip()
+    enriched_query = _build_enriched_query(req, pincode)
     print(req.user_query)
+    Agent = generalized_agent if req.meta.mode == "general" else root_agent
+    decision = _decide(req)
 
     try:
-        if (req.meta.mode == "general"):
-            # CHANGED: pass enriched_query (not raw user_query)
-            bot_reply_text = await run_root_agent(enriched_query, pincode, generalized_agent)
+        answered = None
+        if decision is not None and decision.route == "weather" and pincode and INTENT_ROUTER_MODE == "on":
+            answered = await answer_weather(req, pincode, Agent)
+        if answered is not None:
+            bot_reply_text, usage = answered
         else:
-            bot_reply_text = await run_root_agent(enriched_query, pincode, root_agent)
+            # CHANGED: pass enriched_query (not raw user_query)
+            bot_reply_text, usage = await run_root_agent(req, enriched_query, pincode, Agent, decision)
 
     except HTTPException:
         raise
@@ -125,16 +357,7 @@ async def kisansaathi(req: KisanSathiRequest):
         raise HTTPException(status_code=500, detail=f"Agent error: {e}")
 
     end_time_iso = datetime.now(timezone.utc).isoformat()
-
-    try:
-        parsed = json.loads(bot_reply_text)
-        bot_reply_text = json.dumps(parsed, ensure_ascii=False)
-    except json.JSONDecodeError:
-        pass
-
-    import re
-   # Replace multiple newlines (>1) with a single newline
-    cleaned_text = re.sub(r"\n{2,}", "\n", bot_reply_text)
+    cleaned_text = _postprocess_reply(bot_reply_text)
 
     return KisanSathiResponse(
         bot_reply=cleaned_text,
@@ -143,4 +366,112 @@ async def kisansaathi(req: KisanSathiRequest):
         message_id=req.message_id,
         user_email=req.user_email,
         pincode=pincode or None,
+        usage=usage,
     )
+
+def _ndjson(obj: Dict[str, Any]) -> bytes:
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+@app.post("/KisanSaathi/record")
+async def kisansaathi_record(req: RecordTurnRequest):
+    """Store a turn the caller answered itself (e.g. from its answer cache) in the chat's session."""
+    _validate(req)
+    if not req.bot_reply.strip():
+        raise HTTPException(status_code=400, detail="bot_reply is required")
+    pincode = (req.meta.pincode or "").strip()
+    Agent = generalized_agent if req.meta.mode == "general" else root_agent
+    async with _lease(req, pincode, Agent) as lease:
+        lease.record(req.user_query, req.bot_reply.strip(), Agent.name, req.message_id)
+    return {"status": "ok", "message_id": req.message_id}
+
+@app.post("/KisanSaathi/stream")
+async def kisansaathi_stream(req: KisanSathiRequest):
+    """
+    Streaming variant of /KisanSaathi (newline-delimited JSON, one event per line):
+      {"type": "delta", "text": ...}                   partial model text, already cleaned
+      {"type": "tool_start", "name": ..., "author": ...} the agent called a tool
+      {"type": "tool_end", "name": ..., "author": ...}   the tool returned
+      {"type": "final", "bot_reply": ..., "end_time": ..., ...}  same fields as /KisanSaathi
+      {"type": "error", "detail": ...}
+    """
+    _validate(req)
+    pincode = (req.meta.pincode or "").strip()
+    enriched_query = _build_enriched_query(req, pincode)
+    Agent = generalized_agent if req.meta.mode == "general" else root_agent
+    decision = _decide(req)
+
+    async def _events():
+        runner = RUNNERS[Agent.name]
+        cleaner = _StreamCleaner()
+        streamed = []
+        final_text: Optional[str] = None
+        try:
+            answered = None
+            if decision is not None and decision.route == "weather" and pincode and INTENT_ROUTER_MODE == "on":
+                yield _ndjson({"type": "tool_start", "name": "get_agri_forecast_7d", "author": "router"})
+                answered = await answer_weather(req, pincode, Agent)
+                yield _ndjson({"type": "tool_end", "name": "get_agri_forecast_7d", "author": "router"})
+            if answered is not None:
+                final_text, usage = answered
+                delta = cleaner.feed(final_text)
+                streamed.append(delta)
+                if delta:
+                    yield _ndjson({"type": "delta", "text": delta})
+            else:
+                content = types.Content(role="user", parts=[types.Part(text=enriched_query)])
+                async with _track_forecast(decision), \
+                        _lease(req, pincode, Agent) as lease:
+                    usage = _new_usage(lease.history_tokens)
+                    async for event in runner.run_async(
+                        user_id=req.user_email,
+                        session_id=req.session_id,
+                        new_message=content,
+                        run_config=RunConfig(streaming_mode=StreamingMode.SSE),
+                    ):
+                        _add_usage(usage, event)
+                        for call in event.get_function_calls() or []:
+                            yield _ndjson({"type": "tool_start", "name": call.name, "author": event.author})
+                        for resp in event.get_function_responses() or []:
+                            yield _ndjson({"type": "tool_end", "name": resp.name, "author": event.author})
+
+                        text = "".join(p.text for p in (event.content.parts if event.content else []) or [] if p.text)
+                        if event.partial:
+                            delta = cleaner.feed(text)
+                            streamed.append(delta)
+                            if delta:
+                                yield _ndjson({"type": "delta", "text": delta})
+                        elif event.is_final_response() and text:
+                            final_text = event.content.parts[0].text
+                            if not "".join(streamed):
+                                # model did not stream this turn (e.g. SSE unsupported): send it whole
+                                delta = cleaner.feed(final_text)
+                                streamed.append(delta)
+                                if delta:
+                                    yield _ndjson({"type": "delta", "text": delta})
+                            break
+                    if final_text or "".join(streamed):
+                        lease.record(req.user_query, final_text or "".join(streamed), Agent.name, req.message_id)
+                    usage = _finish_usage(usage)
+
+            tail = cleaner.finish()
+            if tail:
+                streamed.append(tail)
+                yield _ndjson({"type": "delta", "text": tail})
+            if not final_text and not "".join(streamed):
+                yield _ndjson({"type": "error", "detail": "No final response from agent"})
+                return
+            bot_reply = _postprocess_reply(_FENCE_RE.sub("", (final_text or "".join(streamed)).strip()))
+            yield _ndjson({
+                "type": "final",
+                "bot_reply": bot_reply,
+                "end_time": datetime.now(timezone.utc).isoformat(),
+                "session_id": req.session_id,
+                "message_id": req.message_id,
+                "user_email": req.user_email,
+                "pincode": pincode or None,
+                "usage": usage,
+            })
+        except Exception as e:
+            yield _ndjson({"type": "error", "detail": f"Agent error: {e}"})
+
+    return StreamingResponse(_events(), media_type="application/x-ndjson")
@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger("kisansathi.gazetteer")
+
+# Offline pincode -> (lat, lon, district, state). The bundled table (data/pincodes.npy,
+# built by build_pincode_gazetteer.py from the India Post directory) is one record per
+# pincode sorted by pin, memory-mapped and binary-searched: ~19.6k rows, ~300 KB, no
+# API call. Pincodes it doesn't know are geocoded remotely by the caller and written
+# to an append-only JSONL overlay, which is loaded back on start.
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+TABLE_PATH = os.path.join(DATA_DIR, "pincodes.npy")
+NAMES_PATH = os.path.join(DATA_DIR, "pincodes.json")
+
+RECORD = np.dtype([
+    ("pin", "<u4"),
+    ("lat", "<f4"),
+    ("lon", "<f4"),
+    ("district", "<u2"),     # index into names["districts"]
+    ("state", "u1"),         # index into names["states"]
+    ("flags", "u1"),
+])
+FLAG_DISTRICT_CENTROID = 1   # no usable post-office coordinates: district median used
+
+
+@dataclass(frozen=True)
+class Place:
+    lat: float
+    lon: float
+    district: Optional[str] = None
+    state: Optional[str] = None
+    source: str = "bundled"          # "bundled" | "overlay"
+    approx: bool = False             # district centroid, not the pincode's own offices
+
+
+def normalize_pincode(pincode: Any) -> Optional[int]:
+    text = str(pincode or "").strip().replace(" ", "")
+    if len(text) != 6 or not text.isdigit() or text[0] == "0":
+        return None
+    return int(text)
+
+
+class PincodeGazetteer:
+    def __init__(self, table_path: str = TABLE_PATH, names_path: str = NAMES_PATH,
+                 overlay_path: Optional[str] = None):
+        self.overlay_path = overlay_path
+        self._table = np.zeros(0, dtype=RECORD)
+        self._pins = self._table["pin"]
+        self._districts: List[str] = []
+        self._states: List[str] = []
+        self._overlay: Dict[int, Place] = {}
+        self._lock = threading.Lock()
+        self.hits_bundled = self.hits_overlay = self.misses = self.overlay_writes = 0
+        self._load_table(table_path, names_path)
+        self._load_overlay()
+
+    def _load_table(self, table_path: str, names_path: str) -> None:
+        try:
+            table = np.load(table_path, mmap_mode="r")
+            with open(names_path, encoding="utf-8") as f:
+                names = json.load(f)
+        except FileNotFoundError:
+            logger.warning("pincode table %s not found; every pincode will be geocoded remotely", table_path)
+            return
+        if table.dtype != RECORD:
+            raise ValueError(f"{table_path}: unexpected record layout {table.dtype}")
+        # the key column alone (4 bytes x ~19.6k) in RAM; records stay memory-mapped
+        self._table, self._pins = table, np.ascontiguousarray(table["pin"])
+        self._districts, self._states = names["districts"], names["states"]
+
+    def _load_overlay(self) -> None:
+        if not self.overlay_path or not os.path.exists(self.overlay_path):
+            return
+        with open(self.overlay_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                    pin = normalize_pincode(row["pincode"])
+                    if pin is not None:
+                        self._overlay[pin] = Place(float(row["lat"]), float(row["lon"]), row.get("district"),
+                                                   row.get("state"), source="overlay")
+                except (ValueError, KeyError, TypeError):
+                    continue  # a torn last line after a crash
+
+    def lookup(self, pincode: Any) -> Optional[Place]:
+        pin = normalize_pincode(pincode)
+        if pin is None:
+            return None
+        i = int(np.searchsorted(self._pins, pin))
+        if i < len(self._pins) and self._pins[i] == pin:
+            self.hits_bundled += 1
+            rec = self._table[i]
+            return Place(round(float(rec["lat"]), 5), round(float(rec["lon"]), 5),
+                         self._districts[rec["district"]] or None, self._states[rec["state"]] or None,
+                         approx=bool(rec["flags"] & FLAG_DISTRICT_CENTROID))
+        place = self._overlay.get(pin)
+        if place is not None:
+            self.hits_overlay += 1
+            return place
+        self.misses += 1
+        return None
+
+    def remember(self, pincode: Any, lat: float, lon: float,
+                 district: Optional[str] = None, state: Optional[str] = None) -> None:
+        """Record a remotely geocoded pincode; appended to the overlay file when one is set. Blocking I/O."""
+        pin = normalize_pincode(pincode)
+        if pin is None:
+            return
+        self._overlay[pin] = Place(lat, lon, district, state, source="overlay")
+        if not self.overlay_path:
+            return
+        line = json.dumps({"pincode": str(pin), "lat": lat, "lon": lon, "district": district, "state": state})
+        with self._lock:
+            try:
+                with open(self.overlay_path, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+                self.overlay_writes += 1
+            except OSError as e:
+                logger.warning("pincode overlay write failed: %s", e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bundled": len(self._pins),
+            "overlay": len(self._overlay),
+            "hits_bundled": self.hits_bundled,
+            "hits_overlay": self.hits_overlay,
+            "misses": self.misses,
+            "overlay_writes": self.overlay_writes,
+        }
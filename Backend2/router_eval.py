@@ -0,0 +1,126 @@
+"""
+Offline evaluation of the weather pre-router (intent_router.py).
+
+Each case is a farmer query labelled True when the 7-day forecast alone answers it
+(safe to skip the agent graph) and False otherwise. Reports precision (routed queries
+that really were forecast-only: a wrong route gives a worse answer), recall (forecast-
+only queries that got the fast path) and the router's own cost per query.
+
+Usage (from Backend2/):
+    python router_eval.py
+    python router_eval.py --file cases.jsonl --verbose
+
+--file takes JSONL rows like {"query": "...", "weather": true}.
+The built-in sample was written alongside the rules, so its precision is an upper
+bound. The live figure comes from INTENT_ROUTER_MODE=shadow (the default) plus
+GET /stats/router.
+"""
+import argparse
+import json
+import time
+from typing import List, Tuple
+
+from intent_router import route
+
+SAMPLE: List[Tuple[str, bool]] = [
+    # forecast-only questions, English and romanised
+    ("Will it rain this week at my farm?", True),
+    ("What is the weather forecast for tomorrow?", True),
+    ("How hot will it be today?", True),
+    ("Is there any chance of rain in the next 3 days?", True),
+    ("weather today", True),
+    ("What's the temperature tomorrow?", True),
+    ("Any storm expected this weekend?", True),
+    ("aaj mausam kaisa rahega", True),
+    ("kal barish hogi kya", True),
+    ("Will there be frost tonight?", True),
+    ("Is it going to be windy tomorrow?", True),
+    ("humidity this week", True),
+    # Indian languages
+    ("आज मौसम कैसा रहेगा?", True),
+    ("कल बारिश होगी क्या?", True),
+    ("उद्या पाऊस पडेल का?", True),
+    ("આજે હવામાન કેવું રહેશે?", True),
+    ("আজ কি বৃষ্টি হবে?", True),
+    ("நாளை மழை வருமா?", True),
+    ("రేపు వర్షం పడుతుందా?", True),
+    ("ನಾಳೆ ಮಳೆ ಬರುತ್ತದೆಯೇ?", True),
+    ("ഇന്ന് മഴ പെയ്യുമോ?", True),
+    ("ਕੱਲ੍ਹ ਮੀਂਹ ਪਵੇਗਾ?", True),
+    ("ଆଜି ପାଣିପାଗ କେମିତି ରହିବ?", True),
+    # weather-dependent advice: needs the agents
+    ("Should I spray pesticide before the rain tomorrow?", False),
+    ("Will the rain damage my onion harvest?", False),
+    ("Is it safe to apply urea if it rains today?", False),
+    ("Should I irrigate my wheat this week given the weather?", False),
+    ("Which crops grow well in hot weather?", False),
+    ("When will the monsoon arrive this year?", False),
+    ("Best rainfed crops for kharif season", False),
+    ("What temperature is best for wheat germination?", False),
+    ("कल बारिश है, क्या छिड़काव करूं?", False),
+    ("बारिश से फसल का नुकसान हुआ, बीमा कैसे मिलेगा?", False),
+    ("पाऊस आहे, खत टाकू का?", False),
+    ("Cold storage subsidy for potato", False),
+    # not weather at all
+    ("How much urea should I apply to wheat at tillering?", False),
+    ("Whiteflies are attacking my cotton, what should I spray?", False),
+    ("What is the onion price in Nashik today?", False),
+    ("Is there a subsidy for drip irrigation?", False),
+    ("गेहूं में पहली सिंचाई कब करें?", False),
+    ("Tell me about Kisan Credit Card loan", False),
+    ("and how much for 2 acres?", False),
+    ("What about tomorrow?", False),
+    # "hot" / "cold" / "wind" outside the weather sense
+    ("Is the cold storage open today?", False),
+    ("Where is the nearest cold storage, will it take potatoes tomorrow?", False),
+    ("Which hot pepper hybrid is best this week?", False),
+    ("Does the wind mill pump work today?", False),
+    ("Is hot water treatment of seed needed today?", False),
+    # advice, past weather and non-weather "temperature"
+    ("frost protection for potato this week", False),
+    ("कल मौसम कैसा रहेगा, गेहूं काटूं?", False),
+    ("How was the weather yesterday?", False),
+    ("temperature of milk today", False),
+    ("कल बहुत बारिश हुई थी, अब क्या करें?", False),
+    ("kal barish hui thi kya", False),
+    ("weather", False),
+    ("mausam kaisa hai", False),
+]
+
+
+def _load(path: str) -> List[Tuple[str, bool]]:
+    with open(path, encoding="utf-8") as f:
+        return [(row["query"], bool(row["weather"])) for row in map(json.loads, f) if row.strip()]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--file", help="JSONL with {query, weather} rows (default: built-in sample)")
+    ap.add_argument("--verbose", action="store_true", help="print every case")
+    args = ap.parse_args()
+
+    sample = _load(args.file) if args.file else SAMPLE
+    tp = fp = fn = tn = 0
+    router_us = 0.0
+    for query, gold in sample:
+        t0 = time.perf_counter()
+        decision = route(query)
+        router_us += (time.perf_counter() - t0) * 1e6
+        routed = decision.route == "weather"
+        tp += routed and gold
+        fp += routed and not gold
+        fn += gold and not routed
+        tn += not routed and not gold
+        if args.verbose or routed != gold:
+            tag = "ok  " if routed == gold else "MISS" if gold else "FP  "
+            print(f"{tag} {decision.route:<7} score={decision.score} {decision.reason:<40} {query}")
+
+    n = len(sample)
+    print(f"\n{n} cases: routed {tp + fp}, to agents {fn + tn}")
+    print(f"precision {tp / (tp + fp):.3f}" if tp + fp else "precision n/a")
+    print(f"recall    {tp / (tp + fn):.3f}" if tp + fn else "recall    n/a")
+    print(f"router cost {router_us / n:.1f} µs/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,486 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from google.adk.events import Event
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+logger = logging.getLogger("kisansathi.sessions")
+
+# (app_name, user_id, session_id)
+_Key = Tuple[str, str, str]
+
+
+def approx_tokens(text: str) -> int:
+    """~4 characters per token; close enough for budgeting English turns."""
+    return (len(text or "") + 3) // 4
+
+
+def _clip(text: str, max_tokens: int) -> str:
+    if approx_tokens(text) <= max_tokens:
+        return text
+    return text[:max_tokens * 4].rsplit(" ", 1)[0] + " …"
+
+
+class CompactHistory:
+    """
+    What a session remembers between requests: the user's questions and the agents'
+    final replies (no tool calls, no partial events, no per-turn CONTEXT block),
+    plus a one-line-per-question summary of the turns that no longer fit.
+
+    compact() keeps the newest turns within token_budget; older turns are folded
+    into the summary, which itself is capped at a quarter of the budget.
+
+    `ids` remembers the message_ids of recent turns so that a turn delivered twice
+    (hedged request, client retry) is recorded once.
+    """
+
+    MAX_IDS = 64
+
+    def __init__(self, turns: Optional[List[Dict[str, Any]]] = None, summary: Optional[List[str]] = None,
+                 ids: Optional[List[str]] = None):
+        self.turns: List[Dict[str, Any]] = turns or []
+        self.summary: List[str] = summary or []
+        self.ids: List[str] = ids or []
+
+    def add(self, user_text: str, reply_text: str, author: str, turn_max_tokens: int,
+            turn_id: Optional[str] = None) -> bool:
+        if turn_id:
+            if turn_id in self.ids:
+                return False
+            self.ids = (self.ids + [turn_id])[-self.MAX_IDS:]
+        self.turns.append({"role": "user", "author": "user", "text": _clip(user_text, turn_max_tokens)})
+        self.turns.append({"role": "model", "author": author, "text": _clip(reply_text, turn_max_tokens)})
+        return True
+
+    def copy(self) -> "CompactHistory":
+        return CompactHistory(list(self.turns), list(self.summary), list(self.ids))
+
+    def compact(self, token_budget: int) -> None:
+        summary_budget = token_budget // 4
+        kept, used = [], 0
+        for turn in reversed(self.turns):
+            cost = approx_tokens(turn["text"])
+            if kept and used + cost > token_budget - summary_budget:
+                break
+            kept.append(turn)
+            used += cost
+        kept.reverse()
+        dropped = self.turns[:len(self.turns) - len(kept)]
+        if kept and kept[0]["role"] == "model":
+            dropped.append(kept.pop(0))  # never start on a reply without its question
+        for turn in dropped:
+            if turn["role"] == "user":
+                self.summary.append(_clip(turn["text"], 30))
+        while self.summary and approx_tokens(" ".join(self.summary)) > summary_budget:
+            self.summary.pop(0)
+        self.turns = kept
+
+    @property
+    def tokens(self) -> int:
+        return sum(approx_tokens(t["text"]) for t in self.turns) + approx_tokens(" ".join(self.summary))
+
+    def events(self) -> List[Event]:
+        out = []
+        if self.summary:
+            text = "Earlier in this chat the farmer asked about:\n" + "\n".join(f"- {q}" for q in self.summary)
+            out.append(Event(author="user", invocation_id="history",
+                             content=types.Content(role="user", parts=[types.Part(text=text)])))
+        for turn in self.turns:
+            out.append(Event(author=turn["author"], invocation_id="history",
+                             content=types.Content(role=turn["role"], parts=[types.Part(text=turn["text"])])))
+        return out
+
+    def to_json(self) -> str:
+        return json.dumps({"turns": self.turns, "summary": self.summary, "ids": self.ids}, ensure_ascii=False)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "CompactHistory":
+        data = json.loads(raw)
+        return cls(data.get("turns"), data.get("summary"), data.get("ids"))
+
+
+class HistoryDB:
+    """
+    One row per session: (app_name, user_id, session_id) -> state + CompactHistory
+    as JSON + a version bumped by every append. `url` is a postgres:// /
+    postgresql:// DSN (psycopg2) or a SQLite file path. Calls are blocking; callers
+    run them in a worker thread.
+
+    The row is the source of truth: append() adds a turn to whatever is stored,
+    under a row lock, so replicas serving the same chat never overwrite each
+    other's turns. Several Backend2 replicas must share one postgres DSN for that;
+    a SQLite file is per host.
+    """
+
+    def __init__(self, url: str):
+        self.url = url
+        self.postgres = url.startswith(("postgres://", "postgresql://"))
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        if self.postgres:
+            import psycopg2
+            conn = psycopg2.connect(self.url)
+            conn.autocommit = True
+            ddl_state = "JSONB"
+        else:
+            conn = sqlite3.connect(self.url, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            ddl_state = "TEXT"
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS adk_compact_sessions (
+                app_name   TEXT NOT NULL,
+                user_id    TEXT NOT NULL,
+                session_id TEXT NOT NULL,
+                state      {ddl_state} NOT NULL,
+                history    {ddl_state} NOT NULL,
+                tokens     INTEGER NOT NULL,
+                updated_at DOUBLE PRECISION NOT NULL,
+                version    INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (app_name, user_id, session_id)
+            )
+            """
+        )
+        # tables created before rows were versioned
+        if self.postgres:
+            cur.execute("ALTER TABLE adk_compact_sessions ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 0")
+        else:
+            cols = [r[1] for r in cur.execute("PRAGMA table_info(adk_compact_sessions)")]
+            if "version" not in cols:
+                cur.execute("ALTER TABLE adk_compact_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        cur.close()
+        self._conn = conn
+        return conn
+
+    def _sql(self, q: str) -> str:
+        return q.replace("?", "%s") if self.postgres else q
+
+    def load(self, key: _Key, newer_than: int = -1) -> Optional[Tuple[Dict[str, Any], CompactHistory, int]]:
+        """(state, history, version), or None when absent or not newer than `newer_than`."""
+        with self._lock:
+            try:
+                cur = self._connect().cursor()
+                cur.execute(self._sql("SELECT state, history, version FROM adk_compact_sessions "
+                                      "WHERE app_name = ? AND user_id = ? AND session_id = ? AND version > ?"),
+                            (*key, newer_than))
+                row = cur.fetchone()
+                cur.close()
+            except Exception:
+                self._reset()
+                raise
+        return self._decode(row) if row is not None else None
+
+    def append(self, key: _Key, state: Dict[str, Any], turn: Tuple[str, str, str, Optional[str]],
+               token_budget: int, turn_max_tokens: int,
+               seed: Optional[List[Tuple[str, str, str]]] = None) -> Tuple[Dict[str, Any], CompactHistory, int]:
+        """
+        Add one (user_text, reply_text, author, turn_id) turn to the stored history
+        and return the result. `seed` turns go in first when the row has no history
+        yet (a chat that predates this store).
+        """
+        with self._lock:
+            conn = self._connect()
+            cur = conn.cursor()
+            try:
+                cur.execute("BEGIN" if self.postgres else "BEGIN IMMEDIATE")
+                cur.execute(self._sql(
+                    "INSERT INTO adk_compact_sessions "
+                    "(app_name, user_id, session_id, state, history, tokens, updated_at, version) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?, 0) ON CONFLICT (app_name, user_id, session_id) DO NOTHING"),
+                    (*key, "{}", CompactHistory().to_json(), time.time()))
+                cur.execute(self._sql(
+                    "SELECT state, history, version FROM adk_compact_sessions "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?" + (" FOR UPDATE" if self.postgres else "")),
+                    key)
+                stored_state, history, version = self._decode(cur.fetchone())
+                if version == 0 and not history.turns:
+                    for user_text, reply_text, author in seed or ():
+                        history.add(user_text, reply_text, author, turn_max_tokens)
+                user_text, reply_text, author, turn_id = turn
+                history.add(user_text, reply_text, author, turn_max_tokens, turn_id=turn_id)
+                history.compact(token_budget)
+                state = {**stored_state, **state}
+                version += 1
+                cur.execute(self._sql(
+                    "UPDATE adk_compact_sessions SET state = ?, history = ?, tokens = ?, updated_at = ?, version = ? "
+                    "WHERE app_name = ? AND user_id = ? AND session_id = ?"),
+                    (json.dumps(state, ensure_ascii=False), history.to_json(), history.tokens, time.time(),
+                     version, *key))
+                cur.execute("COMMIT")
+                cur.close()
+            except Exception:
+                try:
+                    cur.execute("ROLLBACK")
+                except Exception:
+                    pass
+                self._reset()
+                raise
+        return state, history, version
+
+    @staticmethod
+    def _decode(row) -> Tuple[Dict[str, Any], CompactHistory, int]:
+        state, history, version = row
+        if isinstance(state, str):
+            state = json.loads(state)
+        if not isinstance(history, str):
+            history = json.dumps(history)
+        return state, CompactHistory.from_json(history), int(version)
+
+    def _reset(self) -> None:
+        # drop a broken connection; the next call reconnects
+        try:
+            if self._conn is not None:
+                self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+
+
+class SessionLease:
+    """Handle for one agent run in a session; record() the finished turn."""
+
+    def __init__(self, key: _Key):
+        self.key = key
+        self.history_tokens = 0
+        self.turn: Optional[Tuple[str, str, str, Optional[str]]] = None
+
+    def record(self, user_text: str, reply_text: str, author: str, turn_id: Optional[str] = None) -> None:
+        """turn_id (the caller's message_id) makes a duplicate delivery of the turn a no-op."""
+        self.turn = (user_text, reply_text, author, turn_id)
+
+
+class BoundedSessionService(InMemorySessionService):
+    """
+    InMemorySessionService with a size cap, an idle TTL and a persistent compact
+    history.
+
+    Sessions are keyed by the caller's real (user_id, session_id), so one chat keeps
+    its ADK session across turns and across both agents. Beyond max_sessions the
+    least recently used idle session is evicted; sessions idle for longer than
+    idle_ttl_s (0 = never) are dropped on the next lease. A session leased by a
+    running request is never evicted, however full the store is.
+
+    After every run the session's events are replaced by its CompactHistory (see
+    above) trimmed to token_budget, and the turn is appended to `db` in the
+    background. With a db every lease also checks the stored version and reloads
+    the session when another replica (or an earlier process) wrote a newer one, so
+    a chat whose turns land on different replicas keeps one history. A session the
+    db knows nothing about can be seeded with the caller's recent turns.
+    """
+
+    def __init__(self, max_sessions: int = 10000, idle_ttl_s: float = 3600.0, db: Optional[HistoryDB] = None,
+                 token_budget: int = 1200, turn_max_tokens: int = 300):
+        super().__init__()
+        self.max_sessions = max(1, max_sessions)
+        self.idle_ttl_s = idle_ttl_s
+        self.db = db
+        self.token_budget = token_budget
+        self.turn_max_tokens = turn_max_tokens
+        self._last_used: "OrderedDict[_Key, float]" = OrderedDict()
+        self._leased: Dict[_Key, int] = {}
+        self._history: Dict[_Key, CompactHistory] = {}
+        self._versions: Dict[_Key, int] = {}
+        self._seeds: Dict[_Key, List[Tuple[str, str, str]]] = {}   # seeded, not yet in the DB
+        self._writes: set = set()
+        self.created = self.reused = self.restored = self.evicted = self.expired = 0
+        self.reloaded = self.seeded = 0
+        self.db_errors = 0
+        self.lease_s = 0.0
+        self.leases = 0
+
+    @asynccontextmanager
+    async def lease(self, app_name: str, user_id: str, session_id: str,
+                    state: Optional[Dict[str, Any]] = None,
+                    seed: Optional[List[Tuple[str, str, str]]] = None) -> AsyncIterator[SessionLease]:
+        """
+        The session for (user_id, session_id): in memory (reloaded if the DB has a
+        newer version), restored from the history DB, or created. Keys in `state`
+        overwrite the session state (e.g. a changed pincode). `seed`
+        ((user_text, reply_text, author) turns, oldest first) fills a session that
+        nothing could be restored for.
+        """
+        t0 = time.perf_counter()
+        key = (app_name, user_id, session_id)
+        self._expire(time.monotonic())
+        handle = SessionLease(key)
+        stored = self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+        if stored is None:
+            await self._open(key, state or {}, seed)
+        else:
+            if key not in self._leased:
+                await self._refresh(key)
+            stored.state.update(state or {})
+            self.reused += 1
+        self._touch(key)
+        self._leased[key] = self._leased.get(key, 0) + 1
+        self._evict()
+        handle.history_tokens = self._history[key].tokens
+        self.lease_s += time.perf_counter() - t0
+        self.leases += 1
+        try:
+            yield handle
+        finally:
+            left = self._leased.get(key, 1) - 1
+            if left:
+                self._leased[key] = left
+            else:
+                self._leased.pop(key, None)
+            self._touch(key)
+            self._settle(handle)
+
+    async def _load(self, key: _Key, newer_than: int = -1):
+        if self.db is None:
+            return None
+        try:
+            return await asyncio.to_thread(self.db.load, key, newer_than)
+        except Exception as e:
+            self.db_errors += 1
+            logger.warning("session history load failed: %s", e)
+            return None
+
+    async def _open(self, key: _Key, state: Dict[str, Any], seed: Optional[List[Tuple[str, str, str]]]) -> None:
+        app_name, user_id, session_id = key
+        saved = await self._load(key)
+        if saved is not None:
+            saved_state, history, version = saved
+            state = {**saved_state, **state}
+            self.restored += 1
+        else:
+            history, version = CompactHistory(), 0
+            if seed:
+                for user_text, reply_text, author in seed:
+                    history.add(user_text, reply_text, author, self.turn_max_tokens)
+                history.compact(self.token_budget)
+                if self.db is not None:
+                    self._seeds[key] = list(seed)  # written with the first appended turn
+                self.seeded += 1
+            self.created += 1
+        if key not in self._history:
+            self._history[key], self._versions[key] = history, version
+        # the session may have been created by a concurrent lease while we awaited the DB
+        if self.sessions.get(app_name, {}).get(user_id, {}).get(session_id) is None:
+            await self.create_session(app_name=app_name, user_id=user_id, session_id=session_id, state=state)
+            self.sessions[app_name][user_id][session_id].events = self._history[key].events()
+
+    async def _refresh(self, key: _Key) -> None:
+        """Reload an idle in-memory session when the DB holds a newer version of it."""
+        saved = await self._load(key, self._versions.get(key, 0))
+        if saved is not None and key not in self._leased:
+            self._apply(key, *saved)
+            self.reloaded += 1
+
+    def _apply(self, key: _Key, state: Dict[str, Any], history: CompactHistory, version: int) -> None:
+        stored = self.sessions.get(key[0], {}).get(key[1], {}).get(key[2])
+        if stored is None or version <= self._versions.get(key, 0):
+            return
+        self._history[key], self._versions[key] = history, version
+        stored.state.update(state)
+        if key not in self._leased:
+            stored.events = history.events()
+
+    def _settle(self, handle: SessionLease) -> None:
+        """Fold the finished turn into the compact history and replace the raw events."""
+        key = handle.key
+        history = self._history.get(key)
+        stored = self.sessions.get(key[0], {}).get(key[1], {}).get(key[2])
+        if history is None or stored is None:
+            return
+        if handle.turn is not None:
+            user_text, reply_text, author, turn_id = handle.turn
+            history.add(user_text, reply_text, author, self.turn_max_tokens, turn_id=turn_id)
+            history.compact(self.token_budget)
+            if self.db is not None:
+                self._persist(key, dict(stored.state), handle.turn)
+        stored.events = history.events()
+
+    def _persist(self, key: _Key, state: Dict[str, Any], turn: Tuple[str, str, str, Optional[str]]) -> None:
+        task = asyncio.ensure_future(asyncio.to_thread(
+            self.db.append, key, state, turn, self.token_budget, self.turn_max_tokens, self._seeds.get(key)))
+        self._writes.add(task)
+        task.add_done_callback(lambda t: self._write_done(key, t))
+
+    def _write_done(self, key: _Key, task: "asyncio.Future") -> None:
+        self._writes.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            self.db_errors += 1
+            logger.warning("session history save failed: %s", task.exception())
+            return
+        # the stored row now has this turn plus whatever other replicas appended
+        self._seeds.pop(key, None)
+        self._apply(key, *task.result())
+
+    async def flush(self) -> None:
+        """Wait for pending history writes (shutdown)."""
+        if self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
+
+    def _touch(self, key: _Key) -> None:
+        self._last_used[key] = time.monotonic()
+        self._last_used.move_to_end(key)
+
+    def _drop(self, key: _Key) -> None:
+        app_name, user_id, session_id = key
+        self._last_used.pop(key, None)
+        self._history.pop(key, None)
+        self._versions.pop(key, None)
+        self._seeds.pop(key, None)
+        users = self.sessions.get(app_name, {})
+        users.get(user_id, {}).pop(session_id, None)
+        if user_id in users and not users[user_id]:
+            del users[user_id]
+
+    def _expire(self, now: float) -> None:
+        if self.idle_ttl_s <= 0:
+            return
+        for key, used in list(self._last_used.items()):
+            if now - used < self.idle_ttl_s:
+                break  # oldest first
+            if key not in self._leased:
+                self._drop(key)
+                self.expired += 1
+
+    def _evict(self) -> None:
+        if len(self._last_used) <= self.max_sessions:
+            return
+        for key in list(self._last_used):
+            if len(self._last_used) <= self.max_sessions:
+                break
+            if key not in self._leased:
+                self._drop(key)
+                self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        tokens = [h.tokens for h in self._history.values()]
+        return {
+            "sessions": len(self._last_used),
+            "max_sessions": self.max_sessions,
+            "leased": len(self._leased),
+            "created": self.created,
+            "reused": self.reused,
+            "restored": self.restored,
+            "reloaded": self.reloaded,
+            "seeded": self.seeded,
+            "evicted": self.evicted,
+            "expired": self.expired,
+            "avg_lease_ms": round(1000.0 * self.lease_s / self.leases, 3) if self.leases else 0.0,
+            "history_db": ("postgres" if self.db.postgres else "sqlite") if self.db is not None else None,
+            "history_db_errors": self.db_errors,
+            "pending_writes": len(self._writes),
+            "token_budget": self.token_budget,
+            "avg_session_tokens": round(sum(tokens) / len(tokens), 1) if tokens else 0.0,
+        }